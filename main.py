@@ -71,7 +71,9 @@ def main():
         
         # Save data before exit
         print("\nSaving system data...")
-        system_manager.save_all_data()
+        system_manager.checkpoint()
+        if not system_manager.wait_durable():
+            print("Warning: some changes could not be saved.")
         
         # Create backup
         backup_choice = get_yes_no_input("Would you like to create a backup before exit? (y/n)")
@@ -4,10 +4,12 @@ Implements administrator-specific functionality
 """
 
 from models.user import User
+from utils.log_store import LogStore
 import json
 import random
 import string
 from datetime import datetime
+from itertools import islice
 
 
 class SystemLog:
@@ -65,9 +67,12 @@ class Admin(User):
         super().__init__(username, password, name, email, user_id, first_login)
         self.admin_id = admin_id or user_id
         self.access_level = access_level
-        self.system_logs = []
-        self.created_users = []  # Track users created by this admin
-        self.deleted_users = []  # Track users deleted by this admin
+        # Where actions and created/deleted users are logged; the system manager
+        # shares its persistent store, standalone admins log in memory
+        self.log_store = LogStore()
+        # Log lists of a record from before schema version 3 that are not in
+        # the log store yet; they are written back with the record until moved
+        self.legacy_logs = {}
     
     def generate_user_id(self, user_type):
         """
@@ -160,7 +165,7 @@ class Admin(User):
         if 'plain_password' in user_data_for_storage:
             del user_data_for_storage['plain_password']
         
-        self.created_users.append(user_data_for_storage)
+        self.log_store.append('created_user', self.admin_id, user_data_for_storage)
         
         # Log the action
         self.log_action(
@@ -207,7 +212,7 @@ class Admin(User):
                         "name": name,
                         "deleted_at": datetime.now().isoformat()
                     }
-                    self.deleted_users.append(deletion_record)
+                    self.log_store.append('deleted_user', self.admin_id, deletion_record)
                 except Exception as e:
                     # If there's an error, just log without the details
                     deletion_record = {
@@ -216,7 +221,7 @@ class Admin(User):
                         "name": "Unknown",
                         "deleted_at": datetime.now().isoformat()
                     }
-                    self.deleted_users.append(deletion_record)
+                    self.log_store.append('deleted_user', self.admin_id, deletion_record)
                     print(f"Warning: Could not record full details of deleted user: {e}")
             
             return True
@@ -266,7 +271,7 @@ class Admin(User):
             print(f"Enrolled: {course.get_enrollment_count()}/{course.capacity}")
             print(f"Available: {course.get_available_spots()}")
             if course.enrolled_students:
-                print(f"Students: {', '.join(course.enrolled_students[:5])}")
+                print(f"Students: {', '.join(islice(course.enrolled_students, 5))}")
                 if len(course.enrolled_students) > 5:
                     print(f"  ... and {len(course.enrolled_students) - 5} more")
     
@@ -305,27 +310,23 @@ class Admin(User):
         print(f"Active Users Today: {recent_logins}")
         
         # System logs count
-        print(f"Total System Logs: {len(self.system_logs)}")
+        print(f"Total System Logs: {self.log_store.count('action', self.admin_id)}")
         
         # Users created by admins
-        admin_created = len(self.created_users)
+        admin_created = self.log_store.count('created_user', self.admin_id)
         print(f"Users Created by This Admin: {admin_created}")
         
         # Users deleted by this admin
-        admin_deleted = len(self.deleted_users)
+        admin_deleted = self.log_store.count('deleted_user', self.admin_id)
         print(f"Users Deleted by This Admin: {admin_deleted}")
         
         # Show deleted users details if any
-        if self.deleted_users:
+        if admin_deleted:
             print("\n--- Recently Deleted Users ---")
-            # Sort by deletion time, most recent first
-            recent_deletions = sorted(
-                self.deleted_users, 
-                key=lambda x: x.get('deleted_at', ''), 
-                reverse=True
-            )
-            # Show up to 10 most recent deletions
-            for i, user in enumerate(recent_deletions[:10], 1):
+            # Up to 10 most recent deletions, newest first
+            recent_deletions, _ = self.log_store.query('deleted_user', self.admin_id, limit=10)
+            for i, entry in enumerate(recent_deletions, 1):
+                user = entry['record']
                 deleted_at = datetime.fromisoformat(user['deleted_at']).strftime('%Y-%m-%d %H:%M:%S')
                 print(f"{i}. {user['name']} ({user['username']}) - {user['user_type']} - Deleted on {deleted_at}")
     
@@ -339,38 +340,43 @@ class Admin(User):
         """
         log_id = f"LOG{datetime.now().strftime('%Y%m%d%H%M%S')}{random.randint(100, 999)}"
         log_entry = SystemLog(log_id, self.admin_id, action, details)
-        self.system_logs.append(log_entry)
+        self.log_store.append('action', self.admin_id, log_entry.to_dict(), log_entry.timestamp)
     
-    def view_logs(self, filter_action=None, filter_date=None):
+    def view_logs(self, filter_action=None, filter_date=None, page_size=20, cursor=None):
         """
-        View system logs.
+        View one page of system logs, newest first.
         
         Args:
             filter_action (str): Filter by action type
             filter_date (str): Filter by date (YYYY-MM-DD)
-        """
-        print(f"\n=== System Logs ===")
-        print(f"Admin: {self.name}")
-        print("-" * 50)
+            page_size (int): Logs per page
+            cursor (str): Cursor returned for the previous page (None for the first page)
         
-        filtered_logs = self.system_logs
-        
-        if filter_action:
-            filtered_logs = [log for log in filtered_logs if filter_action in log.action]
+        Returns:
+            str: Cursor of the next page, or None if there are no more logs
+        """
+        if cursor is None:
+            print(f"\n=== System Logs ===")
+            print(f"Admin: {self.name}")
+            print("-" * 50)
         
-        if filter_date:
-            filtered_logs = [log for log in filtered_logs 
-                           if log.timestamp.strftime('%Y-%m-%d') == filter_date]
+        try:
+            entries, next_cursor = self.log_store.query('action', self.admin_id, filter_action or None,
+                                                        filter_date or None, limit=page_size, cursor=cursor)
+        except ValueError as e:
+            print(f"Invalid log filter: {e}")
+            return None
         
-        if not filtered_logs:
+        if not entries and cursor is None:
             print("No logs found matching the criteria.")
-            return
+            return None
         
-        for log in sorted(filtered_logs, key=lambda x: x.timestamp, reverse=True):
+        for log in (SystemLog.from_dict(entry['record']) for entry in entries):
             print(f"[{log.timestamp.strftime('%Y-%m-%d %H:%M:%S')}] {log.action}")
             print(f"  User: {log.user_id}")
             print(f"  Details: {log.details}")
             print("-" * 30)
+        return next_cursor
     
     def display_menu(self):
         """Display admin-specific menu."""
@@ -469,20 +475,21 @@ class Admin(User):
             return False, error_msg
     
     def to_dict(self):
-        """Convert admin object to dictionary."""
+        """Convert admin object to dictionary (its logs stay in the log store)."""
         data = super().to_dict()
         data.update({
             'admin_id': self.admin_id,
-            'access_level': self.access_level,
-            'system_logs': [log.to_dict() for log in self.system_logs],
-            'created_users': self.created_users,
-            'deleted_users': self.deleted_users
+            'access_level': self.access_level
         })
+        if self.legacy_logs:
+            # Stays a version 2 record so the logs are moved again when it is next read
+            data.update(self.legacy_logs)
+            data['_schema'] = 2
         return data
     
     @classmethod
     def from_dict(cls, data):
-        """Create admin object from dictionary."""
+        """Create admin object from a dictionary in the current schema (see utils.schema)."""
         admin = cls(
             data['username'],
             '',  # Password is already hashed in data
@@ -490,17 +497,10 @@ class Admin(User):
             data['email'],
             data['user_id'],
             data.get('admin_id'),
-            data.get('access_level', 'full'),
-            data.get('first_login', False)  # Add first_login flag
+            data['access_level'],
+            data['first_login']
         )
         admin._password = data['password']  # Use hashed password
-        admin.created_users = data.get('created_users', [])
-        admin.deleted_users = data.get('deleted_users', [])
-        
-        # Load system logs
-        admin.system_logs = [SystemLog.from_dict(log_data) 
-                           for log_data in data.get('system_logs', [])]
-        
         return admin
     
     def __str__(self):
@@ -5,6 +5,8 @@ Course class for managing course information and enrollments
 import json
 from datetime import datetime
 
+from utils.schema import SCHEMA_VERSIONS
+
 
 class Course:
     """
@@ -28,8 +30,56 @@ class Course:
         self.instructor = instructor
         self.capacity = capacity
         self.section = section
-        self.enrolled_students = []  # List of student IDs
+        self._roster = {}  # Enrolled student IDs -> None, in enrollment order
         self.created_date = datetime.now()
+        self.version = 0  # Stored record version, for optimistic concurrency
+    
+    def __setattr__(self, name, value):
+        """Flag the course as modified whenever an attribute is reassigned."""
+        object.__setattr__(self, name, value)
+        if name != '_dirty':
+            object.__setattr__(self, '_dirty', True)
+            if name == 'capacity':
+                self._roster_changed()
+    
+    @property
+    def enrolled_students(self):
+        """Read-only view of the enrolled student IDs, in enrollment order."""
+        return self._roster.keys()
+    
+    @enrolled_students.setter
+    def enrolled_students(self, student_ids):
+        """Replace the whole roster (duplicate IDs are kept once)."""
+        previous = self.__dict__.get('_roster', {})
+        self._roster = dict.fromkeys(student_ids)
+        self._roster_changed(added=self._roster, removed=previous)
+    
+    def mark_dirty(self):
+        """
+        Flag the course as modified.
+        """
+        self._dirty = True
+    
+    def _roster_changed(self, added=(), removed=()):
+        """
+        Report enrollment changes to the CourseCatalog holding this course, if any.
+        
+        Args:
+            added: Student IDs that joined the course
+            removed: Student IDs that left the course
+        """
+        catalog = self.__dict__.get('_catalog')
+        if catalog is not None:
+            catalog.update_roster(self, added, removed)
+    
+    def mark_clean(self):
+        """Flag the course as in sync with persistent storage."""
+        self._dirty = False
+    
+    @property
+    def is_dirty(self):
+        """bool: True if the course changed since it was last saved or loaded."""
+        return self._dirty
     
     def add_student(self, student_id):
         """
@@ -37,7 +87,7 @@ class Course:
         
         Args:
             student_id (str): Student ID to add
-            
+        
         Returns:
             bool: True if student added successfully, False if course is full
         """
@@ -45,11 +95,13 @@ class Course:
             print(f"Course {self.course_name} (Section {self.section}) is full!")
             return False
         
-        if student_id in self.enrolled_students:
+        if student_id in self._roster:
             print(f"Student {student_id} is already enrolled in this course.")
             return False
         
-        self.enrolled_students.append(student_id)
+        self._roster[student_id] = None
+        self._dirty = True
+        self._roster_changed(added=(student_id,))
         print(f"Student {student_id} successfully enrolled in {self.course_name}")
         return True
     
@@ -60,12 +112,14 @@ class Course:
         Args:
             student_id (str): Student ID to remove
             silent (bool): If True, suppresses console output messages
-            
+        
         Returns:
             bool: True if student removed successfully, False if not found
         """
-        if student_id in self.enrolled_students:
-            self.enrolled_students.remove(student_id)
+        if student_id in self._roster:
+            del self._roster[student_id]
+            self._dirty = True
+            self._roster_changed(removed=(student_id,))
             if not silent:
                 print(f"Student {student_id} unenrolled from {self.course_name}")
             return True
@@ -81,7 +135,7 @@ class Course:
         Returns:
             bool: True if course is full, False otherwise
         """
-        return len(self.enrolled_students) >= self.capacity
+        return len(self._roster) >= self.capacity
     
     def get_available_spots(self):
         """
@@ -90,7 +144,7 @@ class Course:
         Returns:
             int: Number of available spots
         """
-        return self.capacity - len(self.enrolled_students)
+        return self.capacity - len(self._roster)
     
     def get_enrollment_count(self):
         """
@@ -99,7 +153,7 @@ class Course:
         Returns:
             int: Number of enrolled students
         """
-        return len(self.enrolled_students)
+        return len(self._roster)
     
     def is_student_enrolled(self, student_id):
         """
@@ -107,11 +161,11 @@ class Course:
         
         Args:
             student_id (str): Student ID to check
-            
+        
         Returns:
             bool: True if student is enrolled, False otherwise
         """
-        return student_id in self.enrolled_students
+        return student_id in self._roster
     
     def get_info(self):
         """
@@ -128,19 +182,20 @@ Course Name: {self.course_name}
 Section: {self.section}
 Instructor: {self.instructor}
 Capacity: {self.capacity}
-Enrolled: {len(self.enrolled_students)}
+Enrolled: {len(self._roster)}
 Available Spots: {self.get_available_spots()}
 Status: {'FULL' if self.is_full() else 'OPEN'}
 """
     
     def get_enrolled_students_list(self):
         """
-        Get list of enrolled students.
+        Get the enrolled students.
         
         Returns:
-            list: List of student IDs
+            Read-only view of the student IDs in enrollment order
+            (reflects later changes; copy it with list() to keep a snapshot)
         """
-        return self.enrolled_students.copy()
+        return self._roster.keys()
     
     def to_dict(self):
         """
@@ -155,8 +210,10 @@ Status: {'FULL' if self.is_full() else 'OPEN'}
             'instructor': self.instructor,
             'capacity': self.capacity,
             'section': self.section,
-            'enrolled_students': self.enrolled_students,
-            'created_date': self.created_date.isoformat()
+            'enrolled_students': list(self._roster),
+            'created_date': self.created_date.isoformat(),
+            '_version': self.version,
+            '_schema': SCHEMA_VERSIONS['courses']
         }
     
     @classmethod
@@ -165,8 +222,9 @@ Status: {'FULL' if self.is_full() else 'OPEN'}
         Create course object from dictionary.
         
         Args:
-            data (dict): Course data dictionary
-            
+            data (dict): Course data dictionary in the current schema
+                (older records are upgraded by utils.schema.upgrade_record)
+        
         Returns:
             Course: Course object
         """
@@ -174,12 +232,13 @@ Status: {'FULL' if self.is_full() else 'OPEN'}
             data['course_id'],
             data['course_name'],
             data['instructor'],
-            data.get('capacity', 30),
-            data.get('section', 'A')
+            data['capacity'],
+            data['section']
         )
-        course.enrolled_students = data.get('enrolled_students', [])
+        course.enrolled_students = data['enrolled_students']
         if 'created_date' in data:
             course.created_date = datetime.fromisoformat(data['created_date'])
+        course.version = data.get('_version', 0)
         
         return course
     
@@ -54,6 +54,7 @@ class Student(User):
         # Check with course manager if enrollment is possible
         if course_manager.enroll_student_in_course(self.student_id, course_id):
             self.enrolled_courses.append(course_id)
+            self.mark_dirty()
             print(f"Successfully enrolled in course {course_id}")
             return True
         else:
@@ -77,6 +78,7 @@ class Student(User):
         
         if course_manager.unenroll_student_from_course(self.student_id, course_id):
             self.enrolled_courses.remove(course_id)
+            self.mark_dirty()
             print(f"Successfully unenrolled from course {course_id}")
             return True
         else:
@@ -109,6 +111,7 @@ class Student(User):
             'grades': courses_grades,
             'cgpa': cgpa
         }
+        self.mark_dirty()
     
     def view_records(self):
         """Display academic records."""
@@ -173,11 +176,7 @@ class Student(User):
             teacher_manager: Teacher manager object
         """
         # Find teacher by ID
-        teacher = None
-        for user in teacher_manager.users.values():
-            if hasattr(user, 'teacher_id') and user.teacher_id == teacher_id:
-                teacher = user
-                break
+        teacher = teacher_manager.get_user_by_id(teacher_id, 'teacher')
         
         if teacher:
             teacher.view_public_profile()
@@ -225,7 +224,7 @@ class Student(User):
     
     @classmethod
     def from_dict(cls, data):
-        """Create student object from dictionary."""
+        """Create student object from a dictionary in the current schema (see utils.schema)."""
         student = cls(
             data['username'],
             '',  # Password is already hashed in data
@@ -233,13 +232,13 @@ class Student(User):
             data['email'],
             data['user_id'],
             data.get('student_id'),
-            data.get('first_login', False)  # Add first_login flag
+            data['first_login']
         )
         student._password = data['password']  # Use hashed password
-        student.enrolled_courses = data.get('enrolled_courses', [])
-        student.academic_records = data.get('academic_records', {})
-        student.cgpa_history = data.get('cgpa_history', [])
-        student.semester_data = data.get('semester_data', {})
+        student.enrolled_courses = data['enrolled_courses']
+        student.academic_records = data['academic_records']
+        student.cgpa_history = data['cgpa_history']
+        student.semester_data = data['semester_data']
         
         return student
     
@@ -85,6 +85,7 @@ class Teacher(User):
                 'new_value': value,
                 'timestamp': datetime.now().isoformat()
             })
+            self.mark_dirty()
             
             print(f"Successfully updated {field}")
             return True
@@ -101,6 +102,7 @@ class Teacher(User):
             salary_slip: SalarySlip object
         """
         self.salary_slips.append(salary_slip)
+        self.mark_dirty()
     
     def view_salary(self, month=None):
         """
@@ -180,6 +182,7 @@ class Teacher(User):
         """
         if course_id not in self.courses_taught:
             self.courses_taught.append(course_id)
+            self.mark_dirty()
             print(f"Course {course_id} added to your teaching list.")
         else:
             print(f"Course {course_id} is already in your teaching list.")
@@ -193,6 +196,7 @@ class Teacher(User):
         """
         if course_id in self.courses_taught:
             self.courses_taught.remove(course_id)
+            self.mark_dirty()
             print(f"Course {course_id} removed from your teaching list.")
         else:
             print(f"Course {course_id} is not in your teaching list.")
@@ -239,7 +243,7 @@ class Teacher(User):
     
     @classmethod
     def from_dict(cls, data):
-        """Create teacher object from dictionary."""
+        """Create teacher object from a dictionary in the current schema (see utils.schema)."""
         teacher = cls(
             data['username'],
             '',  # Password is already hashed in data
@@ -247,20 +251,20 @@ class Teacher(User):
             data['email'],
             data['user_id'],
             data.get('teacher_id'),
-            data.get('department', ''),
-            data.get('qualification', ''),
-            data.get('contact_info', {}),
-            data.get('salary', 0.0),
-            data.get('first_login', False)  # Add first_login flag
+            data['department'],
+            data['qualification'],
+            data['contact_info'],
+            data['salary'],
+            data['first_login']
         )
         teacher._password = data['password']  # Use hashed password
-        teacher.courses_taught = data.get('courses_taught', [])
-        teacher.profile_updates = data.get('profile_updates', [])
+        teacher.courses_taught = data['courses_taught']
+        teacher.profile_updates = data['profile_updates']
         
         # Load salary slips
         from models.salary_slip import SalarySlip
         teacher.salary_slips = [SalarySlip.from_dict(slip_data) 
-                               for slip_data in data.get('salary_slips', [])]
+                               for slip_data in data['salary_slips']]
         
         return teacher
     
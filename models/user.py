@@ -8,6 +8,8 @@ import hashlib
 import json
 from datetime import datetime
 
+from utils.schema import SCHEMA_VERSIONS
+
 
 class User(ABC):
     """
@@ -35,6 +37,37 @@ class User(ABC):
         self._last_login = None
         self._is_logged_in = False
         self._first_login = first_login
+        self.version = 0  # Stored record version, for optimistic concurrency
+    
+    # Attributes holding the IDs users are looked up by (see LazyUserMap.find_username)
+    ID_ATTRIBUTES = ('_user_id', 'student_id', 'teacher_id', 'admin_id')
+    
+    def __setattr__(self, name, value):
+        """Flag the user as modified whenever an attribute is reassigned."""
+        user_map = self.__dict__.get('_user_map') if name in self.ID_ATTRIBUTES else None
+        if user_map is not None:
+            user_map.ids_changing(self)
+        object.__setattr__(self, name, value)
+        if name != '_dirty':
+            object.__setattr__(self, '_dirty', True)
+        if user_map is not None:
+            user_map.ids_changed(self)
+    
+    def mark_dirty(self):
+        """
+        Flag the user as modified.
+        Needed after in-place changes to lists/dicts, which bypass __setattr__.
+        """
+        self._dirty = True
+    
+    def mark_clean(self):
+        """Flag the user as in sync with persistent storage."""
+        self._dirty = False
+    
+    @property
+    def is_dirty(self):
+        """bool: True if the user changed since it was last saved or loaded."""
+        return self._dirty
     
     def _hash_password(self, password):
         """
@@ -42,7 +75,7 @@ class User(ABC):
         
         Args:
             password (str): Plain text password
-            
+        
         Returns:
             str: Hashed password
         """
@@ -55,7 +88,7 @@ class User(ABC):
         Args:
             username (str): Username to validate
             password (str): Password to validate
-            
+        
         Returns:
             bool: True if credentials are valid, False otherwise
         """
@@ -69,7 +102,7 @@ class User(ABC):
         Args:
             username (str): Username
             password (str): Password
-            
+        
         Returns:
             bool: True if login successful, False otherwise
         """
@@ -97,7 +130,7 @@ class User(ABC):
         Args:
             old_password (str): Current password
             new_password (str): New password
-            
+        
         Returns:
             bool: True if password changed successfully, False otherwise
         """
@@ -115,7 +148,7 @@ class User(ABC):
         
         Args:
             new_username (str): New username to set
-            
+        
         Returns:
             bool: True if username changed successfully
         """
@@ -130,7 +163,7 @@ class User(ABC):
         Args:
             new_username (str): New username
             new_password (str): New password
-            
+        
         Returns:
             bool: True if credentials were updated
         """
@@ -186,7 +219,7 @@ class User(ABC):
     @property
     def last_login(self):
         return self._last_login
-        
+    
     @property
     def first_login(self):
         return self._first_login
@@ -226,7 +259,9 @@ class User(ABC):
             'user_id': self._user_id,
             'user_type': self.get_user_type(),
             'last_login': self._last_login.isoformat() if self._last_login else None,
-            'first_login': self._first_login
+            'first_login': self._first_login,
+            '_version': self.version,
+            '_schema': SCHEMA_VERSIONS['users']
         }
     
     @classmethod
@@ -236,7 +271,7 @@ class User(ABC):
         
         Args:
             data (dict): User data dictionary
-            
+        
         Returns:
             User: User object (specific subclass)
         """
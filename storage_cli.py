@@ -0,0 +1,400 @@
+"""
+Storage maintenance commands for the Portal System
+Run with: python storage_cli.py <command> [options]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.file_manager import create_file_manager, migrate_backend
+from utils.serializers import CODECS
+
+
+def migrate_layout(args) -> bool:
+    """
+    Convert users/courses between monolithic JSON files and shard files.
+    
+    Args:
+        args: Parsed command-line arguments
+        
+    Returns:
+        bool: True if migration successful
+    """
+    file_manager = create_file_manager(args.data_dir)
+    return file_manager.migrate_layout(args.layout, args.shard_count)
+
+
+def switch_backend(args) -> bool:
+    """
+    Copy all data into another storage backend and select it in config.json.
+    
+    Args:
+        args: Parsed command-line arguments
+        
+    Returns:
+        bool: True if migration successful
+    """
+    return migrate_backend(args.backend, args.data_dir)
+
+
+def backup_stats(args) -> bool:
+    """
+    Print backup count, size and age range per collection from the backup catalog.
+    
+    Args:
+        args: Parsed command-line arguments
+        
+    Returns:
+        bool: Always True
+    """
+    stats = create_file_manager(args.data_dir).get_backup_stats()
+    if not stats:
+        print("No backups found.")
+    for file_type, info in sorted(stats.items()):
+        print(f"{file_type:<14} {info['count']:>5} backups {info['bytes']:>12,} bytes  "
+              f"{info['oldest']} .. {info['newest']}")
+    return True
+
+
+def verify_data(args) -> bool:
+    """
+    Check data files (and optionally backups) against their checksums.
+    
+    Args:
+        args: Parsed command-line arguments
+        
+    Returns:
+        bool: True if nothing was found damaged or missing
+    """
+    file_manager = create_file_manager(args.data_dir)
+    results = file_manager.verify()
+    if args.backups:
+        results.update(file_manager.verify_backups())
+    
+    healthy = True
+    for name, result in sorted(results.items()):
+        print(f"{result['status']:<10} {result['collection']:<14} {name}")
+        if result.get('records'):
+            print(f"{'':<10} records: {', '.join(result['records'][:20])}"
+                  f"{' ...' if len(result['records']) > 20 else ''}")
+        if result.get('error'):
+            print(f"{'':<10} {result['error']}")
+        healthy = healthy and result['status'] in ('ok', 'unverified')
+    return healthy
+
+
+def prune_backups(args) -> bool:
+    """
+    Apply grandfather-father-son retention to the backups.
+    
+    Args:
+        args: Parsed command-line arguments
+        
+    Returns:
+        bool: Always True
+    """
+    create_file_manager(args.data_dir).prune_backups(args.daily, args.weekly, args.monthly)
+    return True
+
+
+def restore_backup(args) -> bool:
+    """
+    Restore a collection from the newest backup taken at or before a point in time.
+    
+    Args:
+        args: Parsed command-line arguments
+        
+    Returns:
+        bool: True if restore successful
+    """
+    try:
+        when = datetime.fromisoformat(args.as_of) if args.as_of else datetime.now()
+    except ValueError:
+        print(f"Invalid time: {args.as_of} (expected ISO format, e.g. 2025-07-29T01:27:42)")
+        return False
+    return create_file_manager(args.data_dir).restore_as_of(args.file_type, when)
+
+
+def peak_rss_mb() -> float:
+    """Get this process's peak resident set size in MB (None where unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def synthetic_users(templates: list, user_count: int):
+    """
+    Yield synthetic user records by cloning templates under new usernames.
+    
+    Args:
+        templates (list): User records to clone
+        user_count (int): Number of users to yield
+    """
+    for index in range(user_count):
+        record = dict(templates[index % len(templates)])
+        record['username'] = f"{record['username']}_{index}"
+        yield record
+
+
+def write_synthetic_users(data_dir: str, templates: list, user_count: int, json_lines: bool):
+    """
+    Write a synthetic users.json by cloning template records under new usernames.
+    
+    Args:
+        data_dir (str): Directory to create the dataset in
+        templates (list): User records to clone
+        user_count (int): Number of users to write
+        json_lines (bool): Write JSON Lines instead of a JSON array
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    with open(os.path.join(data_dir, 'config.json'), 'w', encoding='utf-8') as file:
+        json.dump({'version': '1.0', 'storage': {'backend': 'json', 'layout': 'monolithic'}}, file)
+    
+    with open(os.path.join(data_dir, 'users.json'), 'w', encoding='utf-8') as file:
+        if not json_lines:
+            file.write('[\n')
+        for index, record in enumerate(synthetic_users(templates, user_count)):
+            if json_lines:
+                file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            else:
+                file.write((',\n' if index else '') + json.dumps(record, indent=2, ensure_ascii=False))
+        if not json_lines:
+            file.write('\n]\n')
+
+
+def benchmark_load(args) -> bool:
+    """
+    Compare startup time and peak memory of the full, streaming and lazy loaders,
+    and of a read-only manager opening the users snapshot.
+    
+    Each run happens in a fresh process so peak RSS is measured independently.
+    
+    Args:
+        args: Parsed command-line arguments
+        
+    Returns:
+        bool: True if every run completed
+    """
+    if args.child:
+        from system_manager import SystemManager
+        start = time.perf_counter()
+        if args.child == 'snapshot':
+            manager = SystemManager(args.data_dir, read_only=True)
+        else:
+            manager = SystemManager(args.data_dir, load_mode=args.child)
+        print(json.dumps({'seconds': time.perf_counter() - start,
+                          'users': len(manager.users),
+                          'peak_rss_mb': peak_rss_mb()}))
+        return True
+    
+    with tempfile.TemporaryDirectory() as work_dir:
+        runs = [('full', 'array', args.data_dir), ('streaming', 'array', args.data_dir),
+                ('lazy', 'array', args.data_dir)]
+        snapshot = create_file_manager(args.data_dir).open_snapshot('users')
+        if snapshot is not None:
+            snapshot.close()
+            runs.append(('snapshot', 'snap', args.data_dir))
+        if args.users:
+            templates = create_file_manager(args.data_dir).load_data('users')
+            if not templates:
+                print("No users to use as templates for synthetic data.")
+                return False
+            array_dir = os.path.join(work_dir, 'array')
+            lines_dir = os.path.join(work_dir, 'jsonl')
+            write_synthetic_users(array_dir, templates, args.users, json_lines=False)
+            write_synthetic_users(lines_dir, templates, args.users, json_lines=True)
+            runs = [('full', 'array', array_dir), ('streaming', 'array', array_dir),
+                    ('streaming', 'jsonl', lines_dir), ('lazy', 'array', array_dir),
+                    ('snapshot', 'snap', array_dir)]
+            # What a checkpoint would write for this dataset
+            array_manager = create_file_manager(array_dir)
+            array_manager.write_snapshot('users', array_manager.iter_records('users'))
+        
+        print(f"{'Loader':<10} {'Format':<7} {'Users':>8} {'Seconds':>9} {'Peak RSS (MB)':>14}")
+        for loader, data_format, data_dir in runs:
+            completed = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--data-dir', data_dir,
+                 'benchmark-load', '--child', loader],
+                capture_output=True, text=True)
+            output = completed.stdout.strip().splitlines()
+            if completed.returncode != 0 or not output:
+                print(f"{loader} loader failed: {completed.stderr.strip()}")
+                return False
+            result = json.loads(output[-1])
+            rss = f"{result['peak_rss_mb']:.1f}" if result['peak_rss_mb'] is not None else "n/a"
+            print(f"{loader:<10} {data_format:<7} {result['users']:>8} {result['seconds']:>9.3f} {rss:>14}")
+    
+    return True
+
+
+def set_codec(args) -> bool:
+    """
+    Rewrite a collection in another serialization codec.
+    
+    Args:
+        args: Parsed command-line arguments
+        
+    Returns:
+        bool: True if conversion successful
+    """
+    return create_file_manager(args.data_dir).set_codec(args.file_type, args.codec)
+
+
+def benchmark_codecs(args) -> bool:
+    """
+    Compare file size, save time and load time of every codec on synthetic users.
+    
+    Args:
+        args: Parsed command-line arguments
+        
+    Returns:
+        bool: True if the benchmark ran
+    """
+    templates = create_file_manager(args.data_dir).load_data('users')
+    if not templates:
+        print("No users to use as templates for synthetic data.")
+        return False
+    users = list(synthetic_users(templates, args.users))
+    
+    print(f"{'Codec':<8} {'Size (MB)':>10} {'Save (s)':>9} {'Load (s)':>9}")
+    with tempfile.TemporaryDirectory() as work_dir:
+        for name, codec in CODECS.items():
+            path = os.path.join(work_dir, f"users{codec.extension}")
+            
+            start = time.perf_counter()
+            with open(path, 'wb') as file:
+                codec.dump(users, file)
+            save_seconds = time.perf_counter() - start
+            
+            start = time.perf_counter()
+            with open(path, 'rb') as file:
+                loaded = codec.load(file)
+            load_seconds = time.perf_counter() - start
+            
+            if len(loaded) != len(users):
+                print(f"{name} codec lost records")
+                return False
+            print(f"{name:<8} {os.path.getsize(path) / (1024 * 1024):>10.1f} "
+                  f"{save_seconds:>9.3f} {load_seconds:>9.3f}")
+    
+    return True
+
+
+def export_bundle(args) -> bool:
+    """
+    Export every collection to a bundle file.
+    
+    Args:
+        args: Parsed command-line arguments
+        
+    Returns:
+        bool: True if export successful
+    """
+    return create_file_manager(args.data_dir).export_data(args.path)
+
+
+def import_bundle(args) -> bool:
+    """
+    Replace the data with the contents of an export file.
+    
+    Args:
+        args: Parsed command-line arguments
+        
+    Returns:
+        bool: True if import successful
+    """
+    return create_file_manager(args.data_dir).import_data(args.path)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line parser."""
+    parser = argparse.ArgumentParser(description="Portal System storage maintenance")
+    parser.add_argument('--data-dir', default='data', help="Data directory (default: data)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    layout_parser = subparsers.add_parser('migrate-layout',
+                                          help="Convert users/courses to another storage layout")
+    layout_parser.add_argument('layout', choices=['monolithic', 'sharded'])
+    layout_parser.add_argument('--shard-count', type=int,
+                               help="Number of shards per collection (sharded layout only)")
+    layout_parser.set_defaults(handler=migrate_layout)
+    
+    backend_parser = subparsers.add_parser('migrate-backend',
+                                           help="Copy all data into another storage backend")
+    backend_parser.add_argument('backend', choices=['json', 'sqlite'])
+    backend_parser.set_defaults(handler=switch_backend)
+    
+    codec_parser = subparsers.add_parser('set-codec',
+                                         help="Rewrite a collection in another file format")
+    codec_parser.add_argument('file_type', choices=['users', 'courses', 'records', 'salary_slips', 'system_logs'])
+    codec_parser.add_argument('codec', choices=list(CODECS))
+    codec_parser.set_defaults(handler=set_codec)
+    
+    stats_parser = subparsers.add_parser('backup-stats', help="Show backup catalog statistics")
+    stats_parser.set_defaults(handler=backup_stats)
+    
+    verify_parser = subparsers.add_parser('verify', help="Check data files against their checksums")
+    verify_parser.add_argument('--backups', action='store_true', help="Also verify every cataloged backup")
+    verify_parser.set_defaults(handler=verify_data)
+    
+    prune_parser = subparsers.add_parser('prune-backups',
+                                         help="Keep daily/weekly/monthly backups and delete the rest")
+    prune_parser.add_argument('--daily', type=int, default=7, help="Days to keep (default: 7)")
+    prune_parser.add_argument('--weekly', type=int, default=4, help="Weeks to keep (default: 4)")
+    prune_parser.add_argument('--monthly', type=int, default=12, help="Months to keep (default: 12)")
+    prune_parser.set_defaults(handler=prune_backups)
+    
+    restore_parser = subparsers.add_parser('restore', help="Restore a collection from a backup")
+    restore_parser.add_argument('file_type', choices=['users', 'courses', 'records', 'salary_slips', 'system_logs'])
+    restore_parser.add_argument('--as-of', help="Restore the newest backup at or before this ISO time (default: now)")
+    restore_parser.set_defaults(handler=restore_backup)
+    
+    export_parser = subparsers.add_parser('export', help="Export all data to a bundle file")
+    export_parser.add_argument('path')
+    export_parser.set_defaults(handler=export_bundle)
+    
+    import_parser = subparsers.add_parser('import', help="Import all data from an export file")
+    import_parser.add_argument('path')
+    import_parser.set_defaults(handler=import_bundle)
+    
+    load_parser = subparsers.add_parser('benchmark-load',
+                                        help="Compare startup time and peak memory of the user loaders")
+    load_parser.add_argument('--users', type=int,
+                             help="Benchmark a synthetic dataset of this many users instead of --data-dir")
+    load_parser.add_argument('--child', choices=['full', 'streaming', 'lazy', 'snapshot'], help=argparse.SUPPRESS)
+    load_parser.set_defaults(handler=benchmark_load)
+    
+    codecs_parser = subparsers.add_parser('benchmark-codecs',
+                                          help="Compare size and speed of the file formats")
+    codecs_parser.add_argument('--users', type=int, default=100000,
+                               help="Number of synthetic users (default: 100000)")
+    codecs_parser.set_defaults(handler=benchmark_codecs)
+    
+    return parser
+
+
+def main():
+    """Command-line entry point."""
+    args = build_parser().parse_args()
+    if not args.handler(args):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
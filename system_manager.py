@@ -3,10 +3,12 @@ Main System Manager for the Portal System
 Coordinates all components and manages system operations
 """
 
+import atexit
 import json
 import os
+import threading
 from datetime import datetime
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Iterable
 
 from models.user import User
 from models.student import Student
@@ -14,8 +16,13 @@ from models.teacher import Teacher
 from models.admin import Admin
 from models.course import Course
 from models.salary_slip import SalarySlip
-from utils.file_manager import FileManager
+from utils.file_manager import ConcurrentModificationError, create_file_manager
+from utils.course_catalog import CourseCatalog
 from utils.data_validator import DataValidator
+from utils.log_store import LEGACY_FIELDS
+from utils.schema import DATA_VERSION, parse_data_version, upgrade_record
+from utils.user_index import LazyUserMap, SnapshotUserMap
+from utils.write_behind import WriteBehindWriter
 
 
 class SystemManager:
@@ -24,54 +31,433 @@ class SystemManager:
     Handles user management, course management, and data persistence.
     """
     
-    def __init__(self):
-        """Initialize the system manager."""
-        self.file_manager = FileManager()
-        self.users = {}  # Dictionary of username -> User object
-        self.courses = {}  # Dictionary of course_id -> Course object
+    def __init__(self, data_directory: str = "data", load_mode: str = None, read_only: bool = False):
+        """
+        Initialize the system manager.
+        
+        Args:
+            data_directory (str): Directory holding the data files
+            load_mode (str): Override how users are loaded at startup (see load_all_data)
+            read_only (bool): Open for lookups and reports only; users are served from
+                the checkpoint snapshot when it is current and nothing is saved
+        """
+        self.read_only = read_only
+        self.file_manager = create_file_manager(data_directory)
+        self.users = LazyUserMap(self.file_manager, self.create_user_from_data)  # username -> User object
+        self.courses = CourseCatalog()  # "course_id-section" -> Course object
         self.logged_in_users = {}  # Track currently logged in users
+        self.deleted_usernames = {}  # Username -> version of users deleted since the last save
+        self.last_save_stats = {}  # Dirty record counts from the most recent save
+        
+        # Opt-in write-behind: saves queue their changes for a background writer
+        self.writer = None
+        self._write_conflicts = []  # ConcurrentModificationErrors from the writer, not yet reloaded
+        self._write_conflicts_lock = threading.Lock()
+        if self.file_manager.storage_config['write_behind'] and not read_only:
+            self.writer = WriteBehindWriter(self._persist_changes, self.file_manager.flush)
+            atexit.register(self.writer.shutdown)
         
         # Load existing data
-        self.load_all_data()
+        self._check_data_version()
+        self.load_all_data(load_mode)
         
         # Initialize with default data if empty
-        if not self.users:
+        if not self.users and not self.read_only:
             self.initialize_default_data()
     
-    def load_all_data(self):
-        """Load all data from files."""
+    def load_all_data(self, load_mode: str = None):
+        """
+        Load all data from files.
+        
+        Args:
+            load_mode (str): 'lazy' indexes users and builds each one on first access;
+                'streaming' builds every user while records are parsed; 'full' builds
+                them after loading whole files. Defaults to storage.lazy_users /
+                storage.streaming_load. Read-only managers map the users snapshot
+                instead when it matches the data files.
+        """
+        storage_config = self.file_manager.storage_config
+        if self.read_only and load_mode is None:
+            snapshot = self.file_manager.open_snapshot('users')
+            if snapshot is not None:
+                self.users = SnapshotUserMap(snapshot, self.create_user_from_data)
+                load_mode = 'snapshot'
+        
+        if load_mode is None:
+            load_mode = ('lazy' if storage_config['lazy_users']
+                         else 'streaming' if storage_config['streaming_load'] else 'full')
+        read = self.file_manager.load_data if load_mode == 'full' else self.file_manager.iter_records
         
         # Load users
-        users_data = self.file_manager.load_data('users')
-        for user_data in users_data:
-            user = self.create_user_from_data(user_data)
-            if user:
-                self.users[user.username] = user
+        if load_mode == 'lazy':
+            self.users.index()
+        elif load_mode != 'snapshot':
+            for user_data in read('users'):
+                user = self.create_user_from_data(user_data)
+                if user:
+                    user.mark_clean()
+                    self.users[user.username] = user
         
         # Load courses with section-aware keys
-        courses_data = self.file_manager.load_data('courses')
+        courses_data = read('courses')
         for course_data in courses_data:
-            course = Course.from_dict(course_data)
+            course = self.create_course_from_data(course_data)
+            course.mark_clean()
             # Create unique key using course_id + section
             course_key = f"{course.course_id}-{course.section}"
             self.courses[course_key] = course
         
         # Debug print removed
     
-    def save_all_data(self):
-        """Save all data to files."""
-        # Debug print removed
+    def save_all_data(self) -> Dict[str, int]:
+        """
+        Save modified records to files.
         
-        # Save users
-        users_data = [user.to_dict() for user in self.users.values()]
-        self.file_manager.save_data('users', users_data)
+        Only users and courses flagged as dirty are persisted, each captured
+        as a record carrying its next version. With storage.write_behind they
+        are queued for the background writer, so this returns without any
+        disk I/O (see flush and wait_durable); otherwise they are committed
+        through the journal, record-level updates (SQLite) or a merge into the
+        stored collection (see FileManager.commit_records).
         
-        # Save courses
-        courses_data = [course.to_dict() for course in self.courses.values()]
-        self.file_manager.save_data('courses', courses_data)
+        If another session changed any of the records in the meantime, none
+        of the changes are saved: every record in them is reloaded from
+        storage so the operation can be retried. Conflicts the write-behind
+        thread ran into are reloaded here, on the calling thread, and counted
+        in the next save's stats (or reported by flush).
         
-        # Debug print removed
+        Returns:
+            dict: Number of dirty records saved per collection, plus conflicts
+        """
+        if self.read_only:
+            print("Error: the system is open read-only; changes were not saved.")
+            return {}
+        
+        writer_conflicts = self._reload_write_conflicts()
+        
+        dirty_users = [user for user in self.users.loaded_values() if user.is_dirty]
+        dirty_courses = [course for course in self.courses.values() if course.is_dirty]
+        deleted_usernames = dict(self.deleted_usernames)
+        
+        changes = {}
+        if dirty_users or deleted_usernames:
+            changes['users'] = self._change_set('users', dirty_users, deleted_usernames)
+        if dirty_courses:
+            changes['courses'] = self._change_set('courses', dirty_courses)
+        self.deleted_usernames.clear()
+        
+        conflicts = 0
+        if self.writer is not None:
+            if changes:
+                self.writer.submit(changes)
+        else:
+            _, error = self._commit_changes(changes)
+            if error is not None:
+                conflicts = self._reload_unsaved(error)
+        
+        self.last_save_stats = {
+            'users': len(dirty_users),
+            'courses': len(dirty_courses),
+            'deleted_users': len(deleted_usernames),
+            'conflicts': writer_conflicts + conflicts
+        }
+        
+        # The background writer checkpoints on its own
+        if self.writer is None and self.file_manager.journal_needs_checkpoint():
+            self.checkpoint()
+        
+        return self.last_save_stats
+    
+    def _change_set(self, file_type: str, dirty_records: List[Any],
+                    deleted_versions: Dict[str, int] = None) -> Dict[str, Any]:
+        """
+        Capture dirty objects as versioned records and mark them clean.
+        
+        Args:
+            file_type (str): 'users' or 'courses'
+            dirty_records (list): Modified User or Course objects
+            deleted_versions (dict): Deleted record key -> version it was deleted at
+            
+        Returns:
+            dict: {'put': {key: record}, 'delete': set of keys, 'base': {key: version}}
+        """
+        deleted_versions = deleted_versions or {}
+        puts, base = {}, {}
+        for record in dirty_records:
+            data = record.to_dict()
+            key = self.file_manager.record_key(file_type, data)
+            # A record deleted and re-created since the last save replaces the stored one
+            base[key] = deleted_versions.get(key, record.version)
+            data['_version'] = base[key] + 1
+            puts[key] = data
+            record.version = data['_version']
+            record.mark_clean()
+        
+        deleted = set(deleted_versions) - set(puts)
+        base.update({key: deleted_versions[key] for key in deleted})
+        return {'put': puts, 'delete': deleted, 'base': base}
+    
+    def _commit_changes(self, changes: Dict[str, Dict[str, Any]]) -> tuple:
+        """
+        Commit captured change sets of every collection to storage together.
+        
+        Args:
+            changes (dict): Collection -> change set (see _change_set)
+            
+        Returns:
+            tuple: (True if the changes were written, ConcurrentModificationError
+                if none were because of a conflict, else None)
+        """
+        if not changes:
+            return True, None
+        try:
+            return self.file_manager.commit_changes(changes), None
+        except ConcurrentModificationError as error:
+            return False, error
+    
+    def _reload_unsaved(self, error: ConcurrentModificationError) -> int:
+        """
+        Reload every record of a save rejected because of a conflict.
+        
+        Their objects were marked clean with versions that were never stored,
+        so all of them (not only the conflicting ones) are replaced with the
+        stored version.
         
+        Args:
+            error (ConcurrentModificationError): The rejected save
+        
+        Returns:
+            int: Number of conflicting records
+        """
+        print(f"Error: {error}. Reloaded the latest version; please try again.")
+        for file_type, keys in error.unsaved.items():
+            self.reload_records(file_type, keys)
+        return sum(len(keys) for keys in error.conflicts.values())
+    
+    def _persist_changes(self, changes: Dict[str, Dict[str, Any]]) -> bool:
+        """
+        Write a change set queued by save_all_data; runs on the write-behind thread.
+        
+        Only the captured records and the stored files are used, never the
+        live User and Course objects, so the foreground can keep mutating them.
+        Conflicting records are handed back to the foreground thread, which
+        reloads them on its next save or flush (see _reload_write_conflicts).
+        
+        Args:
+            changes (dict): Collection -> change set (see _change_set)
+            
+        Returns:
+            bool: True if every change was written
+        """
+        success, error = self._commit_changes(changes)
+        if error is not None:
+            with self._write_conflicts_lock:
+                self._write_conflicts.append(error)
+        
+        if self.file_manager.journal_needs_checkpoint():
+            success = self.file_manager.checkpoint() and success
+        
+        return success
+    
+    def _reload_write_conflicts(self) -> int:
+        """
+        Reload the records of change sets the write-behind thread could not save.
+        
+        They are replaced with the stored version, as a foreground save does
+        (see _reload_unsaved).
+        
+        Returns:
+            int: Number of conflicting records
+        """
+        with self._write_conflicts_lock:
+            conflicts, self._write_conflicts = self._write_conflicts, []
+        
+        return sum(self._reload_unsaved(error) for error in conflicts)
+    
+    def reload_records(self, file_type: str, keys: Iterable[str]):
+        """
+        Replace in-memory users or courses with their stored version.
+        
+        Used after a save conflict so the next attempt starts from what
+        another session saved (records it deleted are dropped).
+        
+        Args:
+            file_type (str): 'users' or 'courses'
+            keys (iterable): Record keys to reload
+        """
+        keys = set(keys)
+        stored = {}
+        for record in self.file_manager.iter_records(file_type):
+            key = self.file_manager.record_key(file_type, record)
+            if key in keys:
+                stored[key] = record
+        
+        for key in keys:
+            record = stored.get(key)
+            if file_type == 'users':
+                user = self.create_user_from_data(record) if record else None
+                if user is None:
+                    self.users.pop(key, None)
+                    self.logged_in_users.pop(key, None)
+                    continue
+                user.mark_clean()
+                self.users[key] = user
+                if key in self.logged_in_users:
+                    self.logged_in_users[key] = user
+            elif record is None:
+                self.courses.pop(key, None)
+            else:
+                course = self.create_course_from_data(record)
+                course.mark_clean()
+                self.courses[key] = course
+    
+    def refresh(self) -> Dict[str, int]:
+        """
+        Pick up changes other processes or scripts made to users and courses.
+        
+        Polls the data files (a few stat calls) and, only when they changed,
+        diffs the stored records by key against memory and patches just the
+        users and courses that were added, modified or removed. Records with
+        unsaved local changes are left alone.
+        
+        Returns:
+            dict: Number of users and courses patched per collection
+        """
+        if not self.file_manager.storage_config['watch_changes']:
+            return {}
+        
+        changed = self.file_manager.poll_changes()
+        if not changed:
+            return {}
+        
+        # Queued saves must be on disk first, or they would look deleted
+        self.flush()
+        
+        stats = {}
+        if 'users' in changed:
+            stats['users'] = self._refresh_users()
+        if 'courses' in changed:
+            stats['courses'] = self._refresh_courses()
+        return stats
+    
+    def _refresh_users(self) -> int:
+        """
+        Patch users from storage after an external change.
+        
+        Returns:
+            int: Number of users added, updated or removed
+        """
+        if isinstance(self.users, SnapshotUserMap):
+            # Read-only: switch to the new snapshot, or index the files if there is none yet
+            self.users.close()
+            snapshot = self.file_manager.open_snapshot('users')
+            if snapshot is not None:
+                self.users = SnapshotUserMap(snapshot, self.create_user_from_data)
+            else:
+                self.users = LazyUserMap(self.file_manager, self.create_user_from_data)
+                self.users.index()
+            return len(self.users)
+        
+        changes = self.users.sync(keep=set(self.deleted_usernames) | set(self.logged_in_users))
+        
+        # Logged-in users keep their session on the refreshed object
+        for username in changes['updated']:
+            if username in self.logged_in_users:
+                user = self.users[username]
+                user._is_logged_in = self.logged_in_users[username].is_logged_in
+                user.mark_clean()
+                self.logged_in_users[username] = user
+        
+        return sum(len(usernames) for usernames in changes.values())
+    
+    def _refresh_courses(self) -> int:
+        """
+        Patch courses from storage after an external change.
+        
+        Returns:
+            int: Number of courses added, updated or removed
+        """
+        stored = {}
+        for record in self.file_manager.iter_records('courses'):
+            stored[self.file_manager.record_key('courses', record)] = record
+        
+        patched = 0
+        for course_key, record in stored.items():
+            record = upgrade_record('courses', record)
+            course = self.courses.get(course_key)
+            if course is None or (not course.is_dirty and
+                                  course.to_dict() != dict(record, _version=record.get('_version', 0))):
+                course = self.create_course_from_data(record)
+                course.mark_clean()
+                self.courses[course_key] = course
+                patched += 1
+        
+        for course_key in [key for key, course in self.courses.items()
+                           if key not in stored and not course.is_dirty]:
+            del self.courses[course_key]
+            patched += 1
+        
+        return patched
+    
+    def flush(self) -> bool:
+        """
+        Wait until every save queued for the write-behind thread has been written.
+        
+        Records it could not save because another session changed them are
+        reloaded, and last_save_stats['conflicts'] counts them.
+        
+        Returns:
+            bool: True if all queued changes were written (always True without write-behind)
+        """
+        if self.writer is None:
+            return True
+        written = self.writer.flush()
+        return self._report_write_conflicts() and written
+    
+    def wait_durable(self) -> bool:
+        """
+        Wait until every save so far is written and synced to disk.
+        
+        Returns:
+            bool: True if all changes are durable
+        """
+        if self.writer is not None:
+            durable = self.writer.wait_durable()
+            return self._report_write_conflicts() and durable
+        return self.file_manager.flush()
+    
+    def _report_write_conflicts(self) -> bool:
+        """
+        Reload write-behind conflicts and add them to last_save_stats.
+        
+        Returns:
+            bool: True if there were none
+        """
+        conflicts = self._reload_write_conflicts()
+        if conflicts:
+            self.last_save_stats['conflicts'] = self.last_save_stats.get('conflicts', 0) + conflicts
+        return not conflicts
+    
+    def checkpoint(self):
+        """
+        Flush pending changes and rewrite every journaled collection in full
+        (which also refreshes the users snapshot used by read-only managers).
+        Called at shutdown and whenever the journal grows past its interval.
+        """
+        if self.read_only:
+            return
+        
+        if self.deleted_usernames or any(record.is_dirty for record in
+                                         self.users.loaded_values() + list(self.courses.values())):
+            self.save_all_data()
+        
+        # Let the write-behind thread finish before checkpointing
+        self.flush()
+        self.file_manager.checkpoint()
+        
+        # Don't leave the last group commit window unsynced at shutdown
+        self.file_manager.flush()
+    
     def get_all_users_data(self):
         """
         Get all users data in dictionary format.
@@ -79,12 +465,17 @@ class SystemManager:
         Returns:
             list: List of user dictionaries
         """
-        return [user.to_dict() for user in self.users.values()]
+        return list(self.users.records())
     
     def create_user_from_data(self, user_data: Dict[str, Any]) -> Optional[User]:
         """
         Create user object from data dictionary.
         
+        Admins get the shared log store; logs still embedded in an admin
+        record from before schema version 3 are moved into it once. Until
+        that succeeds they stay on the admin (Admin.legacy_logs) and are
+        written back with it, so saving the admin never drops them.
+        
         Args:
             user_data (dict): User data dictionary
             
@@ -92,23 +483,66 @@ class SystemManager:
             User object or None if creation fails
         """
         try:
+            legacy_logs = {field: user_data[field] for field in LEGACY_FIELDS if user_data.get(field)}
+            user_data = upgrade_record('users', user_data)
             user_type = user_data.get('user_type', '').lower()
             # Debug prints removed
             
             if user_type == 'student':
-                return Student.from_dict(user_data)
+                user = Student.from_dict(user_data)
             elif user_type == 'teacher':
-                return Teacher.from_dict(user_data)
+                user = Teacher.from_dict(user_data)
             elif user_type == 'admin':
-                return Admin.from_dict(user_data)
+                user = Admin.from_dict(user_data)
+                user.log_store = self.file_manager.log_store
+                if legacy_logs and (self.read_only or not self.file_manager.log_store.import_legacy(
+                        user.username, user.admin_id, legacy_logs)):
+                    user.legacy_logs = legacy_logs
             else:
                 # Debug print removed
                 return None
+            
+            user.version = user_data.get('_version', 0)
+            return user
                 
         except Exception as e:
             # Debug prints and traceback removed
             return None
     
+    def create_course_from_data(self, course_data: Dict[str, Any]) -> Course:
+        """
+        Create course object from data dictionary.
+        
+        Records stored in an older schema are upgraded first; the upgraded
+        layout reaches storage the next time the course is saved.
+        
+        Args:
+            course_data (dict): Course data dictionary as stored
+            
+        Returns:
+            Course object
+        """
+        return Course.from_dict(upgrade_record('courses', course_data))
+    
+    def _check_data_version(self):
+        """
+        Compare the data set version in config.json with this program's.
+        
+        Older data sets are stamped with the current version (their records
+        are upgraded as they are read, see utils.schema); a newer one was
+        written by a later release whose records may not be understood here.
+        """
+        config_data = self.file_manager.load_data('config')
+        if not isinstance(config_data, dict):
+            return
+        
+        stored_version = config_data.get('version')
+        if parse_data_version(stored_version) > parse_data_version(DATA_VERSION):
+            print(f"Warning: data version {stored_version} is newer than this portal supports ({DATA_VERSION}).")
+        elif parse_data_version(stored_version) < parse_data_version(DATA_VERSION) and not self.read_only:
+            config_data['version'] = DATA_VERSION
+            self.file_manager.save_data('config', config_data)
+    
     def initialize_default_data(self):
         """Initialize system with default users and courses."""
         # Debug print removed
@@ -122,6 +556,7 @@ class SystemManager:
             user_id="ADM001",
             admin_id="ADM001"
         )
+        admin.log_store = self.file_manager.log_store
         self.users[admin.username] = admin
         
         # Create default students (10-15)
@@ -203,7 +638,7 @@ class SystemManager:
         
         for course_id, name, instructor, capacity, section in courses_data:
             course = Course(course_id, name, instructor, capacity, section)
-            self.courses[course_id] = course
+            self.courses[f"{course_id}-{section}"] = course
         
         # Enroll some students in courses
         enrollment_data = [
@@ -218,13 +653,13 @@ class SystemManager:
             if username in self.users:
                 student = self.users[username]
                 for course_id in course_ids:
-                    if course_id in self.courses:
-                        course = self.courses[course_id]
+                    course = self.get_course_by_id(course_id)
+                    if course is not None:
                         if course.add_student(student.student_id):
                             student.enrolled_courses.append(course_id)
         
         # Save the initialized data
-        self.save_all_data()
+        self.checkpoint()
         # Debug print removed
     
     def authenticate_user(self, username: str, password: str) -> Optional[User]:
@@ -259,8 +694,7 @@ class SystemManager:
             user = self.logged_in_users[username]
             user.logout()
             del self.logged_in_users[username]
-            self.save_all_data()
-            return True
+            return not self.save_all_data().get('conflicts')
         return False
     
     def get_available_courses(self) -> List[Course]:
@@ -278,7 +712,7 @@ class SystemManager:
     
     def get_course_by_id(self, course_id: str) -> Optional[Course]:
         """
-        Get course by ID. Returns the first available section.
+        Get course by ID. Returns the first section by section name.
         For backward compatibility with existing enrollment data.
         
         Args:
@@ -287,16 +721,9 @@ class SystemManager:
         Returns:
             Course object or None
         """
-        # First try direct lookup for backward compatibility
-        if course_id in self.courses:
-            return self.courses[course_id]
-        
-        # Then search for course sections
-        for course_key, course in self.courses.items():
-            if course.course_id == course_id:
-                return course
-        
-        return None
+        # Courses are always keyed "course_id-section"; unsectioned records load as section A
+        sections = self.courses.sections(course_id)
+        return sections[0] if sections else None
     
     def get_course_by_id_and_section(self, course_id: str, section: str) -> Optional[Course]:
         """
@@ -309,8 +736,7 @@ class SystemManager:
         Returns:
             Course object or None
         """
-        course_key = f"{course_id}-{section}"
-        return self.courses.get(course_key)
+        return self.courses.section(course_id, section)
     
     def get_all_sections_by_course_id(self, course_id: str) -> List[Course]:
         """
@@ -320,13 +746,9 @@ class SystemManager:
             course_id (str): Course ID
             
         Returns:
-            List of Course objects for all sections
+            List of Course objects for all sections, ordered by section
         """
-        sections = []
-        for course in self.courses.values():
-            if course.course_id == course_id:
-                sections.append(course)
-        return sections
+        return self.courses.sections(course_id)
     
     def find_student_enrolled_section(self, student_id: str, course_id: str) -> Optional[Course]:
         """
@@ -339,10 +761,19 @@ class SystemManager:
         Returns:
             Course object of the section where student is enrolled, or None
         """
-        for course in self.courses.values():
-            if course.course_id == course_id and student_id in course.enrolled_students:
-                return course
-        return None
+        return self.courses.enrolled_section(student_id, course_id)
+    
+    def get_enrolled_sections(self, student_id: str) -> List[Course]:
+        """
+        Get every course section a student is enrolled in.
+        
+        Args:
+            student_id (str): Student ID
+            
+        Returns:
+            List of Course objects ordered by course ID and section
+        """
+        return self.courses.enrolled_sections(student_id)
     
     def enroll_student_in_course(self, student_id: str, course_id: str, section: str = None) -> bool:
         """
@@ -357,11 +788,8 @@ class SystemManager:
             bool: True if enrollment successful
         """
         # Find student by student_id
-        student = None
-        for user in self.users.values():
-            if hasattr(user, 'student_id') and user.student_id == student_id:
-                student = user
-                break
+        username = self.users.find_username(student_id, 'student')
+        student = self.users.get(username) if username else None
         
         if not student:
             # Debug print removed
@@ -383,11 +811,7 @@ class SystemManager:
                 return False
         else:
             # Find first available section
-            sections = self.get_all_sections_by_course_id(course_id)
-            for course_section in sections:
-                if not course_section.is_full():
-                    target_course = course_section
-                    break
+            target_course = self.courses.first_open_section(course_id)
             
             if not target_course:
                 # Debug print removed
@@ -398,8 +822,8 @@ class SystemManager:
             # Add course_id to student's enrolled courses (base course ID, not section-specific)
             if course_id not in student.enrolled_courses:
                 student.enrolled_courses.append(course_id)
-            self.save_all_data()
-            return True
+                student.mark_dirty()
+            return not self.save_all_data().get('conflicts')
         
         return False
     
@@ -415,11 +839,8 @@ class SystemManager:
             bool: True if unenrollment successful
         """
         # Find student by student_id
-        student = None
-        for user in self.users.values():
-            if hasattr(user, 'student_id') and user.student_id == student_id:
-                student = user
-                break
+        username = self.users.find_username(student_id, 'student')
+        student = self.users.get(username) if username else None
         
         if not student:
             # Debug print removed
@@ -436,37 +857,40 @@ class SystemManager:
             # Remove course_id from student's enrolled courses
             if course_id in student.enrolled_courses:
                 student.enrolled_courses.remove(course_id)
-            self.save_all_data()
-            return True
+                student.mark_dirty()
+            return not self.save_all_data().get('conflicts')
         
         return False
     
     def get_all_teachers(self) -> List[Teacher]:
         """Get all teacher objects."""
-        return [user for user in self.users.values() if isinstance(user, Teacher)]
+        return [self.users[username] for username in self.users.usernames_of_type('teacher')]
     
     def get_all_students(self) -> List[Student]:
         """Get all student objects."""
-        return [user for user in self.users.values() if isinstance(user, Student)]
+        return [self.users[username] for username in self.users.usernames_of_type('student')]
     
-    def get_user_by_id(self, user_id: str) -> Optional[User]:
-        """Get user by their ID (student_id, teacher_id, admin_id)."""
-        for user in self.users.values():
-            if hasattr(user, 'student_id') and user.student_id == user_id:
-                return user
-            elif hasattr(user, 'teacher_id') and user.teacher_id == user_id:
-                return user
-            elif hasattr(user, 'admin_id') and user.admin_id == user_id:
-                return user
-        return None
+    def get_user_by_id(self, user_id: str, user_type: str = None) -> Optional[User]:
+        """
+        Get user by their ID (student_id, teacher_id, admin_id).
+        
+        Args:
+            user_id (str): Role ID to look up
+            user_type (str): Only match this role ('student', 'teacher', 'admin')
+        
+        Returns:
+            User object or None if not found
+        """
+        username = self.users.find_username(user_id, user_type)
+        return self.users.get(username) if username else None
     
     def get_all_admins(self) -> List[Admin]:
         """Get all admin objects."""
-        return [user for user in self.users.values() if isinstance(user, Admin)]
+        return [self.users[username] for username in self.users.usernames_of_type('admin')]
     
     def get_all_users(self) -> List[Dict[str, Any]]:
         """Get all users as dictionaries."""
-        return [user.to_dict() for user in self.users.values()]
+        return list(self.users.records())
     
     def save_user(self, user_data: Dict[str, Any]) -> bool:
         """
@@ -496,9 +920,7 @@ class SystemManager:
                 # Add to users dictionary with username as key
                 self.users[user.username] = user
                 # Save all data to files
-                self.save_all_data()
-                # Debug print removed
-                return True
+                return not self.save_all_data().get('conflicts')
             return False
         except Exception as e:
             # Debug print removed
@@ -517,13 +939,9 @@ class SystemManager:
         try:
             # Find user by user_id
             user_to_delete = None
-            username_to_delete = None
-            
-            for username, user in self.users.items():
-                if user.user_id == user_id:
-                    user_to_delete = user
-                    username_to_delete = username
-                    break
+            username_to_delete = self.users.find_username(user_id, by_user_id=True)
+            if username_to_delete:
+                user_to_delete = self.users.get(username_to_delete)
             
             if not user_to_delete:
                 # Debug print removed
@@ -538,11 +956,11 @@ class SystemManager:
             
             # If student, remove from all course enrollments (silently)
             if isinstance(user_to_delete, Student):
-                for course in self.courses.values():
+                for course in self.courses.enrolled_sections(user_to_delete.student_id):
                     course.remove_student(user_to_delete.student_id, silent=True)
             
-            self.save_all_data()
-            return True
+            self.deleted_usernames[user_to_delete.username] = user_to_delete.version
+            return not self.save_all_data().get('conflicts')
             
         except Exception as e:
             print(f"Error deleting user: {e}")
@@ -592,11 +1010,11 @@ class SystemManager:
             
             # If student, remove from all course enrollments (silently)
             if isinstance(user_to_delete, Student):
-                for course in self.courses.values():
+                for course in self.courses.enrolled_sections(user_to_delete.student_id):
                     course.remove_student(user_to_delete.student_id, silent=True)
             
-            self.save_all_data()
-            return True
+            self.deleted_usernames[user_to_delete.username] = user_to_delete.version
+            return not self.save_all_data().get('conflicts')
             
         except Exception as e:
             print(f"Error deleting user: {e}")
@@ -618,9 +1036,9 @@ class SystemManager:
             dict: System statistics
         """
         total_users = len(self.users)
-        total_students = len(self.get_all_students())
-        total_teachers = len(self.get_all_teachers())
-        total_admins = len(self.get_all_admins())
+        total_students = len(self.users.usernames_of_type('student'))
+        total_teachers = len(self.users.usernames_of_type('teacher'))
+        total_admins = len(self.users.usernames_of_type('admin'))
         total_courses = len(self.courses)
         total_enrollments = sum(len(course.enrolled_students) for course in self.courses.values())
         
@@ -0,0 +1,320 @@
+"""
+Backup catalog for the Portal System
+Persistent index of every backup, kept up to date as backups are written
+"""
+
+import json
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+
+class BackupCatalog:
+    """
+    Index of backups per collection, sorted by time.
+    
+    Stored in backups/catalog.json. Each entry records the backup timestamp,
+    its kind ('snapshot' in the backup store, 'archive' for compressed full
+    backups, 'file' for legacy JSON copies, 'database' for SQLite backups),
+    the file name, its size and the SHA-256 of the file when it was written,
+    so listing, lookups, retention and verification never need to scan the
+    backup directory.
+    
+    Several processes may share the catalog: changes are kept as pending
+    additions and removals, and a save that finds the file changed by another
+    process re-reads it under the shared lock and replays them on top, so no
+    process overwrites another's entries. Reads pick up the file again whenever it changed on disk.
+    """
+    
+    TIMESTAMP_FORMATS = ("%Y%m%d_%H%M%S_%f", "%Y%m%d_%H%M%S")
+    
+    def __init__(self, backup_directory: str, lock=None):
+        """
+        Initialize BackupCatalog.
+        
+        Args:
+            backup_directory (str): Backup directory holding catalog.json
+            lock: Reentrant lock shared with other processes (e.g. the data
+                directory's FileLock); defaults to a lock for this process only
+        """
+        self.catalog_path = os.path.join(backup_directory, 'catalog.json')
+        self._lock = threading.RLock()  # In-memory entries
+        self._file_lock = lock if lock is not None else self._lock  # catalog.json, taken first
+        self._entries = {}  # Collection -> entries sorted by time
+        self._times = {}  # Collection -> sorted entry times, for bisect
+        self._by_name = {}  # Collection -> backup file name -> entry
+        self._pending_adds = []  # (collection, entry) not saved yet
+        self._pending_removes = set()  # (collection, name) not saved yet
+        self._disk_state = None  # Catalog file state last read or written
+        
+        # True when no catalog existed yet and it must be rebuilt from the directory
+        self.is_new = not os.path.exists(self.catalog_path)
+        if not self.is_new:
+            self._load()
+    
+    @classmethod
+    def parse_timestamp(cls, timestamp: str) -> Optional[datetime]:
+        """
+        Parse a backup timestamp in either supported format.
+        
+        Args:
+            timestamp (str): %Y%m%d_%H%M%S_%f or legacy %Y%m%d_%H%M%S
+        
+        Returns:
+            datetime: Parsed time, or None if the string is not a timestamp
+        """
+        for timestamp_format in cls.TIMESTAMP_FORMATS:
+            try:
+                return datetime.strptime(timestamp, timestamp_format)
+            except ValueError:
+                continue
+        return None
+    
+    def add(self, file_type: str, timestamp: str, kind: str, name: str, size: int,
+            checksum: str = None, save: bool = True) -> bool:
+        """
+        Record a newly written backup.
+        
+        Args:
+            file_type (str): Collection backed up
+            timestamp (str): Backup timestamp
+            kind (str): 'snapshot', 'archive', 'file' or 'database'
+            name (str): Backup file name
+            size (int): Bytes written for the backup
+            checksum (str): SHA-256 of the backup (manifest) file, for verify_backups
+            save (bool): Persist the catalog immediately (merging it under the
+                shared lock); otherwise the entry is written by the next save()
+        
+        Returns:
+            bool: True if the entry was recorded
+        """
+        backup_time = self.parse_timestamp(timestamp)
+        if backup_time is None:
+            return False
+        
+        entry = {
+            'timestamp': timestamp,
+            'time': backup_time.timestamp(),
+            'kind': kind,
+            'name': name,
+            'bytes': size
+        }
+        if checksum is not None:
+            entry['sha256'] = checksum
+        
+        with self._lock:
+            self._pending_removes.discard((file_type, name))
+            self._pending_adds.append((file_type, entry))
+            self._discard(file_type, name)
+            self._insert(file_type, entry)
+        if save:
+            self.save()
+        return True
+    
+    def remove(self, doomed: List[tuple], save: bool = True):
+        """
+        Drop entries from the catalog.
+        
+        Args:
+            doomed (list): (file_type, entry) pairs to remove
+            save (bool): Persist the catalog immediately
+        """
+        with self._lock:
+            for file_type, entry in doomed:
+                self._pending_removes.add((file_type, entry['name']))
+                self._pending_adds = [(pending_type, pending) for pending_type, pending in self._pending_adds
+                                      if (pending_type, pending['name']) != (file_type, entry['name'])]
+                self._discard(file_type, entry['name'])
+        if save:
+            self.save()
+    
+    def find(self, file_type: str, when: datetime) -> Optional[Dict[str, Any]]:
+        """
+        Find the newest backup taken at or before a point in time.
+        
+        Args:
+            file_type (str): Collection to look up
+            when (datetime): Point in time
+        
+        Returns:
+            dict: Catalog entry, or None if no backup is that old
+        """
+        self.refresh()
+        with self._lock:
+            position = bisect_right(self._times.get(file_type, []), when.timestamp())
+            if position == 0:
+                return None
+            return self._entries[file_type][position - 1]
+    
+    def entries(self, file_type: str = None) -> List[tuple]:
+        """
+        Get catalog entries, newest first.
+        
+        Args:
+            file_type (str): Filter by collection (optional)
+        
+        Returns:
+            list: (file_type, entry) pairs
+        """
+        self.refresh()
+        with self._lock:
+            file_types = [file_type] if file_type is not None else list(self._entries)
+            pairs = [(name, entry) for name in file_types for entry in self._entries.get(name, [])]
+        return sorted(pairs, key=lambda pair: pair[1]['time'], reverse=True)
+    
+    def older_than(self, cutoff: datetime) -> List[tuple]:
+        """
+        Get entries taken before a cutoff.
+        
+        Args:
+            cutoff (datetime): Entries older than this are returned
+        
+        Returns:
+            list: (file_type, entry) pairs
+        """
+        self.refresh()
+        with self._lock:
+            return [(file_type, entry) for file_type, times in self._times.items()
+                    for entry in self._entries[file_type][:bisect_right(times, cutoff.timestamp())]]
+    
+    def expired_by_retention(self, daily: int, weekly: int, monthly: int) -> List[tuple]:
+        """
+        Apply grandfather-father-son retention to every collection.
+        
+        The newest backup of each of the last `daily` days, `weekly` ISO weeks
+        and `monthly` months is kept, as is the newest backup overall;
+        everything else is returned for deletion.
+        
+        Args:
+            daily (int): Number of daily backups to keep
+            weekly (int): Number of weekly backups to keep
+            monthly (int): Number of monthly backups to keep
+        
+        Returns:
+            list: (file_type, entry) pairs to delete
+        """
+        buckets = (
+            (daily, lambda moment: moment.date()),
+            (weekly, lambda moment: moment.isocalendar()[:2]),
+            (monthly, lambda moment: (moment.year, moment.month))
+        )
+        expired = []
+        
+        self.refresh()
+        with self._lock:
+            for file_type, entries in self._entries.items():
+                keep = set()
+                newest_first = list(reversed(entries))
+                if newest_first:
+                    keep.add(id(newest_first[0]))
+                
+                for limit, bucket_of in buckets:
+                    seen = set()
+                    for entry in newest_first:
+                        bucket = bucket_of(datetime.fromtimestamp(entry['time']))
+                        if bucket in seen:
+                            continue
+                        if len(seen) >= limit:
+                            break
+                        seen.add(bucket)
+                        keep.add(id(entry))
+                
+                expired += [(file_type, entry) for entry in entries if id(entry) not in keep]
+        
+        return expired
+    
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Summarize the catalog per collection.
+        
+        Returns:
+            dict: Collection -> count, bytes, oldest and newest timestamps
+        """
+        self.refresh()
+        with self._lock:
+            return {
+                file_type: {
+                    'count': len(entries),
+                    'bytes': sum(entry['bytes'] for entry in entries),
+                    'oldest': entries[0]['timestamp'],
+                    'newest': entries[-1]['timestamp']
+                }
+                for file_type, entries in self._entries.items() if entries
+            }
+    
+    def save(self):
+        """Merge pending changes into the catalog on disk and write it via a temporary file."""
+        with self._file_lock, self._lock:
+            if self._file_state() != self._disk_state:
+                self._reload()
+            content = json.dumps({'version': 1, 'entries': self._entries}, separators=(',', ':'))
+            temp_path = f"{self.catalog_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                file.write(content)
+            os.replace(temp_path, self.catalog_path)
+            self._pending_adds, self._pending_removes = [], set()
+            self._disk_state = self._file_state()
+            self.is_new = False
+    
+    def refresh(self):
+        """Re-read the catalog if another process rewrote it since it was last read."""
+        with self._file_lock, self._lock:
+            if self._file_state() != self._disk_state:
+                self._reload()
+    
+    def _reload(self):
+        """Read the catalog from disk and replay the pending changes on top."""
+        self._entries, self._times, self._by_name = {}, {}, {}
+        if os.path.exists(self.catalog_path):
+            self._load()
+        for file_type, name in self._pending_removes:
+            self._discard(file_type, name)
+        for file_type, entry in self._pending_adds:
+            self._discard(file_type, entry['name'])
+            self._insert(file_type, entry)
+    
+    def _load(self):
+        """Read the catalog from disk (entries are written in time order)."""
+        try:
+            self._disk_state = self._file_state()
+            with open(self.catalog_path, 'r', encoding='utf-8') as file:
+                self._entries = json.load(file).get('entries', {})
+            self._times = {file_type: [entry['time'] for entry in entries]
+                           for file_type, entries in self._entries.items()}
+            self._by_name = {file_type: {entry['name']: entry for entry in entries}
+                             for file_type, entries in self._entries.items()}
+        except Exception as e:
+            print(f"Error reading backup catalog: {e}")
+            self._entries, self._times, self._by_name = {}, {}, {}
+            self.is_new = True
+    
+    def _file_state(self) -> Optional[tuple]:
+        """Get (inode, mtime, size) of the catalog file, or None if it does not exist."""
+        try:
+            stat = os.stat(self.catalog_path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+    
+    def _insert(self, file_type: str, entry: Dict[str, Any]):
+        """Insert an entry in time order."""
+        times = self._times.setdefault(file_type, [])
+        position = bisect_right(times, entry['time'])
+        times.insert(position, entry['time'])
+        self._entries.setdefault(file_type, []).insert(position, entry)
+        self._by_name.setdefault(file_type, {})[entry['name']] = entry
+    
+    def _discard(self, file_type: str, name: str):
+        """Remove the entry for a backup file, if present."""
+        entry = self._by_name.get(file_type, {}).pop(name, None)
+        if entry is None:
+            return
+        entries, times = self._entries[file_type], self._times[file_type]
+        # Only entries taken at the same time need comparing
+        position = bisect_left(times, entry['time'])
+        while entries[position] is not entry:
+            position += 1
+        del entries[position]
+        del times[position]
@@ -0,0 +1,112 @@
+"""
+Backup scheduler for the Portal System
+Coalesces saves into periodic snapshots taken off the foreground path
+"""
+
+import threading
+from datetime import datetime
+
+
+class BackupScheduler:
+    """
+    Takes backup-store snapshots of changed collections on a background thread.
+    
+    Saves only report which collection changed. A snapshot of every changed
+    collection is taken when backup_every_mutations changes have accumulated,
+    when backup_interval_minutes have passed since the last one, or at shutdown.
+    """
+    
+    # Snapshot timestamps carry microseconds so snapshots never overwrite each other
+    TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S_%f"
+    
+    def __init__(self, file_manager, interval_minutes: float = 10, every_mutations: int = 50):
+        """
+        Initialize BackupScheduler.
+        
+        Args:
+            file_manager: FileManager whose collections are backed up
+            interval_minutes (float): Time-based trigger (0 disables it)
+            every_mutations (int): Mutation-count trigger (0 disables it)
+        """
+        self.file_manager = file_manager
+        self.interval_minutes = interval_minutes
+        self.every_mutations = every_mutations
+        
+        self.pending_types = set()
+        self.mutation_count = 0
+        self.last_run = None
+        self.snapshots_taken = 0
+        
+        self._lock = threading.Lock()  # Guards pending state
+        self._run_lock = threading.Lock()  # Serializes snapshot runs
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = None
+    
+    @staticmethod
+    def new_timestamp() -> str:
+        """Get a unique, sortable backup timestamp for the current time."""
+        return datetime.now().strftime(BackupScheduler.TIMESTAMP_FORMAT)
+    
+    def record_mutation(self, file_type: str):
+        """
+        Note that a collection changed; never blocks on backup I/O.
+        
+        Args:
+            file_type (str): Collection that was saved or journaled
+        """
+        with self._lock:
+            if self._stopped:
+                return
+            self.pending_types.add(file_type)
+            self.mutation_count += 1
+            due = self.every_mutations and self.mutation_count >= self.every_mutations
+            
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="backup-scheduler", daemon=True)
+                self._thread.start()
+        
+        if due:
+            self._wake.set()
+    
+    def run_pending(self) -> int:
+        """
+        Snapshot every collection changed since the last run.
+        
+        Returns:
+            int: Number of collections snapshotted
+        """
+        with self._run_lock:
+            with self._lock:
+                file_types = sorted(self.pending_types)
+                self.pending_types = set()
+                self.mutation_count = 0
+            
+            timestamp = self.new_timestamp()
+            snapshotted = sum(1 for file_type in file_types
+                              if self.file_manager._create_backup(file_type, timestamp))
+            
+            self.last_run = datetime.now()
+            self.snapshots_taken += snapshotted
+            return snapshotted
+    
+    def shutdown(self):
+        """Stop the background thread and snapshot anything still pending."""
+        with self._lock:
+            self._stopped = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self.pending_types:
+            self.run_pending()
+    
+    def _run(self):
+        """Background loop: wait for a trigger, then snapshot pending collections."""
+        timeout = self.interval_minutes * 60 if self.interval_minutes else None
+        while True:
+            self._wake.wait(timeout)
+            self._wake.clear()
+            if self._stopped:
+                return
+            if self.pending_types:
+                self.run_pending()
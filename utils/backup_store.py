@@ -0,0 +1,281 @@
+"""
+Content-addressed backup store for the Portal System
+Stores each record once and describes every snapshot with a small manifest
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+
+class BackupStore:
+    """
+    Deduplicating snapshot store.
+    
+    Every record of a collection is serialized canonically and stored under
+    its SHA-256 hash in objects/, so unchanged records are shared by all
+    snapshots. A manifest per snapshot lists the record hashes in order;
+    restoring reassembles the collection from its manifest.
+    """
+    
+    def __init__(self, backup_directory: str):
+        """
+        Initialize BackupStore.
+        
+        Args:
+            backup_directory (str): Backup directory; the store lives in its store/ subdirectory
+        """
+        self.store_dir = os.path.join(backup_directory, 'store')
+        self.objects_dir = os.path.join(self.store_dir, 'objects')
+        self.manifests_dir = os.path.join(self.store_dir, 'manifests')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.manifests_dir, exist_ok=True)
+        
+        # Collection -> (timestamp, hashes) of its latest snapshot; the hashes
+        # are known to exist while that manifest does (see delete_snapshots)
+        self._known_hashes = {}
+        
+        # Bytes written by the last snapshot (manifest plus new objects)
+        self.last_snapshot_bytes = 0
+    
+    def snapshot(self, file_type: str, data: Any, timestamp: str = None) -> Optional[str]:
+        """
+        Store a snapshot of a collection, writing only records not stored before.
+        
+        Args:
+            file_type (str): Collection name
+            data: Collection data (list of records, dict of records, or any JSON value)
+            timestamp (str): Snapshot timestamp (defaults to now, %Y%m%d_%H%M%S_%f)
+        
+        Returns:
+            str: Snapshot timestamp, or None if the snapshot failed
+        """
+        timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        self.last_snapshot_bytes = 0
+        
+        try:
+            known_timestamp, known = self._known_hashes.get(file_type, (None, None))
+            if known is None or not self.has_snapshot(file_type, known_timestamp):
+                known = self._manifest_hashes(self.latest_timestamp(file_type), file_type)
+            
+            if isinstance(data, list):
+                kind = 'list'
+                entries = [self._store_object(record, known) for record in data]
+            elif isinstance(data, dict) and file_type == 'records':
+                kind = 'dict'
+                entries = {key: self._store_object(record, known) for key, record in data.items()}
+            else:
+                kind = 'value'
+                entries = self._store_object(data, known)
+            
+            manifest = {
+                'file_type': file_type,
+                'timestamp': timestamp,
+                'created': datetime.now().isoformat(),
+                'kind': kind,
+                'entries': entries
+            }
+            content = json.dumps(manifest, separators=(',', ':'))
+            self._write_file(self._manifest_path(file_type, timestamp), content)
+            self.last_snapshot_bytes += len(content)
+            
+            self._known_hashes[file_type] = (timestamp, self._hashes_of(kind, entries))
+            return timestamp
+        
+        except Exception as e:
+            print(f"Error creating {file_type} snapshot: {e}")
+            return None
+    
+    def load_snapshot(self, file_type: str, timestamp: str) -> Any:
+        """
+        Reassemble a collection from a snapshot manifest.
+        
+        Args:
+            file_type (str): Collection name
+            timestamp (str): Snapshot timestamp
+        
+        Returns:
+            Collection data, or None if no such snapshot exists
+        """
+        manifest = self._read_manifest(file_type, timestamp)
+        if manifest is None:
+            return None
+        
+        entries = manifest['entries']
+        if manifest['kind'] == 'list':
+            return [self._load_object(digest) for digest in entries]
+        if manifest['kind'] == 'dict':
+            return {key: self._load_object(digest) for key, digest in entries.items()}
+        return self._load_object(entries)
+    
+    def has_snapshot(self, file_type: str, timestamp: str) -> bool:
+        """Check whether a snapshot manifest exists."""
+        return os.path.exists(self._manifest_path(file_type, timestamp))
+    
+    def list_snapshots(self, file_type: str = None) -> List[str]:
+        """
+        List snapshot manifests.
+        
+        Args:
+            file_type (str): Filter by collection (optional)
+        
+        Returns:
+            list: Manifest filenames ({file_type}_{timestamp}.json)
+        """
+        return [filename for filename in os.listdir(self.manifests_dir)
+                if filename.endswith('.json') and
+                (file_type is None or filename.startswith(f"{file_type}_"))]
+    
+    def latest_timestamp(self, file_type: str) -> Optional[str]:
+        """Get the timestamp of the newest snapshot of a collection."""
+        snapshots = sorted(self.list_snapshots(file_type))
+        if not snapshots:
+            return None
+        return snapshots[-1][len(file_type) + 1:-len('.json')]
+    
+    def delete_snapshots(self, doomed: List[tuple]) -> int:
+        """
+        Delete snapshots and the objects only they referenced.
+        
+        Objects are kept if any manifest still on disk references them,
+        whichever process wrote it. Callers sharing the store across processes
+        must hold the data directory lock, which snapshot writers also take.
+        
+        Args:
+            doomed (list): (file_type, timestamp) pairs of snapshots to delete
+        
+        Returns:
+            int: Number of manifests and objects deleted
+        """
+        deleted_count = 0
+        candidates = set()
+        
+        for file_type, timestamp in doomed:
+            manifest = self._read_manifest(file_type, timestamp)
+            if manifest is None:
+                continue
+            candidates |= self._hashes_of(manifest['kind'], manifest['entries'])
+            os.remove(self._manifest_path(file_type, timestamp))
+            deleted_count += 1
+        
+        for filename in self.list_snapshots():
+            if not candidates:
+                break
+            with open(os.path.join(self.manifests_dir, filename), 'r', encoding='utf-8') as file:
+                manifest = json.load(file)
+            candidates -= self._hashes_of(manifest['kind'], manifest['entries'])
+        
+        for digest in candidates:
+            object_path = self._object_path(digest)
+            if os.path.exists(object_path):
+                os.remove(object_path)
+                deleted_count += 1
+        
+        self._known_hashes = {}
+        return deleted_count
+    
+    def verify_snapshot(self, file_type: str, timestamp: str, checked: Dict[str, bool] = None) -> List[str]:
+        """
+        Check that every object a snapshot references is present and undamaged.
+        
+        Objects are named by the SHA-256 of their content, so each one is
+        verified by rehashing its bytes, without parsing it.
+        
+        Args:
+            file_type (str): Collection name
+            timestamp (str): Snapshot timestamp
+            checked (dict): Hash -> intact results shared between calls, so objects
+                referenced by several snapshots are only read once
+        
+        Returns:
+            list: Hashes of missing or damaged objects
+        """
+        checked = {} if checked is None else checked
+        manifest = self._read_manifest(file_type, timestamp)
+        if manifest is None:
+            raise FileNotFoundError(f"No snapshot {file_type}_{timestamp}")
+        
+        damaged = []
+        for digest in sorted(self._hashes_of(manifest['kind'], manifest['entries'])):
+            if digest not in checked:
+                try:
+                    with open(self._object_path(digest), 'rb') as file:
+                        checked[digest] = hashlib.sha256(file.read()).hexdigest() == digest
+                except OSError:
+                    checked[digest] = False
+            if not checked[digest]:
+                damaged.append(digest)
+        return damaged
+    
+    def _store_object(self, record: Any, known: set) -> str:
+        """
+        Store one record under its content hash unless it already exists.
+        
+        Args:
+            record: Record to store
+            known (set): Hashes already known to be stored
+        
+        Returns:
+            str: Content hash of the record
+        """
+        content = json.dumps(record, sort_keys=True, ensure_ascii=False, default=str)
+        digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        
+        if digest not in known:
+            object_path = self._object_path(digest)
+            if not os.path.exists(object_path):
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                self._write_file(object_path, content)
+                self.last_snapshot_bytes += len(content.encode('utf-8'))
+            known.add(digest)
+        
+        return digest
+    
+    def _load_object(self, digest: str) -> Any:
+        """Read a stored record by its content hash."""
+        with open(self._object_path(digest), 'r', encoding='utf-8') as file:
+            return json.load(file)
+    
+    def _read_manifest(self, file_type: str, timestamp: str) -> Optional[Dict[str, Any]]:
+        """Read a snapshot manifest, or None if it does not exist."""
+        manifest_path = self._manifest_path(file_type, timestamp)
+        if not os.path.exists(manifest_path):
+            return None
+        with open(manifest_path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    
+    def _manifest_hashes(self, timestamp: Optional[str], file_type: str) -> set:
+        """Get the set of hashes referenced by a snapshot (empty if none)."""
+        if timestamp is None:
+            return set()
+        manifest = self._read_manifest(file_type, timestamp)
+        if manifest is None:
+            return set()
+        return self._hashes_of(manifest['kind'], manifest['entries'])
+    
+    @staticmethod
+    def _hashes_of(kind: str, entries: Any) -> set:
+        """Get the set of hashes from manifest entries."""
+        if kind == 'list':
+            return set(entries)
+        if kind == 'dict':
+            return set(entries.values())
+        return {entries}
+    
+    def _object_path(self, digest: str) -> str:
+        """Get the path of an object, fanned out by its first two hex digits."""
+        return os.path.join(self.objects_dir, digest[:2], digest)
+    
+    def _manifest_path(self, file_type: str, timestamp: str) -> str:
+        """Get the path of a snapshot manifest."""
+        return os.path.join(self.manifests_dir, f"{file_type}_{timestamp}.json")
+    
+    @staticmethod
+    def _write_file(path: str, content: str):
+        """Write a store file via a temporary file so readers never see partial content."""
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        os.replace(temp_path, path)
@@ -0,0 +1,191 @@
+"""
+Export bundles for the Portal System
+Sectioned JSON Lines files written and read one record at a time
+"""
+
+import json
+from datetime import datetime
+from typing import Dict, List, Any, Iterable, Set
+
+BUNDLE_FORMAT = 'portal-bundle'
+BUNDLE_VERSION = 1
+
+# Collections stored as one JSON object; exported as one {"key", "value"} line per item
+DOCUMENT_TYPES = ('records', 'config')
+
+# Fields every imported record must have
+REQUIRED_FIELDS = {
+    'users': ('username', 'password', 'name', 'email', 'user_id', 'user_type'),
+    'courses': ('course_id', 'course_name')
+}
+USER_TYPES = ('student', 'teacher', 'admin')
+
+
+class BundleWriter:
+    """
+    Writes a bundle section by section.
+    
+    Layout: a header line {"format", "version", "export_timestamp"}, then for
+    each collection a {"@section": name, "kind": "records"|"items"} line, one
+    line per record (or per {"key", "value"} item), and a closing
+    {"@end": name, "count": n} line used to detect truncated files.
+    """
+    
+    def __init__(self, file):
+        """
+        Initialize BundleWriter.
+        
+        Args:
+            file: Open text file to write to
+        """
+        self.file = file
+        self._write({'format': BUNDLE_FORMAT, 'version': BUNDLE_VERSION,
+                     'export_timestamp': datetime.now().isoformat()})
+    
+    def write_section(self, file_type: str, records: Iterable[Any]) -> int:
+        """
+        Write one collection.
+        
+        Args:
+            file_type (str): Collection name
+            records (iterable): Records of a list collection, or (key, value)
+                pairs of a document collection
+        
+        Returns:
+            int: Number of lines written for the collection
+        """
+        is_document = file_type in DOCUMENT_TYPES
+        self._write({'@section': file_type, 'kind': 'items' if is_document else 'records'})
+        
+        count = 0
+        for record in records:
+            if is_document:
+                record = {'key': record[0], 'value': record[1]}
+            self._write(record)
+            count += 1
+        
+        self._write({'@end': file_type, 'count': count})
+        return count
+    
+    def _write(self, entry: Dict[str, Any]):
+        self.file.write(json.dumps(entry, ensure_ascii=False, default=str) + '\n')
+
+
+def is_bundle(path: str) -> bool:
+    """
+    Check whether a file starts with a bundle header.
+    
+    Args:
+        path (str): File to check
+    
+    Returns:
+        bool: True for bundles, False for other files (e.g. single-document exports)
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        try:
+            header = json.loads(file.readline())
+        except ValueError:
+            return False
+    return isinstance(header, dict) and header.get('format') == BUNDLE_FORMAT
+
+
+def iter_bundle(path: str, batch_size: int = 1000) -> Iterable[tuple]:
+    """
+    Read and validate a bundle in chunks.
+    
+    Args:
+        path (str): Bundle file
+        batch_size (int): Records per chunk
+    
+    Yields:
+        tuple: (file_type, records) with at most batch_size records; document
+            collections yield (key, value) pairs. Every section ends with an
+            empty chunk so consumers can finish the collection.
+    
+    Raises:
+        ValueError: If the bundle is malformed or a record is invalid
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        header = _parse_line(file.readline(), 1)
+        if header.get('format') != BUNDLE_FORMAT:
+            raise ValueError("Not a portal export bundle")
+        if header.get('version', 0) > BUNDLE_VERSION:
+            raise ValueError(f"Bundle version {header.get('version')} is newer than supported")
+        
+        file_type, chunk, count, seen_keys = None, [], 0, set()
+        for line_number, line in enumerate(file, 2):
+            if not line.strip():
+                continue
+            entry = _parse_line(line, line_number)
+            
+            if file_type is None:
+                if '@section' not in entry:
+                    raise ValueError(f"Line {line_number}: expected a section header")
+                file_type, chunk, count, seen_keys = entry['@section'], [], 0, set()
+            elif '@end' in entry:
+                if entry['@end'] != file_type or entry.get('count') != count:
+                    raise ValueError(f"Line {line_number}: section {file_type} is incomplete")
+                validate_records(file_type, chunk, seen_keys)
+                if chunk:
+                    yield file_type, chunk
+                yield file_type, []
+                file_type = None
+            else:
+                chunk.append((entry.get('key'), entry.get('value')) if file_type in DOCUMENT_TYPES else entry)
+                count += 1
+                if len(chunk) >= batch_size:
+                    validate_records(file_type, chunk, seen_keys)
+                    yield file_type, chunk
+                    chunk = []
+        
+        if file_type is not None:
+            raise ValueError(f"Bundle ends inside section {file_type}")
+
+
+def validate_records(file_type: str, records: List[Any], seen_keys: Set[str]):
+    """
+    Check a chunk of imported records.
+    
+    Args:
+        file_type (str): Collection the records belong to
+        records (list): Records (or (key, value) pairs for document collections)
+        seen_keys (set): Keys seen earlier in the section, updated in place
+    
+    Raises:
+        ValueError: Describing the first invalid record
+    """
+    for record in records:
+        if file_type in DOCUMENT_TYPES:
+            key = record[0]
+            if not isinstance(key, str):
+                raise ValueError(f"{file_type}: item without a key")
+        else:
+            if not isinstance(record, dict):
+                raise ValueError(f"{file_type}: record is not an object")
+            missing = [field for field in REQUIRED_FIELDS.get(file_type, ()) if not record.get(field)]
+            if missing:
+                raise ValueError(f"{file_type}: record missing {', '.join(missing)}")
+            
+            if file_type == 'users':
+                if str(record['user_type']).lower() not in USER_TYPES:
+                    raise ValueError(f"users: {record['username']} has unknown type {record['user_type']}")
+                key = record['username']
+            elif file_type == 'courses':
+                key = f"{record['course_id']}-{record.get('section', 'A')}"
+            else:
+                continue
+        
+        if key in seen_keys:
+            raise ValueError(f"{file_type}: duplicate {key}")
+        seen_keys.add(key)
+
+
+def _parse_line(line: str, line_number: int) -> Dict[str, Any]:
+    """Decode one bundle line into an object."""
+    try:
+        entry = json.loads(line)
+    except ValueError:
+        raise ValueError(f"Line {line_number}: invalid JSON")
+    if not isinstance(entry, dict):
+        raise ValueError(f"Line {line_number}: expected an object")
+    return entry
@@ -0,0 +1,136 @@
+"""
+Integrity checksums for the Portal System
+Per-file and per-record checksums kept in sidecar manifests next to the data files
+"""
+
+import hashlib
+import io
+import json
+import os
+from typing import Dict, Any, Iterable, Tuple
+
+
+def record_checksum(record: Any) -> str:
+    """
+    Checksum one record independently of the file format it is stored in.
+    
+    Args:
+        record: Record data
+    
+    Returns:
+        str: 16 hex digits of the BLAKE2b hash of the record's canonical JSON
+    """
+    content = json.dumps(record, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def file_checksum(path: str, chunk_size: int = 1024 * 1024) -> Tuple[str, int]:
+    """
+    Hash a file without parsing it.
+    
+    Args:
+        path (str): File to hash
+        chunk_size (int): Bytes read at a time
+    
+    Returns:
+        tuple: (SHA-256 hex digest, size in bytes)
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+class HashingWriter(io.RawIOBase):
+    """Binary file wrapper that hashes everything written through it."""
+    
+    def __init__(self, file):
+        """
+        Initialize HashingWriter.
+        
+        Args:
+            file: Open binary file to write to
+        """
+        super().__init__()
+        self.file = file
+        self.digest = hashlib.sha256()
+        self.size = 0
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        self.digest.update(data)
+        self.size += len(data)
+        return self.file.write(data)
+    
+    def checksum(self) -> Tuple[str, int]:
+        """Get (SHA-256 hex digest, size in bytes) of what was written."""
+        return self.digest.hexdigest(), self.size
+
+
+class ChecksumManifest:
+    """
+    Checksums of one collection, stored as data/.checksums/{file_type}.json.
+    
+    Layout: {"version": 1, "files": {file name relative to the data
+    directory: {"sha256", "bytes"}}, "records": {record key: checksum}}.
+    Record checksums are kept for keyed collections (users, courses) and
+    describe the records as stored in the files, not the journal.
+    """
+    
+    def __init__(self, path: str):
+        """
+        Load a manifest, or start an empty one.
+        
+        Args:
+            path (str): Manifest file
+        """
+        self.path = path
+        self.files = {}
+        self.records = {}
+        self.complete = False  # Whether records covers every stored record
+        
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as file:
+                    content = json.load(file)
+                self.files = content.get('files', {})
+                self.records = content.get('records', {})
+                self.complete = True
+            except (OSError, ValueError) as e:
+                print(f"Error reading checksum manifest {path}: {e}")
+    
+    def set_file(self, name: str, checksum: Tuple[str, int]):
+        """Record the checksum of a file just written."""
+        self.files[name] = {'sha256': checksum[0], 'bytes': checksum[1]}
+    
+    def update_records(self, records: Dict[str, Any], deleted_keys: Iterable[str] = ()):
+        """
+        Record the checksums of changed records.
+        
+        Args:
+            records (dict): Record key -> record as written
+            deleted_keys (iterable): Keys of records no longer stored
+        """
+        for key, record in records.items():
+            self.records[key] = record_checksum(record)
+        for key in deleted_keys:
+            self.records.pop(key, None)
+    
+    def replace_records(self, records: Dict[str, Any]):
+        """Recompute the checksums of every record of the collection."""
+        self.records = {key: record_checksum(record) for key, record in records.items()}
+        self.complete = True
+    
+    def save(self):
+        """Write the manifest via a temporary file."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump({'version': 1, 'files': self.files, 'records': self.records}, file,
+                      separators=(',', ':'))
+        os.replace(temp_path, self.path)
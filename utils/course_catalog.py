@@ -0,0 +1,184 @@
+"""
+Course catalog for the Portal System
+Course sections keyed "course_id-section", indexed by course ID and by enrolled student
+"""
+
+from bisect import bisect_left, insort
+from collections.abc import MutableMapping
+from typing import List
+
+
+class CourseCatalog(MutableMapping):
+    """
+    "course_id-section" -> Course mapping with a two-level index.
+    
+    Besides the flat mapping (iterated in load order, as the plain dict it
+    replaces), the catalog keeps course_id -> {section: Course} with the
+    section names of each course kept sorted, per course_id the sorted names
+    of the sections that have free seats, and student_id -> {(course_id, section)} for every roster.
+    Courses report enrollment changes back to the catalog that holds them
+    (see Course._roster_changed), so finding a section, the first open
+    section or a student's sections never scans the other courses.
+    """
+    
+    def __init__(self):
+        """Initialize an empty CourseCatalog."""
+        self._courses = {}  # "course_id-section" -> Course
+        self._sections = {}  # course_id -> {section: Course}
+        self._section_names = {}  # course_id -> sorted section names
+        self._open = {}  # course_id -> sorted sections with free seats
+        self._enrollments = {}  # student_id -> {(course_id, section)}
+    
+    def __getitem__(self, course_key: str):
+        return self._courses[course_key]
+    
+    def __setitem__(self, course_key: str, course):
+        if course_key in self._courses:
+            self._unindex(self._courses[course_key])
+        self._courses[course_key] = course
+        
+        sections = self._sections.setdefault(course.course_id, {})
+        if course.section not in sections:
+            insort(self._section_names.setdefault(course.course_id, []), course.section)
+        sections[course.section] = course
+        object.__setattr__(course, '_catalog', self)  # Not a change to the course itself
+        self.update_roster(course, added=course.enrolled_students)
+    
+    def __delitem__(self, course_key: str):
+        self._unindex(self._courses.pop(course_key))
+    
+    def __iter__(self):
+        return iter(list(self._courses))
+    
+    def __len__(self) -> int:
+        return len(self._courses)
+    
+    def __contains__(self, course_key) -> bool:
+        return course_key in self._courses
+    
+    def section(self, course_id: str, section: str):
+        """
+        Get one section of a course.
+        
+        Args:
+            course_id (str): Course ID
+            section (str): Section name
+        
+        Returns:
+            Course object or None
+        """
+        return self._sections.get(course_id, {}).get(section)
+    
+    def sections(self, course_id: str) -> List:
+        """
+        Get every section of a course.
+        
+        Args:
+            course_id (str): Course ID
+        
+        Returns:
+            list: Course objects ordered by section name
+        """
+        sections = self._sections.get(course_id, {})
+        return [sections[section] for section in self._section_names.get(course_id, ())]
+    
+    def first_open_section(self, course_id: str):
+        """
+        Get the first section of a course (by section name) with a free seat.
+        
+        Args:
+            course_id (str): Course ID
+        
+        Returns:
+            Course object or None if every section is full
+        """
+        open_sections = self._open.get(course_id)
+        return self._sections[course_id][open_sections[0]] if open_sections else None
+    
+    def enrolled_sections(self, student_id: str) -> List:
+        """
+        Get the sections a student is enrolled in.
+        
+        Args:
+            student_id (str): Student ID
+        
+        Returns:
+            list: Course objects ordered by course ID and section
+        """
+        places = sorted(self._enrollments.get(student_id, ()))
+        return [self._sections[course_id][section] for course_id, section in places]
+    
+    def enrolled_section(self, student_id: str, course_id: str):
+        """
+        Get the section of a course a student is enrolled in.
+        
+        Args:
+            student_id (str): Student ID
+            course_id (str): Course ID
+        
+        Returns:
+            Course object or None
+        """
+        for enrolled_course_id, section in self._enrollments.get(student_id, ()):
+            if enrolled_course_id == course_id:
+                return self._sections[course_id][section]
+        return None
+    
+    def update_roster(self, course, added=(), removed=()):
+        """
+        Record enrollment changes of a section.
+        
+        Called by the course whenever its roster or capacity may have changed.
+        
+        Args:
+            course: Course held by this catalog
+            added: Student IDs that joined the section
+            removed: Student IDs that left the section
+        """
+        if self.section(course.course_id, course.section) is not course:
+            return
+        place = (course.course_id, course.section)
+        for student_id in removed:
+            self._drop_enrollment(student_id, place)
+        for student_id in added:
+            self._enrollments.setdefault(student_id, set()).add(place)
+        
+        open_sections = self._open.setdefault(course.course_id, [])
+        at = bisect_left(open_sections, course.section)
+        listed = at < len(open_sections) and open_sections[at] == course.section
+        if course.is_full():
+            if listed:
+                del open_sections[at]
+        elif not listed:
+            open_sections.insert(at, course.section)
+    
+    def _unindex(self, course):
+        """Drop a course from the section and free-seat indexes."""
+        sections = self._sections.get(course.course_id, {})
+        if sections.get(course.section) is course:
+            for student_id in course.enrolled_students:
+                self._drop_enrollment(student_id, (course.course_id, course.section))
+            del sections[course.section]
+            self._unlist(self._section_names.get(course.course_id, []), course.section)
+            self._unlist(self._open.get(course.course_id, []), course.section)
+            if not sections:
+                self._sections.pop(course.course_id, None)
+                self._section_names.pop(course.course_id, None)
+                self._open.pop(course.course_id, None)
+        if getattr(course, '_catalog', None) is self:
+            object.__setattr__(course, '_catalog', None)
+    
+    @staticmethod
+    def _unlist(names: List[str], section: str):
+        """Remove a section name from a sorted list of names."""
+        at = bisect_left(names, section)
+        if at < len(names) and names[at] == section:
+            del names[at]
+    
+    def _drop_enrollment(self, student_id: str, place):
+        """Remove one (course_id, section) from a student's enrollments."""
+        places = self._enrollments.get(student_id)
+        if places is not None:
+            places.discard(place)
+            if not places:
+                del self._enrollments[student_id]
@@ -0,0 +1,66 @@
+"""
+Inter-process file locking for the Portal System
+Advisory lock shared by every portal process using the same data directory
+"""
+
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads within one process are serialized
+    fcntl = None
+
+
+class FileLock:
+    """
+    Reentrant exclusive lock backed by fcntl.flock on a lock file.
+    
+    Serializes threads of this process (through an RLock) and other portal
+    processes (through the advisory lock). Nested acquisitions by the owning
+    thread only take the file lock once.
+    """
+    
+    def __init__(self, path: str):
+        """
+        Initialize FileLock.
+        
+        Args:
+            path (str): Lock file, created on first use
+        """
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+    
+    def acquire(self):
+        """Block until the lock is held by this thread."""
+        self._thread_lock.acquire()
+        if self._depth == 0 and fcntl is not None:
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                self._file = open(self.path, 'a+')
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            except BaseException:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+    
+    def release(self):
+        """Release one level of the lock."""
+        self._depth -= 1
+        if self._depth == 0 and self._file is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        self._thread_lock.release()
+    
+    def __enter__(self):
+        self.acquire()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
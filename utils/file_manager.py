@@ -2,11 +2,54 @@
 File Manager utility for handling data persistence
 """
 
+import atexit
+import bz2
+import contextlib
+import gzip
+import io
 import json
+import lzma
 import os
 import shutil
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterable, Optional
+
+from utils.backup_catalog import BackupCatalog
+from utils.backup_scheduler import BackupScheduler
+from utils.backup_store import BackupStore
+from utils.bundle import BundleWriter, DOCUMENT_TYPES, is_bundle, iter_bundle
+from utils.checksums import ChecksumManifest, HashingWriter, file_checksum, record_checksum
+from utils.file_lock import FileLock
+from utils.log_store import LogStore
+from utils.schema import DATA_VERSION
+from utils.serializers import CODECS, Codec, codec_for_path
+from utils.snapshot import Snapshot
+
+
+class ConcurrentModificationError(Exception):
+    """
+    Raised when a save touches records another process changed since they were read.
+    
+    Nothing in the save was written: reload the unsaved records and retry
+    the operation.
+    """
+    
+    retryable = True
+    
+    def __init__(self, conflicts: Dict[str, Iterable[str]], unsaved: Dict[str, Iterable[str]] = None):
+        """
+        Args:
+            conflicts (dict): Collection -> keys of the records another process changed
+            unsaved (dict): Collection -> keys of every record in the rejected save
+                (defaults to the conflicting ones)
+        """
+        self.conflicts = {file_type: list(keys) for file_type, keys in conflicts.items()}
+        self.unsaved = {file_type: list(keys) for file_type, keys in (unsaved or conflicts).items()}
+        super().__init__('; '.join(f"{file_type} changed by another session: {', '.join(keys)}"
+                                   for file_type, keys in self.conflicts.items()))
 
 
 class FileManager:
@@ -15,6 +58,50 @@ class FileManager:
     Manages data persistence, backup, and recovery.
     """
     
+    # Collections whose mutations are recorded in the write-ahead journal
+    JOURNALED_TYPES = ('users', 'courses')
+    
+    # Collections that can be split across shard files
+    SHARDABLE_TYPES = ('users', 'courses')
+    
+    # True for backends that can insert/replace/delete single records (see save_records)
+    RECORD_LEVEL_UPDATES = False
+    
+    # Backup archive codecs: name -> (file extension, opener, compression level keyword)
+    BACKUP_CODECS = {
+        'gzip': ('.gz', gzip.open, 'compresslevel'),
+        'bz2': ('.bz2', bz2.open, 'compresslevel'),
+        'lzma': ('.xz', lzma.open, 'preset')
+    }
+    
+    # Storage settings used when config.json has no 'storage' section
+    DEFAULT_STORAGE_CONFIG = {
+        'journal_enabled': True,
+        'journal_checkpoint_interval': 500,
+        'backend': 'json',  # 'json' or 'sqlite'
+        'layout': 'monolithic',  # 'monolithic' or 'sharded'
+        'shard_count': 16,
+        'fsync_policy': 'group',  # 'always', 'group' or 'never'
+        'group_commit_ms': 50,
+        'backup_codec': 'gzip',  # 'gzip', 'bz2', 'lzma' or 'none' (snapshot store only)
+        'backup_level': 6,
+        'backup_interval_minutes': 10,  # Snapshot changed collections this often (0 = off)
+        'backup_every_mutations': 50,  # ... or after this many saves/journal entries (0 = off)
+        'streaming_load': True,  # Hydrate users/courses record by record at startup
+        'lazy_users': True,  # Index users at startup and hydrate each on first access
+        'codecs': {},  # Collection -> 'json' (default), 'compact', 'jsonl' or 'binary'
+        'write_behind': False,  # Persist users/courses on a background writer thread
+        'watch_changes': True,  # Pick up users/courses changes made by other processes
+        'log_segment_bytes': 1048576,  # Compress the admin log once it is this large (0 = never) ...
+        'log_segment_hours': 24  # ... or once its first entry is this old (0 = never)
+    }
+    
+    # Characters read at a time by the streaming loader
+    STREAM_CHUNK_SIZE = 65536
+    
+    # Records validated and written per chunk by import_data
+    IMPORT_BATCH_SIZE = 1000
+    
     def __init__(self, data_directory="data"):
         """
         Initialize FileManager.
@@ -32,7 +119,174 @@ class FileManager:
             'config': os.path.join(data_directory, 'config.json')
         }
         self.backup_dir = os.path.join(data_directory, 'backups')
+        self.shard_dir = os.path.join(data_directory, 'shards')
+        
+        # Writers in every process sharing this directory take the same advisory lock
+        self.data_lock = FileLock(os.path.join(data_directory, '.lock'))
+        self.backup_store = BackupStore(self.backup_dir)
+        self.snapshotted_types = set()  # Collections whose on-disk version is in the store
+        self.backup_catalog = BackupCatalog(self.backup_dir, self.data_lock)
+        if self.backup_catalog.is_new:
+            with self.data_lock:
+                if not os.path.exists(self.backup_catalog.catalog_path):
+                    self._rebuild_backup_catalog()
+        self.journal_path = os.path.join(data_directory, 'journal.log')
+        self.journal_entries = 0
+        self.journal_pending = set()  # Collections with entries awaiting a checkpoint
+        self.journal_keys = {}  # Collection -> record keys journaled since its last checkpoint
+        self.generations_path = os.path.join(data_directory, '.generations')
+        self._versions = {}  # Collection -> record key -> stored version (None if absent)
+        self._version_generations = {}  # Collection -> write generation _versions describes
+        self._record_offsets = {}  # Data file -> (file state, record key -> (offset, length))
+        # What the journal held when it was last read (see _tail_journal)
+        self._journal_tail = {'inode': None, 'head': b'', 'offset': 0, 'entries': 0, 'versions': {}}
+        self._seen_states = {}  # Collection -> file state last reflected in memory (see poll_changes)
+        
+        # Sidecar checksums of the data files (see verify)
+        self.checksum_dir = os.path.join(data_directory, '.checksums')
+        self._checksum_manifests = {}  # Collection -> (write generation, ChecksumManifest)
+        self.unreadable_types = set()  # Collections whose last load failed; never saved over
+        
+        # Group commit state: files written since the last shared fsync
+        self._sync_lock = threading.Lock()
+        self._pending_sync = {}  # Path -> True if its content still needs syncing
+        self._sync_timer = None
+        atexit.register(self.flush)
+        
+        self.storage_config = self._load_storage_config()
+        self._apply_codec_paths()
+        self.log_store = LogStore(os.path.join(data_directory, 'logs'),
+                                  self.storage_config['log_segment_bytes'],
+                                  self.storage_config['log_segment_hours'],
+                                  fsync=self.storage_config['fsync_policy'] == 'always')
+        self.journal_enabled = self.storage_config['journal_enabled']
+        self.backup_scheduler = BackupScheduler(self, self.storage_config['backup_interval_minutes'],
+                                                self.storage_config['backup_every_mutations'])
+        atexit.register(self.backup_scheduler.shutdown)
         self.initialize_files()
+        self._scan_journal()
+        self._seen_states = {file_type: self._watch_state(file_type) for file_type in self.JOURNALED_TYPES}
+    
+    def _load_storage_config(self) -> Dict[str, Any]:
+        """
+        Read storage settings from config.json, falling back to defaults.
+        
+        Returns:
+            dict: Storage settings
+        """
+        storage_config = dict(self.DEFAULT_STORAGE_CONFIG)
+        config_path = self.file_paths['config']
+        try:
+            if os.path.exists(config_path):
+                with open(config_path, 'r', encoding='utf-8') as file:
+                    storage_config.update(json.load(file).get('storage', {}))
+        except Exception as e:
+            print(f"Error reading storage settings: {e}")
+        storage_config['codecs'] = dict(storage_config.get('codecs') or {})
+        return storage_config
+    
+    def update_storage_config(self, **settings) -> bool:
+        """
+        Persist storage settings to config.json.
+        
+        Args:
+            **settings: Storage settings to change
+            
+        Returns:
+            bool: True if config was saved
+        """
+        config_data = self.load_data('config')
+        if not isinstance(config_data, dict):
+            config_data = {}
+        
+        config_data.setdefault('storage', {}).update(settings)
+        self.storage_config.update(settings)
+        return self.save_data('config', config_data)
+    
+    def codec_for(self, file_type: str) -> Codec:
+        """
+        Get the serialization codec configured for a collection.
+        
+        Args:
+            file_type (str): Collection name
+            
+        Returns:
+            Codec: Configured codec (JSON if none is set; config.json is always JSON)
+        """
+        if file_type == 'config':
+            return CODECS['json']
+        return CODECS.get(self.storage_config['codecs'].get(file_type, 'json'), CODECS['json'])
+    
+    def _apply_codec_paths(self):
+        """Point each collection's file path at the extension of its codec."""
+        for file_type, file_path in self.file_paths.items():
+            self.file_paths[file_type] = os.path.splitext(file_path)[0] + self.codec_for(file_type).extension
+    
+    def _read_file(self, file_type: str, path: str) -> Any:
+        """
+        Read a whole collection file (or shard) with the collection's codec.
+        
+        Args:
+            file_type (str): Collection name
+            path (str): File to read
+            
+        Returns:
+            Decoded data
+        """
+        with open(path, 'rb') as file:
+            return self.codec_for(file_type).load(file)
+    
+    def set_codec(self, file_type: str, codec_name: str) -> bool:
+        """
+        Rewrite a collection in another serialization codec and record it in config.json.
+        
+        Args:
+            file_type (str): Collection to convert
+            codec_name (str): 'json', 'compact', 'jsonl' or 'binary'
+            
+        Returns:
+            bool: True if conversion successful, False otherwise
+        """
+        if file_type not in self.file_paths or file_type == 'config':
+            print(f"Cannot change the codec of {file_type}")
+            return False
+        if codec_name not in CODECS:
+            print(f"Unknown codec: {codec_name}")
+            return False
+        
+        data = self.load_data(file_type)
+        if CODECS[codec_name].list_only and not isinstance(data, list):
+            print(f"Codec {codec_name} can only store list collections")
+            return False
+        
+        if self.is_sharded(file_type):
+            old_paths = [self._shard_path(file_type, shard) for shard in range(self.storage_config['shard_count'])]
+        else:
+            old_paths = [self.file_paths[file_type]]
+        old_codecs = dict(self.storage_config['codecs'])
+        
+        self.storage_config['codecs'][file_type] = codec_name
+        self._apply_codec_paths()
+        if not self.save_data(file_type, data) or not self.update_storage_config(
+                codecs=dict(self.storage_config['codecs'])):
+            self.storage_config['codecs'] = old_codecs
+            self._apply_codec_paths()
+            print(f"Error converting {file_type} to {codec_name}")
+            return False
+        
+        # Remove files left in the old format
+        new_paths = [self.file_paths[file_type]] + [self._shard_path(file_type, shard)
+                                                    for shard in range(self.storage_config['shard_count'])]
+        for path in old_paths:
+            if path not in new_paths and os.path.exists(path):
+                os.remove(path)
+        
+        print(f"Converted {file_type} to {codec_name}")
+        return True
+    
+    def is_sharded(self, file_type: str) -> bool:
+        """Check whether a collection is stored as shard files."""
+        return file_type in self.SHARDABLE_TYPES and self.storage_config['layout'] == 'sharded'
     
     def initialize_files(self):
         """Create data directory and initialize files if they don't exist."""
@@ -40,105 +294,1334 @@ class FileManager:
         os.makedirs(self.data_dir, exist_ok=True)
         os.makedirs(self.backup_dir, exist_ok=True)
         
-        # Initialize files with empty data structures
-        default_data = {
-            'users': [],
-            'courses': [],
-            'records': {},
-            'salary_slips': [],
-            'system_logs': [],
-            'config': {
-                'version': '1.0',
-                'created': datetime.now().isoformat(),
-                'last_backup': None
-            }
-        }
+        # Initialize files with empty data structures
+        default_data = {
+            'users': [],
+            'courses': [],
+            'records': {},
+            'salary_slips': [],
+            'system_logs': [],
+            'config': {
+                'version': DATA_VERSION,
+                'created': datetime.now().isoformat(),
+                'last_backup': None,
+                'storage': dict(self.DEFAULT_STORAGE_CONFIG)
+            }
+        }
+        
+        for file_type, file_path in self.file_paths.items():
+            if self.is_sharded(file_type):
+                file_path = self._shard_collection_dir(file_type)
+            if not os.path.exists(file_path):
+                self.save_data(file_type, default_data[file_type])
+                print(f"Initialized {file_path}")
+    
+    def save_data(self, file_type: str, data: Any, changed_keys: Iterable[str] = None) -> bool:
+        """
+        Save data to specified file.
+        
+        Args:
+            file_type (str): Type of file ('users', 'courses', etc.)
+            data: Data to save
+            changed_keys (iterable): Keys (see record_key) of records created, modified
+                or deleted since the last save. Sharded collections use this to rewrite
+                only the affected shards; None rewrites everything.
+            
+        Returns:
+            bool: True if save successful, False otherwise
+        """
+        if file_type not in self.file_paths:
+            print(f"Unknown file type: {file_type}")
+            return False
+        
+        if file_type in self.unreadable_types:
+            print(f"Error: {file_type} could not be read, so it was not overwritten. "
+                  f"Run 'python storage_cli.py verify' or restore it from a backup.")
+            return False
+        
+        with self.data_lock, self._own_write():
+            if self.is_sharded(file_type):
+                return self._save_sharded(file_type, data, changed_keys)
+            
+            try:
+                file_path = self.file_paths[file_type]
+                
+                self._ensure_baseline_snapshot(file_type)
+                
+                codec = self.codec_for(file_type)
+                checksum = self._write_atomic(file_path, lambda file: codec.dump(data, file), binary=True)
+                self._update_checksums(file_type, {file_path: checksum}, data, changed_keys)
+                self._bump_generation(file_type)
+                self.backup_scheduler.record_mutation(file_type)
+                
+                # A full write supersedes any journaled mutations for this collection
+                if file_type in self.journal_pending:
+                    self._discard_journal_entries(file_type)
+                
+                return True
+                
+            except Exception as e:
+                print(f"Error saving {file_type} data: {e}")
+                return False
+    
+    def _write_atomic(self, path: str, write_func, binary: bool = False):
+        """
+        Write a file via a temporary file renamed into place.
+        
+        A crash mid-write leaves the previous version intact instead of a
+        truncated file: unless the fsync policy is 'never', the new content is
+        synced before the rename, so the rename can never reach disk ahead of
+        it. 'always' also syncs the directory right away; 'group' leaves that
+        to the next group commit.
+        
+        Args:
+            path (str): File to (re)write
+            write_func: Callable receiving the open file to write into
+            binary (bool): Open the file in binary mode instead of UTF-8 text
+        
+        Returns:
+            tuple: (SHA-256 hex digest, size) of the content written, hashed on the way out
+        """
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, 'wb') as raw:
+                hashing = HashingWriter(raw)
+                file = hashing if binary else io.TextIOWrapper(hashing, encoding='utf-8')
+                write_func(file)
+                file.flush()
+                if not binary:
+                    file.detach()
+                raw.flush()
+                if self.storage_config['fsync_policy'] != 'never':
+                    os.fsync(raw.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        
+        if self.storage_config['fsync_policy'] == 'always':
+            self._fsync_directory(os.path.dirname(path))
+        else:
+            self._schedule_sync(path, content_synced=True)
+        return hashing.checksum()
+    
+    def _copy_atomic(self, source_path: str, destination_path: str):
+        """
+        Copy a file over another one atomically.
+        
+        Args:
+            source_path (str): File to copy
+            destination_path (str): File to replace
+        """
+        with open(source_path, 'r', encoding='utf-8') as source:
+            self._write_atomic(destination_path, lambda file: shutil.copyfileobj(source, file))
+    
+    def _schedule_sync(self, path: str, content_synced: bool = False):
+        """
+        Queue a written file for the next group commit.
+        All files written within one group_commit_ms window share a single flush.
+        
+        Args:
+            path (str): File that was written
+            content_synced (bool): The file was synced before being renamed into
+                place (see _write_atomic), so only its directory is left to sync
+        """
+        if self.storage_config['fsync_policy'] != 'group':
+            return
+        
+        with self._sync_lock:
+            self._pending_sync[path] = self._pending_sync.get(path, False) or not content_synced
+            if self._sync_timer is None:
+                self._sync_timer = threading.Timer(
+                    self.storage_config['group_commit_ms'] / 1000.0, self.flush)
+                self._sync_timer.daemon = True
+                self._sync_timer.start()
+    
+    def flush(self) -> bool:
+        """
+        Force every file written since the last group commit to disk.
+        
+        Returns:
+            bool: True if all pending files were synced
+        """
+        with self._sync_lock:
+            pending = self._pending_sync
+            self._pending_sync = {}
+            if self._sync_timer is not None:
+                self._sync_timer.cancel()
+                self._sync_timer = None
+        
+        success = True
+        for path in [path for path, needs_content in pending.items() if needs_content]:
+            try:
+                with open(path, 'rb+') as file:
+                    os.fsync(file.fileno())
+            except FileNotFoundError:
+                continue  # Replaced or removed since it was queued
+            except Exception as e:
+                print(f"Error syncing {path}: {e}")
+                success = False
+        
+        for directory in {os.path.dirname(path) for path in pending}:
+            self._fsync_directory(directory)
+        
+        return success
+    
+    @staticmethod
+    def _fsync_directory(directory: str):
+        """Persist renames in a directory (POSIX only)."""
+        if not hasattr(os, 'O_DIRECTORY'):
+            return
+        try:
+            fd = os.open(directory or '.', os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        except OSError:
+            pass
+    
+    def _shard_collection_dir(self, file_type: str) -> str:
+        """Get the directory holding a collection's shard files."""
+        return os.path.join(self.shard_dir, file_type)
+    
+    def _shard_path(self, file_type: str, shard: int) -> str:
+        """Get the path of a single shard file."""
+        return os.path.join(self._shard_collection_dir(file_type),
+                            f"{file_type}_{shard:03d}{self.codec_for(file_type).extension}")
+    
+    def shard_for_key(self, key: str) -> int:
+        """
+        Get the shard a record key belongs to.
+        Uses CRC32 so the mapping is stable across processes (unlike hash()).
+        
+        Args:
+            key (str): Record key (see record_key)
+            
+        Returns:
+            int: Shard number
+        """
+        return zlib.crc32(key.encode('utf-8')) % self.storage_config['shard_count']
+    
+    def _save_sharded(self, file_type: str, data: List[Dict[str, Any]],
+                      changed_keys: Iterable[str] = None) -> bool:
+        """
+        Save a collection as shard files, rewriting only shards that changed.
+        
+        Args:
+            file_type (str): Collection to save
+            data (list): Complete collection records
+            changed_keys (iterable): Keys of changed records, or None for all shards
+            
+        Returns:
+            bool: True if save successful, False otherwise
+        """
+        try:
+            shard_count = self.storage_config['shard_count']
+            os.makedirs(self._shard_collection_dir(file_type), exist_ok=True)
+            
+            if changed_keys is None:
+                shards_to_write = set(range(shard_count))
+            else:
+                shards_to_write = {self.shard_for_key(key) for key in changed_keys}
+            
+            self._ensure_baseline_snapshot(file_type)
+            
+            codec = self.codec_for(file_type)
+            buckets = {shard: [] for shard in shards_to_write}
+            for record in data:
+                shard = self.shard_for_key(self.record_key(file_type, record))
+                if shard in buckets:
+                    buckets[shard].append(record)
+            
+            checksums = {}
+            for shard, records in buckets.items():
+                shard_path = self._shard_path(file_type, shard)
+                checksums[shard_path] = self._write_atomic(
+                    shard_path, lambda file, records=records: codec.dump(records, file), binary=True)
+            self._update_checksums(file_type, checksums, data, changed_keys)
+            self._bump_generation(file_type)
+            self.backup_scheduler.record_mutation(file_type)
+            
+            # Journaled keys all live in the shards just written
+            if file_type in self.journal_pending and (
+                    changed_keys is None or self.journal_keys.get(file_type, set()) <= set(changed_keys)):
+                self._discard_journal_entries(file_type)
+            
+            return True
+            
+        except Exception as e:
+            print(f"Error saving {file_type} shards: {e}")
+            return False
+    
+    def _load_sharded(self, file_type: str) -> List[Dict[str, Any]]:
+        """
+        Load every shard of a collection, reading shard files in parallel.
+        
+        Args:
+            file_type (str): Collection to load
+            
+        Returns:
+            list: Records from all shards
+        """
+        shard_paths = [self._shard_path(file_type, shard)
+                       for shard in range(self.storage_config['shard_count'])]
+        
+        def read_shard(shard_path):
+            if not os.path.exists(shard_path):
+                return []
+            return self._read_file(file_type, shard_path)
+        
+        try:
+            with ThreadPoolExecutor() as executor:
+                shards = list(executor.map(read_shard, shard_paths))
+        except RuntimeError:
+            # No new threads during interpreter shutdown (e.g. the exit-time backup snapshot)
+            shards = [read_shard(shard_path) for shard_path in shard_paths]
+        
+        return [record for shard in shards for record in shard]
+    
+    def migrate_layout(self, target_layout: str, shard_count: int = None) -> bool:
+        """
+        Convert users and courses between monolithic files and shard files.
+        
+        Args:
+            target_layout (str): 'monolithic' or 'sharded'
+            shard_count (int): New number of shards per collection (sharded only)
+            
+        Returns:
+            bool: True if migration successful, False otherwise
+        """
+        if target_layout not in ('monolithic', 'sharded'):
+            print(f"Unknown storage layout: {target_layout}")
+            return False
+        
+        # Read everything (journal included) through the current layout
+        collections = {file_type: self.load_data(file_type) for file_type in self.SHARDABLE_TYPES}
+        old_settings = dict(self.storage_config)
+        new_settings = {'layout': target_layout}
+        if shard_count and target_layout == 'sharded':
+            new_settings['shard_count'] = shard_count
+        
+        # Remove old shards first: records would land in different files after a re-shard
+        for file_type in self.SHARDABLE_TYPES:
+            if self.is_sharded(file_type):
+                shutil.rmtree(self._shard_collection_dir(file_type), ignore_errors=True)
+        
+        try:
+            self.storage_config.update(new_settings)
+            for file_type, data in collections.items():
+                if not self.save_data(file_type, data):
+                    raise IOError(f"could not write {file_type} in {target_layout} layout")
+            
+            if not self.update_storage_config(**new_settings):
+                raise IOError("could not update config")
+            
+        except Exception as e:
+            self.storage_config = old_settings
+            for file_type, data in collections.items():
+                self.save_data(file_type, data)
+            print(f"Error migrating storage layout: {e}")
+            return False
+        
+        if target_layout == 'sharded':
+            for file_type in self.SHARDABLE_TYPES:
+                if os.path.exists(self.file_paths[file_type]):
+                    os.remove(self.file_paths[file_type])
+        else:
+            # The shard directory only held the per-collection directories removed above
+            try:
+                os.rmdir(self.shard_dir)
+            except OSError:
+                pass  # Never created, or holds files of its own
+        
+        print(f"Migrated storage layout from {old_settings['layout']} to {target_layout}")
+        return True
+    
+    def load_data(self, file_type: str) -> Any:
+        """
+        Load data from specified file.
+        
+        Args:
+            file_type (str): Type of file to load
+            
+        Returns:
+            Data from file, or empty structure if file doesn't exist
+        """
+        if file_type not in self.file_paths:
+            print(f"Unknown file type: {file_type}")
+            return None
+        
+        try:
+            file_path = self.file_paths[file_type]
+            
+            if self.is_sharded(file_type):
+                data = self._load_sharded(file_type)
+            elif not os.path.exists(file_path):
+                print(f"File {file_path} does not exist. Initializing with empty data.")
+                return [] if file_type != 'records' else {}
+            else:
+                data = self._read_file(file_type, file_path)
+            
+            if file_type in self.JOURNALED_TYPES:
+                data = self._replay_journal(file_type, data)
+            
+            self.unreadable_types.discard(file_type)
+            return data
+                
+        except Exception as e:
+            print(f"Error loading {file_type} data: {e}")
+            # The empty result must never be saved over the damaged file
+            self.unreadable_types.add(file_type)
+            return [] if file_type != 'records' else {}
+    
+    def iter_records(self, file_type: str) -> Iterable[Dict[str, Any]]:
+        """
+        Yield the records of a list collection one at a time, with the journal applied.
+        
+        Unlike load_data the whole collection is never held in memory: files
+        are parsed incrementally, so peak memory is bounded by the largest
+        record. Accepts JSON arrays and JSON Lines files.
+        
+        Args:
+            file_type (str): Collection to read ('users', 'courses', ...)
+            
+        Yields:
+            dict: One record at a time
+        """
+        if file_type not in self.file_paths:
+            print(f"Unknown file type: {file_type}")
+            return
+        
+        for record, _ in self.iter_record_locations(file_type):
+            yield record
+    
+    def iter_record_locations(self, file_type: str) -> Iterable[tuple]:
+        """
+        Yield each record of a list collection together with where it is stored.
+        
+        Args:
+            file_type (str): Collection to read
+            
+        Yields:
+            tuple: (record, location); location can be passed to read_record later,
+                or is None when the record only exists in the journal
+        """
+        if self.is_sharded(file_type):
+            paths = [self._shard_path(file_type, shard) for shard in range(self.storage_config['shard_count'])]
+        else:
+            paths = [self.file_paths[file_type]]
+        
+        overrides = {}
+        if file_type in self.JOURNALED_TYPES:
+            generation = self._generation(file_type)
+            for entry in self._read_journal():
+                if entry.get('type') == file_type:
+                    overrides[entry['key']] = entry['record'] if entry['op'] == 'put' else None
+        
+        # A complete pass also refreshes the stored record versions and the
+        # files' record offsets (see _stored_versions)
+        versions = {}
+        try:
+            for path in paths:
+                if not os.path.exists(path):
+                    continue
+                stat = os.stat(path)
+                offsets = {}
+                for record, offset, length in codec_for_path(path).iter_records(path, self.STREAM_CHUNK_SIZE):
+                    location = (path, offset, length, stat.st_mtime_ns, stat.st_size)
+                    key = self.record_key(file_type, record) if file_type in self.JOURNALED_TYPES else None
+                    if key is not None:
+                        offsets[key] = (offset, length)
+                    if key in overrides:
+                        record, location = overrides.pop(key), None
+                        if record is None:
+                            continue
+                    if key is not None:
+                        versions[key] = record.get('_version', 0)
+                    yield record, location
+                if file_type in self.JOURNALED_TYPES:
+                    self._record_offsets[path] = ((stat.st_ino, stat.st_mtime_ns, stat.st_size), offsets)
+        except Exception as e:
+            print(f"Error indexing {file_type} data: {e}")
+            return
+        
+        for key, record in overrides.items():
+            if record is not None:
+                versions[key] = record.get('_version', 0)
+                yield record, None
+        
+        if file_type in self.JOURNALED_TYPES and generation == self._generation(file_type):
+            self._versions[file_type] = versions
+            self._version_generations[file_type] = generation
+    
+    def read_record(self, location: tuple) -> Any:
+        """
+        Read a single record from a location given by iter_record_locations.
+        
+        Args:
+            location (tuple): Record location
+            
+        Returns:
+            The record, or None if the file has been rewritten since it was indexed
+        """
+        path, offset, length, mtime_ns, size = location
+        try:
+            stat = os.stat(path)
+            if (stat.st_mtime_ns, stat.st_size) != (mtime_ns, size):
+                return None
+            with open(path, 'rb') as file:
+                file.seek(offset)
+                return codec_for_path(path).load_record(file.read(length))
+        except (OSError, ValueError):
+            return None
+    
+    @staticmethod
+    def record_key(file_type: str, record: Dict[str, Any]) -> str:
+        """
+        Get the unique key identifying a record within its collection.
+        
+        Args:
+            file_type (str): Collection the record belongs to
+            record (dict): Record data
+            
+        Returns:
+            str: Username for users, "course_id-section" for courses
+        """
+        if file_type == 'courses':
+            return f"{record['course_id']}-{record.get('section', 'A')}"
+        return record['username']
+    
+    def append_journal(self, file_type: str, op: str, key: str, record: Dict[str, Any] = None) -> bool:
+        """
+        Append a single mutation to the write-ahead journal.
+        
+        Args:
+            file_type (str): Collection being changed ('users' or 'courses')
+            op (str): 'put' to insert/replace a record, 'delete' to remove it
+            key (str): Record key (see record_key)
+            record (dict): Full record for 'put' operations
+            
+        Returns:
+            bool: True if the entry was written, False otherwise
+        """
+        if file_type not in self.JOURNALED_TYPES:
+            print(f"Unknown journaled file type: {file_type}")
+            return False
+        
+        entry = {
+            'type': file_type,
+            'op': op,
+            'key': key,
+            'record': record,
+            'timestamp': datetime.now().isoformat()
+        }
+        
+        try:
+            with self.data_lock, self._own_write(), open(self.journal_path, 'a', encoding='utf-8') as file:
+                file.write(json.dumps(entry, ensure_ascii=False, default=str) + '\n')
+                file.flush()
+                if self.storage_config['fsync_policy'] == 'always':
+                    os.fsync(file.fileno())
+                self._bump_generation(file_type)
+            self._schedule_sync(self.journal_path)
+            self.journal_entries += 1
+            self.journal_pending.add(file_type)
+            self.journal_keys.setdefault(file_type, set()).add(key)
+            self.backup_scheduler.record_mutation(file_type)
+            return True
+            
+        except Exception as e:
+            print(f"Error writing journal entry for {file_type}: {e}")
+            return False
+    
+    def journal_needs_checkpoint(self) -> bool:
+        """Check whether the journal has grown past the checkpoint interval."""
+        return self.journal_entries >= self.storage_config['journal_checkpoint_interval']
+    
+    def journal_pending_types(self) -> set:
+        """Get the collections that have journal entries awaiting a checkpoint."""
+        return set(self.journal_pending)
+    
+    def checkpoint(self, file_types: Iterable[str] = None) -> bool:
+        """
+        Rewrite full collection files and discard their journal entries, then
+        refresh the users snapshot (see open_snapshot).
+        
+        The collections are rebuilt from their files and the journal under the
+        data lock, so entries journaled by other processes are kept.
+        
+        Args:
+            file_types (iterable): Collections to checkpoint (default: all with pending entries)
+            
+        Returns:
+            bool: True if every collection was saved
+        """
+        with self.data_lock:
+            # Entries other processes journaled since our last look count too
+            self._scan_journal()
+            if file_types is None:
+                file_types = self.journal_pending_types()
+            
+            # save_data discards each collection's journal entries once its file is written
+            success = all([self.save_data(file_type, self.load_data(file_type), self.journal_keys.get(file_type))
+                           for file_type in file_types])
+            
+            if self.snapshot_needs_refresh('users'):
+                success = self.write_snapshot('users', self.iter_records('users')) and success
+            return success
+    
+    def commit_records(self, file_type: str, records: Dict[str, Dict[str, Any]],
+                       deleted_keys: Iterable[str] = (), base_versions: Dict[str, int] = None) -> bool:
+        """
+        Save changed and deleted records of one collection (see commit_changes).
+        
+        Args:
+            file_type (str): 'users' or 'courses'
+            records (dict): Record key -> record to insert or replace
+            deleted_keys (iterable): Keys of records to remove
+            base_versions (dict): Record key -> version the change was based on
+            
+        Returns:
+            bool: True if the changes were written
+            
+        Raises:
+            ConcurrentModificationError: Without writing anything, if any
+                record was changed by another process
+        """
+        return self.commit_changes({file_type: {'put': records, 'delete': deleted_keys,
+                                                'base': base_versions or {}}})
+    
+    def commit_changes(self, changes: Dict[str, Dict[str, Any]]) -> bool:
+        """
+        Save changed and deleted records of several collections with optimistic concurrency control.
+        
+        Each record carries its new version in '_version'; a change set's
+        'base' gives the stored version each change was made against (0 for
+        new records). Under the data lock the stored versions of every
+        collection are checked first: if any record has moved on (another
+        process saved it), nothing is written, so an operation touching a
+        user and a course is never half-applied. Otherwise the changes are
+        written through the journal, record-level updates or a merge into the
+        stored collection, so other processes' changes are never overwritten.
+        
+        Args:
+            changes (dict): Collection -> {'put': {key: record}, 'delete': keys,
+                'base': {key: version}}
+        
+        Returns:
+            bool: True if the changes were written
+        
+        Raises:
+            ConcurrentModificationError: Before writing anything, if any record
+                was changed by another process
+        """
+        changes = {file_type: (change['put'], list(change['delete']), change['base'])
+                   for file_type, change in changes.items()}
+        
+        with self.data_lock:
+            conflicts = {}
+            for file_type, (records, deleted_keys, base_versions) in changes.items():
+                stored = self._stored_versions(file_type, list(records) + deleted_keys)
+                keys = [key for key in records if stored.get(key, 0) != base_versions.get(key, 0)]
+                keys += [key for key in deleted_keys if key in stored and stored[key] != base_versions.get(key, 0)]
+                if keys:
+                    conflicts[file_type] = keys
+            if conflicts:
+                raise ConcurrentModificationError(conflicts, {
+                    file_type: list(records) + deleted_keys
+                    for file_type, (records, deleted_keys, _) in changes.items()})
+            
+            success = True
+            for file_type, (records, deleted_keys, _) in changes.items():
+                success = self._write_changes(file_type, records, deleted_keys) and success
+        return success
+            
+    def _write_changes(self, file_type: str, records: Dict[str, Dict[str, Any]], deleted_keys: List[str]) -> bool:
+        """
+        Write accepted changes of one collection; the caller holds the data lock.
+        
+        Args:
+            file_type (str): 'users' or 'courses'
+            records (dict): Record key -> record to insert or replace
+            deleted_keys (list): Keys of records to remove
+        
+        Returns:
+            bool: True if the changes were written
+        """
+        success = True
+        if self.journal_enabled:
+            for key in deleted_keys:
+                success = self.append_journal(file_type, 'delete', key) and success
+            for key, record in records.items():
+                success = self.append_journal(file_type, 'put', key, record) and success
+        elif self.RECORD_LEVEL_UPDATES:
+            if records or deleted_keys:
+                success = self.save_records(file_type, list(records.values()), deleted_keys)
+        elif records or deleted_keys:
+            success = self.merge_records(file_type, records, deleted_keys)
+        
+        if success:
+            self._remember_versions(file_type, {key: record.get('_version', 0)
+                                                for key, record in records.items()}, deleted_keys)
+        return success
+    
+    def _generation(self, file_type: str) -> int:
+        """
+        Get a collection's write generation, bumped by every process on each write.
+        
+        Unlike mtimes, which can repeat for writes in quick succession, the
+        counter changes on every save and journal entry.
+        """
+        try:
+            with open(self.generations_path, 'r', encoding='utf-8') as file:
+                return json.load(file).get(file_type, 0)
+        except (OSError, ValueError):
+            return 0
+    
+    def _bump_generation(self, file_type: str):
+        """Advance a collection's write generation; the caller holds the data lock."""
+        try:
+            with open(self.generations_path, 'r', encoding='utf-8') as file:
+                generations = json.load(file)
+        except (OSError, ValueError):
+            generations = {}
+        generations[file_type] = generations.get(file_type, 0) + 1
+        
+        temp_path = f"{self.generations_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(generations, file)
+        os.replace(temp_path, self.generations_path)
+    
+    def _stored_versions(self, file_type: str, keys: Iterable[str]) -> Dict[str, int]:
+        """
+        Get the stored versions of records.
+        
+        Versions looked up since another process last wrote the collection
+        are reused. Otherwise only the requested keys are read: from the
+        journal entries (just the part appended since the last look is
+        parsed), else from the record's place in its file or shard, whose
+        record offsets are indexed once per rewrite of that file.
+        
+        Args:
+            file_type (str): Collection name
+            keys (iterable): Record keys to look up
+            
+        Returns:
+            dict: Key -> version for each key that exists (records without one are version 0)
+        """
+        keys = list(keys)
+        generation = self._generation(file_type)
+        if self._version_generations.get(file_type) != generation:
+            self._versions[file_type] = {}
+            self._version_generations[file_type] = generation
+        
+        cached = self._versions[file_type]
+        missing = [key for key in keys if key not in cached]
+        if missing:
+            self._scan_journal()
+            journaled = self._journal_tail['versions'].get(file_type, {})
+            for key in missing:
+                cached[key] = journaled[key] if key in journaled else self._file_version(file_type, key)
+        return {key: cached[key] for key in keys if cached[key] is not None}
+    
+    def _file_version(self, file_type: str, key: str) -> Optional[int]:
+        """
+        Read one record's version from the file (or shard) holding its key.
+        
+        Args:
+            file_type (str): Collection name
+            key (str): Record key
+            
+        Returns:
+            int: Stored version, or None if the file does not hold the record
+        """
+        path = (self._shard_path(file_type, self.shard_for_key(key)) if self.is_sharded(file_type)
+                else self.file_paths[file_type])
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        
+        state = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        indexed = self._record_offsets.get(path)
+        if indexed is None or indexed[0] != state:
+            offsets = {}
+            for record, offset, length in codec_for_path(path).iter_records(path, self.STREAM_CHUNK_SIZE):
+                offsets[self.record_key(file_type, record)] = (offset, length)
+            indexed = self._record_offsets[path] = (state, offsets)
+        
+        if key not in indexed[1]:
+            return None
+        record = self.read_record((path, *indexed[1][key], stat.st_mtime_ns, stat.st_size))
+        return record.get('_version', 0) if record is not None else None
+    
+    def _remember_versions(self, file_type: str, versions: Dict[str, int], deleted_keys: Iterable[str]):
+        """
+        Record versions this process just wrote, keeping the cached state current.
+        Called under the data lock right after the write.
+        
+        Args:
+            file_type (str): Collection written
+            versions (dict): Key -> version of each written record
+            deleted_keys (iterable): Keys of deleted records
+        """
+        cached = self._versions.setdefault(file_type, {})
+        cached.update(versions)
+        for key in deleted_keys:
+            cached[key] = None
+        self._version_generations[file_type] = self._generation(file_type)
+    
+    def merge_records(self, file_type: str, records: Dict[str, Dict[str, Any]],
+                      deleted_keys: Iterable[str] = ()) -> bool:
+        """
+        Apply changed and deleted records to the stored collection and save it.
+        
+        Unlike save_data this needs only the changes, not the complete
+        collection, so it can run without access to in-memory objects.
+        
+        Args:
+            file_type (str): 'users' or 'courses'
+            records (dict): Record key -> record to insert or replace
+            deleted_keys (iterable): Keys of records to remove
+            
+        Returns:
+            bool: True if save successful, False otherwise
+        """
+        deleted_keys = list(deleted_keys)
+        with self.data_lock:
+            merged = {self.record_key(file_type, record): record for record in self.load_data(file_type)}
+            for key in deleted_keys:
+                merged.pop(key, None)
+            merged.update(records)
+            return self.save_data(file_type, list(merged.values()), list(records) + deleted_keys)
+    
+    def _watch_state(self, file_type: str) -> List[list]:
+        """
+        Get the inode, mtime and size of a collection's files and the journal.
+        
+        Args:
+            file_type (str): 'users' or 'courses'
+            
+        Returns:
+            list: [file name, inode, mtime_ns, size] per existing file
+        """
+        if self.is_sharded(file_type):
+            paths = [self._shard_path(file_type, shard) for shard in range(self.storage_config['shard_count'])]
+        else:
+            paths = [self.file_paths[file_type]]
+        
+        state = []
+        for path in paths + [self.journal_path]:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            state.append([os.path.basename(path), stat.st_ino, stat.st_mtime_ns, stat.st_size])
+        return state
+    
+    def poll_changes(self) -> List[str]:
+        """
+        Detect users/courses changes made outside this process.
+        
+        Only a few stat calls: writes made by this FileManager are not
+        reported, so any difference comes from another portal process or a
+        script editing the files.
+        
+        Returns:
+            list: Collections changed since the last poll (or since startup)
+        """
+        changed = []
+        for file_type in self.JOURNALED_TYPES:
+            state = self._watch_state(file_type)
+            if state != self._seen_states.get(file_type):
+                self._seen_states[file_type] = state
+                changed.append(file_type)
+        
+        if changed:
+            # Journal entries from other processes count towards our checkpoints
+            self._scan_journal()
+        return changed
+    
+    @contextlib.contextmanager
+    def _own_write(self):
+        """Keep poll_changes from reporting a write this process is about to make."""
+        unchanged = [file_type for file_type in self.JOURNALED_TYPES
+                     if self._seen_states.get(file_type) == self._watch_state(file_type)]
+        try:
+            yield
+        finally:
+            # Collections with unseen external changes stay reported
+            for file_type in unchanged:
+                self._seen_states[file_type] = self._watch_state(file_type)
+    
+    def _checksum_manifest(self, file_type: str) -> ChecksumManifest:
+        """Get a collection's checksum manifest, re-reading it if another write happened since."""
+        generation = self._generation(file_type)
+        cached = self._checksum_manifests.get(file_type)
+        if cached is None or cached[0] != generation:
+            cached = (generation, ChecksumManifest(os.path.join(self.checksum_dir, f"{file_type}.json")))
+            self._checksum_manifests[file_type] = cached
+        return cached[1]
+    
+    def _update_checksums(self, file_type: str, checksums: Dict[str, tuple], data: Any,
+                          changed_keys: Iterable[str] = None):
+        """
+        Record the checksums of files just written and of the records that changed.
+        
+        Called under the data lock right before the write's generation bump.
+        Only changed records are rehashed when changed_keys is given; the
+        file checksums were computed while the files were written.
+        
+        Args:
+            file_type (str): Collection written
+            checksums (dict): Path -> (SHA-256, size) of each file written
+            data: Complete collection data as written
+            changed_keys (iterable): Keys of changed records, or None if everything was rewritten
+        """
+        try:
+            manifest = self._checksum_manifest(file_type)
+            if changed_keys is None:
+                manifest.files = {}  # Drops files of a previous layout or codec
+            for path, checksum in checksums.items():
+                manifest.set_file(os.path.relpath(path, self.data_dir), checksum)
+            
+            if file_type in self.JOURNALED_TYPES:
+                records = {self.record_key(file_type, record): record for record in data}
+                if changed_keys is None or not manifest.complete:
+                    manifest.replace_records(records)
+                else:
+                    changed_keys = set(changed_keys)
+                    manifest.update_records({key: records[key] for key in changed_keys if key in records},
+                                            changed_keys - set(records))
+            
+            manifest.save()
+            self._checksum_manifests[file_type] = (self._generation(file_type) + 1, manifest)
+        except Exception as e:
+            print(f"Error updating checksums for {file_type}: {e}")
+    
+    def _data_files(self, file_type: str) -> List[str]:
+        """Get the data files currently holding a collection."""
+        if self.is_sharded(file_type):
+            shard_dir = self._shard_collection_dir(file_type)
+            if not os.path.isdir(shard_dir):
+                return []
+            return [os.path.join(shard_dir, name) for name in sorted(os.listdir(shard_dir))
+                    if name.startswith(f"{file_type}_") and not name.endswith('.tmp')]
+        path = self.file_paths[file_type]
+        return [path] if os.path.exists(path) else []
+    
+    def verify(self, file_types: Iterable[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Check data files against their checksum manifests.
+        
+        Every file is hashed (in parallel, without parsing) and compared with
+        the checksum recorded when it was written. Only files that do not
+        match are parsed, to pinpoint the records that changed or cannot be
+        read.
+        
+        Args:
+            file_types (iterable): Collections to check (default: all)
+            
+        Returns:
+            dict: File name (relative to the data directory) -> {'collection',
+                'status' ('ok', 'modified', 'corrupt', 'missing' or 'unverified'
+                for files written before checksums were kept), 'records'
+                (affected record keys), 'error'}
+        """
+        expected = {}  # File name -> (collection, manifest entry or None)
+        manifests = {}
+        for file_type in file_types or self.file_paths:
+            manifests[file_type] = self._checksum_manifest(file_type)
+            for name, entry in manifests[file_type].files.items():
+                expected[name] = (file_type, entry)
+            for path in self._data_files(file_type):
+                expected.setdefault(os.path.relpath(path, self.data_dir), (file_type, None))
+        
+        def hash_file(name):
+            path = os.path.join(self.data_dir, name)
+            return file_checksum(path) if os.path.exists(path) else None
+        
+        with ThreadPoolExecutor() as executor:
+            actual = dict(zip(expected, executor.map(hash_file, expected)))
+        
+        results = {}
+        for name, (file_type, entry) in expected.items():
+            result = {'collection': file_type, 'status': 'ok', 'records': [], 'error': None}
+            checksum = actual[name]
+            if checksum is None:
+                result['status'] = 'missing'
+            elif entry is None:
+                result['status'] = 'unverified'
+            elif checksum != (entry['sha256'], entry['bytes']):
+                result.update(self._diagnose_file(file_type, os.path.join(self.data_dir, name),
+                                                  manifests[file_type]))
+            results[name] = result
+        return results
+    
+    def _diagnose_file(self, file_type: str, path: str, manifest: ChecksumManifest) -> Dict[str, Any]:
+        """
+        Find out what is wrong with a file whose checksum does not match.
+        
+        Args:
+            file_type (str): Collection the file belongs to
+            path (str): Data file
+            manifest (ChecksumManifest): The collection's manifest
+            
+        Returns:
+            dict: 'status' ('modified' if it still parses, else 'corrupt'), 'records'
+                (keys whose checksum differs, or that are missing or unreadable) and 'error'
+        """
+        codec = codec_for_path(path)
+        if file_type not in self.JOURNALED_TYPES:
+            try:
+                with open(path, 'rb') as file:
+                    codec.load(file)
+                return {'status': 'modified'}
+            except Exception as e:
+                return {'status': 'corrupt', 'error': str(e)}
+        
+        # Records the manifest expects in this file
+        expected_keys = set(manifest.records)
+        if self.is_sharded(file_type):
+            shard = int(os.path.splitext(os.path.basename(path))[0].rsplit('_', 1)[1])
+            expected_keys = {key for key in expected_keys if self.shard_for_key(key) == shard}
+        
+        seen, changed, error = set(), [], None
+        try:
+            for record, offset, _ in codec.iter_records(path):
+                try:
+                    key = self.record_key(file_type, record)
+                except Exception:
+                    raise ValueError(f"malformed record at byte {offset}")
+                seen.add(key)
+                if manifest.records.get(key) != record_checksum(record):
+                    changed.append(key)
+        except Exception as e:
+            error = f"unreadable after {len(seen)} records: {e}"
+        
+        return {'status': 'corrupt' if error else 'modified',
+                'records': changed + sorted(expected_keys - seen),
+                'error': error}
+    
+    def verify_backups(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Check every cataloged backup without parsing its data.
+        
+        Archives and database copies are hashed and compared with the
+        checksum recorded when they were written; store snapshots have their
+        manifest checked the same way, and every object they reference is
+        rehashed against its name (objects are named by their SHA-256).
+        Backups are checked in parallel.
+        
+        Returns:
+            dict: Backup name -> {'collection', 'status' ('ok', 'corrupt', 'missing'
+                or 'unverified' for backups cataloged without a checksum), 'error'}
+        """
+        checked_objects = {}  # Object hash -> intact, shared by snapshots
+        
+        def check(pair):
+            file_type, entry = pair
+            result = {'collection': file_type, 'status': 'ok', 'error': None}
+            directory = self.backup_store.manifests_dir if entry['kind'] == 'snapshot' else self.backup_dir
+            path = os.path.join(directory, entry['name'])
+            if not os.path.exists(path):
+                result['status'] = 'missing'
+                return entry['name'], result
+            
+            if 'sha256' not in entry:
+                result['status'] = 'unverified'
+            elif file_checksum(path)[0] != entry['sha256']:
+                result.update(status='corrupt', error="checksum mismatch")
+                return entry['name'], result
+            
+            if entry['kind'] == 'snapshot':
+                try:
+                    damaged = self.backup_store.verify_snapshot(file_type, entry['timestamp'], checked_objects)
+                except Exception as e:
+                    damaged, result['error'] = [], f"unreadable manifest: {e}"
+                    result['status'] = 'corrupt'
+                if damaged:
+                    result.update(status='corrupt', error=f"{len(damaged)} damaged or missing record objects")
+            return entry['name'], result
+        
+        with ThreadPoolExecutor() as executor:
+            return dict(executor.map(check, self.backup_catalog.entries()))
+    
+    def snapshot_path(self, file_type: str) -> str:
+        """Get the path of a collection's memory-mapped snapshot."""
+        return os.path.join(self.data_dir, f"{file_type}.snap")
+    
+    def _source_signature(self, file_type: str) -> List[list]:
+        """
+        Identify the current version of a collection's files.
         
-        for file_type, file_path in self.file_paths.items():
-            if not os.path.exists(file_path):
-                self.save_data(file_type, default_data[file_type])
-                print(f"Initialized {file_path}")
+        Args:
+            file_type (str): Collection name
+            
+        Returns:
+            list: [file name, mtime_ns, size] for each existing file of the collection
+        """
+        if self.is_sharded(file_type):
+            paths = [self._shard_path(file_type, shard) for shard in range(self.storage_config['shard_count'])]
+        else:
+            paths = [self.file_paths[file_type]]
+        
+        signature = []
+        for path in paths:
+            if os.path.exists(path):
+                stat = os.stat(path)
+                signature.append([os.path.basename(path), stat.st_mtime_ns, stat.st_size])
+        return signature
     
-    def save_data(self, file_type: str, data: Any) -> bool:
+    def open_snapshot(self, file_type: str):
         """
-        Save data to specified file.
+        Open a collection's snapshot if it matches the data on disk.
         
         Args:
-            file_type (str): Type of file ('users', 'courses', etc.)
-            data: Data to save
+            file_type (str): Collection name
             
         Returns:
-            bool: True if save successful, False otherwise
+            Snapshot: Open snapshot, or None if it is missing or out of date
         """
-        if file_type not in self.file_paths:
-            print(f"Unknown file type: {file_type}")
-            return False
+        snapshot_path = self.snapshot_path(file_type)
+        if not os.path.exists(snapshot_path):
+            return None
         
         try:
-            file_path = self.file_paths[file_type]
-            
-            # Create backup before saving
-            if os.path.exists(file_path):
-                self._create_backup(file_type)
-            
-            with open(file_path, 'w', encoding='utf-8') as file:
-                json.dump(data, file, indent=2, ensure_ascii=False, default=str)
-            
+            snapshot = Snapshot(snapshot_path)
+        except Exception as e:
+            print(f"Error opening {file_type} snapshot: {e}")
+            return None
+        
+        # Journaled or later-saved changes are not in the snapshot
+        if file_type in self.journal_pending or snapshot.meta.get('source') != self._source_signature(file_type):
+            snapshot.close()
+            return None
+        return snapshot
+    
+    def snapshot_needs_refresh(self, file_type: str) -> bool:
+        """Check whether a collection's snapshot is missing or out of date."""
+        snapshot = self.open_snapshot(file_type)
+        if snapshot is None:
             return True
+        snapshot.close()
+        return False
+    
+    def write_snapshot(self, file_type: str, records: Iterable[Dict[str, Any]]) -> bool:
+        """
+        Write a collection's memory-mapped snapshot.
+        
+        The records must match the collection files as they are now (call
+        after a checkpoint); the files' signature is stored to detect staleness.
+        
+        Args:
+            file_type (str): Collection name
+            records (iterable): Complete collection records
             
+        Returns:
+            bool: True if the snapshot was written
+        """
+        def user_type(record):
+            return (record.get('user_type') or '').lower()
+        
+        def role_id(record):
+            return record.get(f"{user_type(record)}_id") or record.get('user_id')
+        
+        try:
+            Snapshot.write(self.snapshot_path(file_type), records,
+                           key_func=lambda record: self.record_key(file_type, record),
+                           tag_func=user_type if file_type == 'users' else None,
+                           secondary_func=role_id if file_type == 'users' else None,
+                           meta={'file_type': file_type,
+                                 'created': datetime.now().isoformat(),
+                                 'source': self._source_signature(file_type)})
+            return True
         except Exception as e:
-            print(f"Error saving {file_type} data: {e}")
+            print(f"Error writing {file_type} snapshot: {e}")
             return False
     
-    def load_data(self, file_type: str) -> Any:
+    def _read_journal(self) -> List[Dict[str, Any]]:
         """
-        Load data from specified file.
+        Read all complete entries from the journal.
         
-        Args:
-            file_type (str): Type of file to load
-            
         Returns:
-            Data from file, or empty structure if file doesn't exist
+            list: Journal entries in the order they were written
         """
-        if file_type not in self.file_paths:
-            print(f"Unknown file type: {file_type}")
-            return None
+        if not os.path.exists(self.journal_path):
+            return []
         
+        entries = []
+        with open(self.journal_path, 'r', encoding='utf-8') as file:
+            for line in file:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A torn final line from an interrupted append is skipped
+                    continue
+        return entries
+    
+    def _scan_journal(self):
+        """Count entries currently waiting in the journal and the collections they touch."""
         try:
-            file_path = self.file_paths[file_type]
-            
-            if not os.path.exists(file_path):
-                print(f"File {file_path} does not exist. Initializing with empty data.")
-                return [] if file_type != 'records' else {}
+            tail = self._tail_journal()
+        except Exception as e:
+            print(f"Error reading journal: {e}")
+            return
+        
+        self.journal_entries = tail['entries']
+        self.journal_keys = {file_type: set(versions) for file_type, versions in tail['versions'].items()}
+        self.journal_pending = set(self.journal_keys)
+    
+    def _tail_journal(self) -> Dict[str, Any]:
+        """
+        Bring what is known about the journal up to date.
+        
+        Only the entries appended since the previous call are parsed; a
+        journal rewritten by a checkpoint (another file) is read from the start.
+        
+        Returns:
+            dict: 'entries', the number of complete entries, and 'versions',
+                collection -> record key -> version of its last entry (None for deletes)
+        """
+        tail = self._journal_tail
+        try:
+            file = open(self.journal_path, 'rb')
+        except FileNotFoundError:
+            tail.update(inode=None, head=b'', offset=0, entries=0, versions={})
+            return tail
+        
+        with file:
+            stat = os.fstat(file.fileno())
+            if (stat.st_ino != tail['inode'] or stat.st_size < tail['offset']
+                    or file.read(len(tail['head'])) != tail['head']):
+                tail.update(inode=stat.st_ino, head=b'', offset=0, entries=0, versions={})
             
-            with open(file_path, 'r', encoding='utf-8') as file:
-                return json.load(file)
+            file.seek(tail['offset'])
+            for line in file:
+                if not line.endswith(b'\n'):
+                    break  # Still being appended, or torn; looked at again next time
+                if tail['offset'] == 0:
+                    tail['head'] = line[:64]
+                tail['offset'] += len(line)
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Blank, or a torn line from an interrupted append
+                    continue
                 
-        except Exception as e:
-            print(f"Error loading {file_type} data: {e}")
-            return [] if file_type != 'records' else {}
+                tail['entries'] += 1
+                if entry.get('type') in self.JOURNALED_TYPES:
+                    record = entry.get('record') if entry.get('op') == 'put' else None
+                    tail['versions'].setdefault(entry['type'], {})[entry['key']] = (
+                        record.get('_version', 0) if record is not None else None)
+        return tail
+    
+    def _discard_journal_entries(self, file_type: str):
+        """
+        Drop journal entries for a collection whose file was just rewritten.
+        
+        Args:
+            file_type (str): Collection that was checkpointed
+        """
+        remaining = [entry for entry in self._read_journal() if entry.get('type') != file_type]
+        
+        def write_entries(file):
+            for entry in remaining:
+                file.write(json.dumps(entry, ensure_ascii=False, default=str) + '\n')
+        
+        self._write_atomic(self.journal_path, write_entries)
+        
+        self.journal_entries = len(remaining)
+        self.journal_pending.discard(file_type)
+        self.journal_keys.pop(file_type, None)
+    
+    def _replay_journal(self, file_type: str, data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Apply journaled mutations on top of checkpointed collection data.
+        
+        Args:
+            file_type (str): Collection being loaded
+            data (list): Records from the last checkpoint
+            
+        Returns:
+            list: Records with all journal entries applied
+        """
+        entries = [entry for entry in self._read_journal() if entry.get('type') == file_type]
+        if not entries:
+            return data
+        
+        records = {self.record_key(file_type, record): record for record in data}
+        for entry in entries:
+            if entry['op'] == 'put':
+                records[entry['key']] = entry['record']
+            elif entry['op'] == 'delete':
+                records.pop(entry['key'], None)
+        
+        return list(records.values())
+    
+    def _ensure_baseline_snapshot(self, file_type: str):
+        """
+        Make sure the version on disk is in the backup store before it is first overwritten.
+        
+        Only does work the first time a collection is saved into an empty
+        store; the snapshot is stamped with the file's modification time.
+        Later versions are snapshotted by the backup scheduler.
+        
+        Args:
+            file_type (str): Collection about to be saved
+        """
+        if file_type in self.snapshotted_types:
+            return
+        self.snapshotted_types.add(file_type)
+        
+        if self.backup_store.latest_timestamp(file_type) is None:
+            source_path = (self._shard_collection_dir(file_type) if self.is_sharded(file_type)
+                           else self.file_paths[file_type])
+            if os.path.exists(source_path):
+                modified = datetime.fromtimestamp(os.path.getmtime(source_path))
+                self._create_backup(file_type, modified.strftime(BackupScheduler.TIMESTAMP_FORMAT))
     
-    def _create_backup(self, file_type: str) -> bool:
+    def _create_backup(self, file_type: str, timestamp: str = None) -> bool:
         """
         Create backup of specified file.
         
         Args:
             file_type (str): Type of file to backup
+            timestamp (str): Backup timestamp to use (defaults to now)
             
         Returns:
             bool: True if backup successful, False otherwise
         """
         try:
-            source_path = self.file_paths[file_type]
-            if not os.path.exists(source_path):
-                return False
-            
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_filename = f"{file_type}_{timestamp}.json"
-            backup_path = os.path.join(self.backup_dir, backup_filename)
+            if file_type in self.journal_pending:
+                data = self.load_data(file_type)
+                if file_type in self.unreadable_types:
+                    return False
+            elif self.is_sharded(file_type):
+                if not os.path.exists(self._shard_collection_dir(file_type)):
+                    return False
+                data = self._load_sharded(file_type)
+            else:
+                source_path = self.file_paths[file_type]
+                if not os.path.exists(source_path):
+                    return False
+                data = self._read_file(file_type, source_path)
             
-            shutil.copy2(source_path, backup_path)
-            return True
+            # Under the lock so another process cannot collect objects this snapshot reuses
+            with self.data_lock:
+                timestamp = self.backup_store.snapshot(file_type, data, timestamp)
+                if timestamp is None:
+                    return False
+                manifest_name = f"{file_type}_{timestamp}.json"
+                return self.backup_catalog.add(file_type, timestamp, 'snapshot', manifest_name,
+                                               self.backup_store.last_snapshot_bytes,
+                                               file_checksum(os.path.join(self.backup_store.manifests_dir,
+                                                                          manifest_name))[0])
             
         except Exception as e:
             print(f"Error creating backup for {file_type}: {e}")
@@ -148,27 +1631,105 @@ class FileManager:
         """
         Create backup of all data files.
         
+        Collections are written as compressed archives
+        ({file_type}_{timestamp}.json.gz etc., per storage.backup_codec),
+        compressed concurrently on a thread pool.
+        
         Returns:
             bool: True if all backups successful, False otherwise
         """
         print("Creating system backup...")
-        success_count = 0
+        timestamp = BackupScheduler.new_timestamp()
+        file_types = [file_type for file_type in self.file_paths if file_type != 'config']
         
-        for file_type in self.file_paths.keys():
-            if file_type != 'config':  # Skip config file
-                if self._create_backup(file_type):
-                    success_count += 1
+        if self.storage_config['backup_codec'] == 'none':
+            results = [self._create_backup(file_type, timestamp) for file_type in file_types]
+        else:
+            with ThreadPoolExecutor(max_workers=len(file_types)) as executor:
+                results = list(executor.map(
+                    lambda file_type: self._create_compressed_backup(file_type, timestamp), file_types))
+            # Workers only record their archives; merge them into the shared catalog once
+            self.backup_catalog.save()
+        success_count = sum(1 for result in results if result)
         
         # Update config with backup timestamp
         config_data = self.load_data('config')
         config_data['last_backup'] = datetime.now().isoformat()
         self.save_data('config', config_data)
         
-        total_files = len(self.file_paths) - 1  # Exclude config
+        total_files = len(file_types)
         print(f"Backup completed: {success_count}/{total_files} files backed up")
         
         return success_count == total_files
     
+    def _create_compressed_backup(self, file_type: str, timestamp: str) -> bool:
+        """
+        Stream one collection into a compressed backup archive.
+        
+        Args:
+            file_type (str): Type of file to backup
+            timestamp (str): Backup timestamp
+            
+        Returns:
+            bool: True if backup successful, False otherwise
+        """
+        codec = self.storage_config['backup_codec']
+        if codec not in self.BACKUP_CODECS:
+            print(f"Unknown backup codec: {codec}")
+            return False
+        extension, opener, level_keyword = self.BACKUP_CODECS[codec]
+        
+        backup_path = os.path.join(self.backup_dir, f"{file_type}_{timestamp}.json{extension}")
+        temp_path = f"{backup_path}.{os.getpid()}.tmp"
+        
+        # When the file on disk is not the whole collection, serialize the loaded data
+        source_path = self.file_paths[file_type]
+        from_loaded_data = (self.is_sharded(file_type) or file_type in self.journal_pending
+                            or not self.codec_for(file_type).plain_json)
+        if not from_loaded_data and not os.path.exists(source_path):
+            return False
+        
+        try:
+            data = self.load_data(file_type) if from_loaded_data else None
+            if file_type in self.unreadable_types:
+                raise ValueError("collection could not be read")
+            
+            with opener(temp_path, 'wb', **{level_keyword: self.storage_config['backup_level']}) as archive:
+                if from_loaded_data:
+                    archive.write(json.dumps(data, indent=2, ensure_ascii=False, default=str).encode('utf-8'))
+                else:
+                    with open(source_path, 'rb') as source:
+                        shutil.copyfileobj(source, archive)
+            
+            os.replace(temp_path, backup_path)
+            checksum, size = file_checksum(backup_path)
+            return self.backup_catalog.add(file_type, timestamp, 'archive', os.path.basename(backup_path),
+                                           size, checksum, save=False)
+            
+        except Exception as e:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            print(f"Error creating compressed backup for {file_type}: {e}")
+            return False
+    
+    def _read_compressed_backup(self, file_type: str, backup_timestamp: str) -> Any:
+        """
+        Read a compressed backup archive in any supported codec.
+        
+        Args:
+            file_type (str): Type of file
+            backup_timestamp (str): Timestamp of backup
+            
+        Returns:
+            Backup data, or None if no archive with that timestamp exists
+        """
+        for extension, opener, _ in self.BACKUP_CODECS.values():
+            backup_path = os.path.join(self.backup_dir, f"{file_type}_{backup_timestamp}.json{extension}")
+            if os.path.exists(backup_path):
+                with opener(backup_path, 'rt', encoding='utf-8') as archive:
+                    return json.load(archive)
+        return None
+    
     def restore_from_backup(self, file_type: str, backup_timestamp: str) -> bool:
         """
         Restore file from backup.
@@ -181,15 +1742,28 @@ class FileManager:
             bool: True if restore successful, False otherwise
         """
         try:
-            backup_filename = f"{file_type}_{backup_timestamp}.json"
-            backup_path = os.path.join(self.backup_dir, backup_filename)
+            data = self.backup_store.load_snapshot(file_type, backup_timestamp)
+            if data is None:
+                data = self._read_compressed_backup(file_type, backup_timestamp)
             
-            if not os.path.exists(backup_path):
-                print(f"Backup file {backup_filename} not found")
+            if data is None:
+                # Fall back to a full-file backup from before the backup store
+                backup_filename = f"{file_type}_{backup_timestamp}.json"
+                backup_path = os.path.join(self.backup_dir, backup_filename)
+                if not os.path.exists(backup_path):
+                    print(f"Backup {backup_filename} not found")
+                    return False
+                with open(backup_path, 'r', encoding='utf-8') as file:
+                    data = json.load(file)
+            
+            # Restoring is the intended way to replace a collection that could not be read
+            self.unreadable_types.discard(file_type)
+            if not self.save_data(file_type, data):
                 return False
             
-            current_path = self.file_paths[file_type]
-            shutil.copy2(backup_path, current_path)
+            # Journaled mutations were made after the backup and must not be replayed over it
+            if file_type in self.journal_pending:
+                self._discard_journal_entries(file_type)
             
             print(f"Restored {file_type} from backup {backup_timestamp}")
             return True
@@ -200,29 +1774,35 @@ class FileManager:
     
     def list_backups(self, file_type: str = None) -> List[str]:
         """
-        List available backups.
+        List available backups from the backup catalog.
         
         Args:
             file_type (str): Filter by file type (optional)
             
         Returns:
-            list: List of backup files
+            list: List of backup files, most recent first
         """
-        try:
-            if not os.path.exists(self.backup_dir):
-                return []
-            
-            backup_files = []
-            for filename in os.listdir(self.backup_dir):
-                if filename.endswith('.json'):
-                    if file_type is None or filename.startswith(f"{file_type}_"):
-                        backup_files.append(filename)
-            
-            return sorted(backup_files, reverse=True)  # Most recent first
+        return [entry['name'] for _, entry in self.backup_catalog.entries(file_type)]
+    
+    def restore_as_of(self, file_type: str, when: datetime) -> bool:
+        """
+        Restore a collection from the newest backup taken at or before a point in time.
+        
+        Args:
+            file_type (str): Type of file to restore
+            when (datetime): Point in time to restore to
             
-        except Exception as e:
-            print(f"Error listing backups: {e}")
-            return []
+        Returns:
+            bool: True if restore successful, False otherwise
+        """
+        candidates = [entry for entry in (self.backup_catalog.find(file_type, when),
+                                          self.backup_catalog.find('database', when)) if entry]
+        if not candidates:
+            print(f"No backup of {file_type} exists from before {when.isoformat()}")
+            return False
+        
+        newest = max(candidates, key=lambda entry: entry['time'])
+        return self.restore_from_backup(file_type, newest['timestamp'])
     
     def cleanup_old_backups(self, days_to_keep: int = 30) -> int:
         """
@@ -234,28 +1814,104 @@ class FileManager:
         Returns:
             int: Number of files deleted
         """
+        cutoff = datetime.fromtimestamp(datetime.now().timestamp() - (days_to_keep * 24 * 60 * 60))
+        with self.data_lock:
+            deleted_count = self._delete_backups(self.backup_catalog.older_than(cutoff))
+        print(f"Cleaned up {deleted_count} old backup files")
+        return deleted_count
+    
+    def prune_backups(self, daily: int = 7, weekly: int = 4, monthly: int = 12) -> int:
+        """
+        Apply grandfather-father-son retention to all backups.
+        
+        Args:
+            daily (int): Number of most recent days to keep one backup for
+            weekly (int): Number of most recent weeks to keep one backup for
+            monthly (int): Number of most recent months to keep one backup for
+            
+        Returns:
+            int: Number of files deleted
+        """
+        with self.data_lock:
+            deleted_count = self._delete_backups(self.backup_catalog.expired_by_retention(daily, weekly, monthly))
+        print(f"Pruned {deleted_count} backup files")
+        return deleted_count
+    
+    def get_backup_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get backup count, bytes and oldest/newest timestamps per collection.
+        
+        Returns:
+            dict: Collection -> backup statistics
+        """
+        return self.backup_catalog.stats()
+    
+    def _delete_backups(self, doomed: List[tuple]) -> int:
+        """
+        Delete cataloged backups and drop them from the catalog.
+        
+        Called with data_lock held, on entries taken from the freshly merged
+        catalog; store objects are kept if any manifest left on disk uses them.
+        
+        Args:
+            doomed (list): (file_type, entry) pairs from the catalog
+            
+        Returns:
+            int: Number of files deleted
+        """
+        if not doomed:
+            return 0
+        
         try:
-            if not os.path.exists(self.backup_dir):
-                return 0
+            snapshots = [(file_type, entry['timestamp']) for file_type, entry in doomed
+                         if entry['kind'] == 'snapshot']
+            deleted_count = self.backup_store.delete_snapshots(snapshots)
             
-            cutoff_time = datetime.now().timestamp() - (days_to_keep * 24 * 60 * 60)
-            deleted_count = 0
+            for _, entry in doomed:
+                backup_path = os.path.join(self.backup_dir, entry['name'])
+                if entry['kind'] != 'snapshot' and os.path.exists(backup_path):
+                    os.remove(backup_path)
+                    deleted_count += 1
             
-            for filename in os.listdir(self.backup_dir):
-                file_path = os.path.join(self.backup_dir, filename)
-                if os.path.isfile(file_path):
-                    file_time = os.path.getmtime(file_path)
-                    if file_time < cutoff_time:
-                        os.remove(file_path)
-                        deleted_count += 1
-            
-            print(f"Cleaned up {deleted_count} old backup files")
+            self.backup_catalog.remove(doomed)
             return deleted_count
             
         except Exception as e:
-            print(f"Error cleaning up backups: {e}")
+            print(f"Error deleting backups: {e}")
             return 0
     
+    def _rebuild_backup_catalog(self):
+        """Build the backup catalog from the files already in the backup directory (once)."""
+        archive_extensions = ['.json'] + [f".json{codec[0]}" for codec in self.BACKUP_CODECS.values()]
+        try:
+            for filename in os.listdir(self.backup_dir):
+                backup_path = os.path.join(self.backup_dir, filename)
+                if filename.startswith('portal_') and filename.endswith('.db'):
+                    self.backup_catalog.add('database', filename[len('portal_'):-len('.db')], 'database',
+                                            filename, os.path.getsize(backup_path), save=False)
+                    continue
+                
+                for file_type in self.file_paths:
+                    extension = next((ext for ext in archive_extensions if filename.endswith(ext)), None)
+                    if extension and filename.startswith(f"{file_type}_"):
+                        self.backup_catalog.add(file_type, filename[len(file_type) + 1:-len(extension)],
+                                                'file' if extension == '.json' else 'archive',
+                                                filename, os.path.getsize(backup_path), save=False)
+                        break
+            
+            for filename in self.backup_store.list_snapshots():
+                manifest_path = os.path.join(self.backup_store.manifests_dir, filename)
+                for file_type in self.file_paths:
+                    if filename.startswith(f"{file_type}_"):
+                        self.backup_catalog.add(file_type, filename[len(file_type) + 1:-len('.json')], 'snapshot',
+                                                filename, os.path.getsize(manifest_path), save=False)
+                        break
+            
+            self.backup_catalog.save()
+            
+        except Exception as e:
+            print(f"Error building backup catalog: {e}")
+    
     def get_file_info(self, file_type: str) -> Dict[str, Any]:
         """
         Get information about a data file.
@@ -287,7 +1943,11 @@ class FileManager:
     
     def export_data(self, export_path: str) -> bool:
         """
-        Export all data to a single file.
+        Export all data to a single bundle file.
+        
+        The bundle is JSON Lines with one section per collection (see
+        utils.bundle); records are streamed from storage, so memory use does
+        not grow with the size of users or courses.
         
         Args:
             export_path (str): Path to export file
@@ -295,17 +1955,17 @@ class FileManager:
         Returns:
             bool: True if export successful, False otherwise
         """
+        def write_bundle(file):
+            writer = BundleWriter(file)
+            for file_type in self.file_paths:
+                if file_type in DOCUMENT_TYPES:
+                    writer.write_section(file_type, self.load_data(file_type).items())
+                else:
+                    writer.write_section(file_type, self.iter_records(file_type))
+        
         try:
-            export_data = {
-                'export_timestamp': datetime.now().isoformat(),
-                'data': {}
-            }
-            
-            for file_type in self.file_paths.keys():
-                export_data['data'][file_type] = self.load_data(file_type)
-            
-            with open(export_path, 'w', encoding='utf-8') as file:
-                json.dump(export_data, file, indent=2, ensure_ascii=False, default=str)
+            with self.data_lock:
+                self._write_atomic(export_path, write_bundle)
             
             print(f"Data exported to {export_path}")
             return True
@@ -318,6 +1978,11 @@ class FileManager:
         """
         Import data from exported file.
         
+        Bundles are read in chunks of IMPORT_BATCH_SIZE records: a first pass
+        validates every section, then one backup is taken and a second pass
+        writes the collections. Nothing is changed if validation fails.
+        Files written by the previous single-document export are still accepted.
+        
         Args:
             import_path (str): Path to import file
             
@@ -329,24 +1994,243 @@ class FileManager:
                 print(f"Import file {import_path} not found")
                 return False
             
-            with open(import_path, 'r', encoding='utf-8') as file:
-                import_data = json.load(file)
-            
-            if 'data' not in import_data:
-                print("Invalid import file format")
-                return False
+            if not is_bundle(import_path):
+                return self._import_document(import_path)
             
-            # Create backup before import
-            self.backup_data()
+            counts = {}
+            for file_type, records in iter_bundle(import_path, self.IMPORT_BATCH_SIZE):
+                if file_type not in self.file_paths:
+                    raise ValueError(f"Unknown collection in bundle: {file_type}")
+                counts[file_type] = counts.get(file_type, 0) + len(records)
             
-            # Import data
-            for file_type, data in import_data['data'].items():
-                if file_type in self.file_paths:
-                    self.save_data(file_type, data)
+            with self.data_lock, self._own_write():
+                # Create backup before import
+                self.backup_data()
+                self._write_import(import_path)
             
-            print(f"Data imported from {import_path}")
+            summary = ', '.join(f"{count} {file_type}" for file_type, count in counts.items())
+            print(f"Data imported from {import_path} ({summary})")
             return True
             
         except Exception as e:
             print(f"Error importing data: {e}")
             return False
+    
+    def _write_import(self, import_path: str):
+        """
+        Write every collection of a validated bundle.
+        
+        List collections are streamed chunk by chunk into temporary files
+        (one per shard for sharded collections) that are renamed into place
+        once the whole bundle has been written. Files and records are
+        checksummed as they are written.
+        
+        Args:
+            import_path (str): Bundle file
+        """
+        staged = []  # (temporary path, final path, collection, HashingWriter)
+        outputs = {}  # Final path -> [open file, HashingWriter, records written] for the current section
+        documents = {}
+        record_sums = {}  # Collection -> record key -> checksum
+        imported = set()
+        
+        def stage(file_type, path):
+            raw = open(f"{path}.import.tmp", 'wb')
+            hashing = HashingWriter(raw)
+            staged.append((f"{path}.import.tmp", path, file_type, hashing))
+            return raw, hashing
+        
+        try:
+            for file_type, records in iter_bundle(import_path, self.IMPORT_BATCH_SIZE):
+                imported.add(file_type)
+                if file_type in DOCUMENT_TYPES:
+                    documents.setdefault(file_type, {}).update(records)
+                    continue
+                
+                codec = self.codec_for(file_type)
+                if not outputs:
+                    if self.is_sharded(file_type):
+                        os.makedirs(self._shard_collection_dir(file_type), exist_ok=True)
+                        paths = [self._shard_path(file_type, shard)
+                                 for shard in range(self.storage_config['shard_count'])]
+                    else:
+                        paths = [self.file_paths[file_type]]
+                    for path in paths:
+                        outputs[path] = [*stage(file_type, path), 0]
+                        codec.begin(outputs[path][1])
+                
+                for record in records:
+                    key = self.record_key(file_type, record)
+                    if file_type in self.JOURNALED_TYPES:
+                        record_sums.setdefault(file_type, {})[key] = record_checksum(record)
+                    if self.is_sharded(file_type):
+                        path = self._shard_path(file_type, self.shard_for_key(key))
+                    else:
+                        path = self.file_paths[file_type]
+                    output = outputs[path]
+                    codec.write_record(output[1], record, output[2] == 0)
+                    output[2] += 1
+                
+                if not records:
+                    # End of the section
+                    for raw, hashing, count in outputs.values():
+                        codec.end(hashing, count)
+                        raw.close()
+                    outputs = {}
+            
+            for file_type, data in documents.items():
+                if file_type == 'config':
+                    continue
+                raw, hashing = stage(file_type, self.file_paths[file_type])
+                with raw:
+                    self.codec_for(file_type).dump(data, hashing)
+            
+            for temp_path, path, _, _ in staged:
+                if self.storage_config['fsync_policy'] != 'never':
+                    with open(temp_path, 'rb+') as staged_file:
+                        os.fsync(staged_file.fileno())
+                os.replace(temp_path, path)
+                self._schedule_sync(path, content_synced=True)
+        
+        except BaseException:
+            for raw, _, _ in outputs.values():
+                raw.close()
+            for temp_path, _, _, _ in staged:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            raise
+        
+        for file_type in imported - {'config'}:
+            self.unreadable_types.discard(file_type)
+            manifest = self._checksum_manifest(file_type)
+            manifest.files = {}
+            for _, path, staged_type, hashing in staged:
+                if staged_type == file_type:
+                    manifest.set_file(os.path.relpath(path, self.data_dir), hashing.checksum())
+            if file_type in self.JOURNALED_TYPES:
+                manifest.records, manifest.complete = record_sums.get(file_type, {}), True
+            manifest.save()
+            self._checksum_manifests.pop(file_type, None)
+            
+            self._bump_generation(file_type)
+            if file_type in self.journal_pending:
+                self._discard_journal_entries(file_type)
+        
+        if 'config' in documents:
+            self._import_config(documents['config'])
+    
+    def _import_config(self, config_data: Dict[str, Any]):
+        """
+        Save an imported config, keeping this installation's storage settings.
+        
+        Args:
+            config_data (dict): Config from the import file
+        """
+        local_config = self.load_data('config')
+        if 'storage' in local_config:
+            config_data = dict(config_data, storage=local_config['storage'])
+        self.unreadable_types.discard('config')
+        self.save_data('config', config_data)
+    
+    def _import_document(self, import_path: str) -> bool:
+        """
+        Import a file written by the previous single-document export.
+        
+        Args:
+            import_path (str): Path to import file
+            
+        Returns:
+            bool: True if import successful, False otherwise
+        """
+        with open(import_path, 'r', encoding='utf-8') as file:
+            import_data = json.load(file)
+        
+        if 'data' not in import_data:
+            print("Invalid import file format")
+            return False
+        
+        # Create backup before import
+        self.backup_data()
+        
+        # Import data
+        for file_type, data in import_data['data'].items():
+            if file_type == 'config':
+                self._import_config(data)
+            elif file_type in self.file_paths:
+                self.unreadable_types.discard(file_type)
+                self.save_data(file_type, data)
+        
+        print(f"Data imported from {import_path}")
+        return True
+
+
+def read_storage_backend(data_directory: str = "data") -> str:
+    """
+    Get the storage backend configured in config.json.
+    
+    Args:
+        data_directory (str): Directory holding config.json
+        
+    Returns:
+        str: 'json' or 'sqlite'
+    """
+    config_path = os.path.join(data_directory, 'config.json')
+    try:
+        if os.path.exists(config_path):
+            with open(config_path, 'r', encoding='utf-8') as file:
+                return json.load(file).get('storage', {}).get(
+                    'backend', FileManager.DEFAULT_STORAGE_CONFIG['backend'])
+    except Exception as e:
+        print(f"Error reading storage backend: {e}")
+    return FileManager.DEFAULT_STORAGE_CONFIG['backend']
+
+
+def create_file_manager(data_directory: str = "data", backend: str = None) -> FileManager:
+    """
+    Create the FileManager for the configured storage backend.
+    
+    Args:
+        data_directory (str): Directory to store data files
+        backend (str): Override the backend from config.json ('json' or 'sqlite')
+        
+    Returns:
+        FileManager: JSON FileManager or SQLiteFileManager
+    """
+    backend = backend or read_storage_backend(data_directory)
+    if backend == 'sqlite':
+        from utils.sqlite_backend import SQLiteFileManager
+        return SQLiteFileManager(data_directory)
+    return FileManager(data_directory)
+
+
+def migrate_backend(target_backend: str, data_directory: str = "data") -> bool:
+    """
+    Copy every collection into another storage backend and switch config.json to it.
+    
+    Args:
+        target_backend (str): 'json' or 'sqlite'
+        data_directory (str): Directory holding the data
+        
+    Returns:
+        bool: True if migration successful, False otherwise
+    """
+    if target_backend not in ('json', 'sqlite'):
+        print(f"Unknown storage backend: {target_backend}")
+        return False
+    
+    source = create_file_manager(data_directory)
+    source_backend = source.storage_config['backend']
+    collections = {file_type: source.load_data(file_type)
+                   for file_type in source.file_paths if file_type != 'config'}
+    
+    target = create_file_manager(data_directory, target_backend)
+    for file_type, data in collections.items():
+        if not target.save_data(file_type, data):
+            print(f"Error migrating {file_type} to {target_backend} backend")
+            return False
+    
+    if not target.update_storage_config(backend=target_backend):
+        return False
+    
+    print(f"Migrated storage backend from {source_backend} to {target_backend}")
+    return True
@@ -0,0 +1,772 @@
+"""
+Admin log store for the Portal System
+Append-only log of admin actions and account changes, rotated into compressed segments
+"""
+
+import gzip
+import heapq
+import itertools
+import json
+import os
+import threading
+import zlib
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Callable, Iterable, Iterator, Optional, Sequence, Tuple
+
+from utils.file_lock import FileLock
+
+# Entry kinds, one per list admin records carried before schema version 3
+ENTRY_KINDS = ('action', 'created_user', 'deleted_user')
+
+# Admin record field -> (entry kind, field holding the entry's time), for importing those lists
+LEGACY_FIELDS = {
+    'system_logs': ('action', 'timestamp'),
+    'created_users': ('created_user', 'created_date'),
+    'deleted_users': ('deleted_user', 'deleted_at')
+}
+
+# Time format used in segment file names
+SEGMENT_TIME_FORMAT = "%Y%m%d_%H%M%S_%f"
+
+
+class LogIndex:
+    """
+    Index of a run of entries sorted by time.
+    
+    Holds the entry timestamps, bisected for time ranges and day buckets,
+    and posting lists (sorted entry positions) per kind, admin and action.
+    Segments keep theirs in logs/index/, so queries read a small JSON file
+    instead of decompressing the segment.
+    """
+    
+    FIELDS = ('kind', 'admin_id', 'action')
+    
+    def __init__(self, timestamps: List[str] = None, postings: Dict[str, Dict[str, List[int]]] = None):
+        """
+        Initialize LogIndex.
+        
+        Args:
+            timestamps (list): ISO timestamp of each entry, in order
+            postings (dict): Field -> value -> positions of the entries with that value
+        """
+        self.timestamps = timestamps or []
+        self.postings = postings or {field: {} for field in self.FIELDS}
+    
+    @classmethod
+    def build(cls, entries: Iterable[Dict[str, Any]]) -> 'LogIndex':
+        """Index entries already sorted by time."""
+        index = cls()
+        for entry in entries:
+            index.add(entry)
+        return index
+    
+    def add(self, entry: Dict[str, Any]):
+        """Index the entry following the last one indexed."""
+        position = len(self.timestamps)
+        self.timestamps.append(entry.get('timestamp') or '')
+        record = entry.get('record')
+        values = {
+            'kind': entry.get('kind'),
+            'admin_id': entry.get('admin_id'),
+            'action': record.get('action') if isinstance(record, dict) and entry.get('kind') == 'action' else None
+        }
+        for field, value in values.items():
+            if value is not None:
+                self.postings[field].setdefault(str(value), []).append(position)
+    
+    def positions(self, filters: Dict[str, Optional[str]], since: str = None, until: str = None,
+                  through: str = None) -> Sequence[int]:
+        """
+        Find the entries matching every filter within a time range.
+        
+        Args:
+            filters (dict): 'kind' / 'admin_id' (exact) and 'action' (substring) -> value or None
+            since (str): Only entries at or after this ISO time
+            until (str): Only entries before this ISO time
+            through (str): Only entries at or before this ISO time
+        
+        Returns:
+            Sorted positions of the matching entries
+        """
+        low = bisect_left(self.timestamps, since) if since else 0
+        high = len(self.timestamps)
+        if until:
+            high = min(high, bisect_left(self.timestamps, until))
+        if through is not None:
+            high = min(high, bisect_right(self.timestamps, through))
+        
+        lists = []
+        for field, value in filters.items():
+            if value is None:
+                continue
+            if field == 'action':
+                matching = [positions for action, positions in self.postings['action'].items() if value in action]
+                lists.append(matching[0] if len(matching) == 1 else sorted(itertools.chain(*matching)))
+            else:
+                lists.append(self.postings[field].get(value, []))
+        if not lists:
+            return range(low, max(low, high))
+        
+        # Walk the shortest list; look positions up in the others by bisection
+        lists.sort(key=len)
+        shortest = lists[0]
+        candidates = shortest[bisect_left(shortest, low):bisect_left(shortest, high)]
+        for other in lists[1:]:
+            candidates = [position for position in candidates if _contains(other, position)]
+        return candidates
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {'version': 1, 'timestamps': self.timestamps, 'postings': self.postings}
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'LogIndex':
+        return cls(data['timestamps'], data['postings'])
+
+
+class LogStore:
+    """
+    Append-only log shared by every admin.
+    
+    Each entry is one JSON line {"kind", "admin_id", "timestamp", "record"}
+    appended to logs/current.jsonl, so logging costs the same however long
+    the log is. Once that file reaches max_bytes, or its first entry is
+    older than max_age_hours, it is compressed into an immutable segment
+    logs/{first}-{last}-{crc}.jsonl.gz named after the time range it covers.
+    Without a directory entries are only kept in memory.
+    """
+    
+    CURRENT_FILE = 'current.jsonl'
+    ROTATING_FILE = 'rotating.jsonl'  # current.jsonl while it is being compressed
+    SEGMENT_SUFFIX = '.jsonl.gz'
+    
+    # Segment indexes and decompressed segments kept in memory by queries
+    INDEX_CACHE_SIZE = 64
+    LINE_CACHE_SIZE = 4
+    
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = 1048576,
+                 max_age_hours: float = 24, fsync: bool = False):
+        """
+        Initialize LogStore.
+        
+        Args:
+            directory (str): Log directory, or None to keep entries in memory
+            max_bytes (int): Rotate the current file once it is this large (0 = never)
+            max_age_hours (float): Rotate the current file once its first entry is
+                this old (0 = never)
+            fsync (bool): Sync the current file after every append
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = timedelta(hours=max_age_hours) if max_age_hours else None
+        self.fsync = fsync
+        self._memory = []  # Entries of a store without a directory
+        self._memory_imported = set()  # Usernames whose legacy lists a store without a directory holds
+        self._index_cache = OrderedDict()  # Segment path -> LogIndex
+        self._line_cache = OrderedDict()  # Segment path -> lines
+        self._counts = {}  # Segment name -> entry counts per "kind|admin_id" (index/counts.json)
+        self._range_cache = {}  # Segment path -> (first, last) ISO times
+        self._live = None  # (identity, bytes read, entries, LogIndex) of current.jsonl
+        
+        if directory is None:
+            self.lock = threading.RLock()
+        else:
+            self.current_path = os.path.join(directory, self.CURRENT_FILE)
+            self.rotating_path = os.path.join(directory, self.ROTATING_FILE)
+            self.imported_path = os.path.join(directory, 'imported.json')
+            self.index_dir = os.path.join(directory, 'index')
+            self.lock = FileLock(os.path.join(directory, '.lock'))
+    
+    def append(self, kind: str, admin_id: str, record: Dict[str, Any],
+               timestamp: datetime = None) -> Optional[Dict[str, Any]]:
+        """
+        Append one entry.
+        
+        Args:
+            kind (str): One of ENTRY_KINDS
+            admin_id (str): Admin the entry belongs to
+            record (dict): Entry data
+            timestamp (datetime): Entry time (defaults to now)
+        
+        Returns:
+            dict: The entry written, or None if it could not be written
+        """
+        entry = {
+            'kind': kind,
+            'admin_id': admin_id,
+            'timestamp': (timestamp or datetime.now()).isoformat(),
+            'record': record
+        }
+        if self.directory is None:
+            with self.lock:
+                self._memory.append(entry)
+            return entry
+        
+        line = json.dumps(entry, ensure_ascii=False, default=str) + '\n'
+        try:
+            with self.lock:
+                os.makedirs(self.directory, exist_ok=True)
+                self._rotate_if_due()
+                with open(self.current_path, 'a+b') as file:
+                    if file.seek(0, os.SEEK_END) > 0:
+                        file.seek(-1, os.SEEK_END)
+                        if file.read(1) != b'\n':
+                            line = '\n' + line  # Leave a line torn by a crash on its own
+                    file.write(line.encode('utf-8'))
+                    if self.fsync:
+                        file.flush()
+                        os.fsync(file.fileno())
+            return entry
+        except OSError as e:
+            print(f"Error writing admin log: {e}")
+            return None
+    
+    def iter_entries(self, kind: str = None, admin_id: str = None) -> Iterator[Dict[str, Any]]:
+        """
+        Read entries, segment by segment.
+        
+        Args:
+            kind (str): Only entries of this kind
+            admin_id (str): Only entries of this admin
+        
+        Yields:
+            dict: Entries in the order they were written
+        """
+        if self.directory is None:
+            with self.lock:
+                entries = list(self._memory)
+        else:
+            entries = self._read_all()
+        
+        for entry in entries:
+            if (kind is None or entry.get('kind') == kind) and (
+                    admin_id is None or entry.get('admin_id') == admin_id):
+                yield entry
+    
+    def query(self, kind: str = None, admin_id: str = None, action: str = None, day: str = None,
+              since: str = None, until: str = None, limit: int = 20,
+              cursor: str = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Find entries, newest first, one page at a time.
+        
+        Only the indexes of segments whose time range can still hold entries
+        for the page are read, and only the segments holding entries of the
+        page are decompressed.
+        
+        Args:
+            kind (str): Only entries of this kind
+            admin_id (str): Only entries of this admin
+            action (str): Only actions whose name contains this text
+            day (str): Only entries of this day (YYYY-MM-DD)
+            since (str): Only entries at or after this ISO time
+            until (str): Only entries before this ISO time
+            limit (int): Entries per page
+            cursor (str): Cursor returned with the previous page
+        
+        Returns:
+            tuple: (entries, cursor of the next page or None after the last page)
+        
+        Raises:
+            ValueError: If day or cursor is malformed
+        """
+        if day:
+            start = datetime.strptime(day, '%Y-%m-%d')
+            since = max(since or '', start.date().isoformat())
+            next_day = (start + timedelta(days=1)).date().isoformat()
+            until = min(until, next_day) if until else next_day
+        
+        through, skip = None, 0
+        if cursor:
+            through, separator, skipped = cursor.rpartition('|')
+            if not separator or not skipped.isdigit():
+                raise ValueError(f"Invalid log cursor: {cursor}")
+            skip = int(skipped)
+        
+        filters = {'kind': kind, 'admin_id': admin_id, 'action': action}
+        sources = [source for source in self._sources()
+                   if (not since or source.last >= since) and (not until or source.first < until)
+                   and (through is None or source.first <= through)]
+        
+        page = []
+        remaining_skip = skip
+        for timestamp, source, position in self._newest_first(
+                sources, lambda index: index.positions(filters, since, until, through)):
+            if timestamp == through and remaining_skip:
+                remaining_skip -= 1  # Returned with the previous page
+                continue
+            page.append((timestamp, source, position))
+            if len(page) > limit:
+                break
+        
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            last = page[-1][0]
+            same = sum(1 for timestamp, _, _ in page if timestamp == last)
+            next_cursor = f"{last}|{same + (skip if last == through else 0)}"
+        return [source.entry(position) for _, source, position in page], next_cursor
+    
+    def count(self, kind: str = None, admin_id: str = None) -> int:
+        """Count the entries matching iter_entries' filters, from the per-segment counts."""
+        total = 0
+        for source in self._sources():
+            if source.path is None:
+                total += len(source.index().positions({'kind': kind, 'admin_id': admin_id}))
+                continue
+            for key, number in self._segment_counts(source.path).items():
+                entry_kind, entry_admin = key.split('|', 1)
+                if (kind is None or entry_kind == kind) and (admin_id is None or entry_admin == admin_id):
+                    total += number
+        return total
+    
+    def segments(self) -> List[str]:
+        """Get the paths of the compressed segments, oldest first."""
+        if self.directory is None or not os.path.isdir(self.directory):
+            return []
+        return [os.path.join(self.directory, name) for name in sorted(os.listdir(self.directory))
+                if name.endswith(self.SEGMENT_SUFFIX)]
+    
+    def rotate(self) -> bool:
+        """
+        Compress the current file into a segment now.
+        
+        Returns:
+            bool: True if a segment was written
+        """
+        if self.directory is None:
+            return False
+        with self.lock:
+            if not os.path.exists(self.current_path) or os.path.getsize(self.current_path) == 0:
+                return False
+            os.replace(self.current_path, self.rotating_path)
+            self._finish_rotation()
+            return True
+    
+    def import_legacy(self, username: str, admin_id: str, lists: Dict[str, List[Dict[str, Any]]]) -> bool:
+        """
+        Move the log lists an admin record carried before schema version 3 into the store.
+        
+        The entries become one segment of their own; each admin is imported
+        once, however often its old record is read.
+        
+        Args:
+            username (str): Admin username
+            admin_id (str): Admin identifier
+            lists (dict): Record field (see LEGACY_FIELDS) -> list from the record
+        
+        Returns:
+            bool: True if the admin's entries are in the store (imported now or
+                before), False if they could not be written
+        """
+        entries = []
+        for field, (kind, time_field) in LEGACY_FIELDS.items():
+            for record in lists.get(field) or []:
+                entries.append({'kind': kind, 'admin_id': admin_id,
+                                'timestamp': record.get(time_field) or '', 'record': record})
+        if not entries:
+            return True
+        entries.sort(key=lambda entry: entry['timestamp'])
+        
+        if self.directory is None:
+            with self.lock:
+                if username in self._memory_imported:
+                    return True
+                self._memory.extend(entries)
+                self._memory_imported.add(username)
+            return True
+        
+        try:
+            with self.lock:
+                imported = self._load_imported()
+                if username in imported:
+                    return True
+                os.makedirs(self.directory, exist_ok=True)
+                self._write_segment(entries)
+                imported.append(username)
+                temp_path = f"{self.imported_path}.tmp"
+                with open(temp_path, 'w', encoding='utf-8') as file:
+                    json.dump(imported, file)
+                os.replace(temp_path, self.imported_path)
+            return True
+        except OSError as e:
+            print(f"Error importing logs of {username}: {e}")
+            return False
+    
+    def _rotate_if_due(self):
+        """Rotate the current file if it is too large or too old (lock held)."""
+        if os.path.exists(self.rotating_path):
+            self._finish_rotation()  # A previous rotation was interrupted
+        
+        try:
+            size = os.path.getsize(self.current_path)
+        except FileNotFoundError:
+            return
+        if size == 0:
+            return
+        
+        due = bool(self.max_bytes) and size >= self.max_bytes
+        if not due and self.max_age is not None:
+            with open(self.current_path, 'r', encoding='utf-8') as file:
+                first = self._parse(file.readline())
+            started = self._parse_time(first.get('timestamp')) if first else None
+            due = started is not None and datetime.now() - started >= self.max_age
+        
+        if due:
+            os.replace(self.current_path, self.rotating_path)
+            self._finish_rotation()
+    
+    def _finish_rotation(self):
+        """Compress rotating.jsonl into a segment and remove it (lock held)."""
+        with open(self.rotating_path, 'r', encoding='utf-8') as file:
+            entries = [entry for entry in map(self._parse, file) if entry is not None]
+        self._write_segment(entries)
+        os.remove(self.rotating_path)
+    
+    def _write_segment(self, entries: List[Dict[str, Any]]) -> Optional[str]:
+        """
+        Write entries into a new compressed segment and its index (lock held).
+        
+        Entries are stored sorted by time, so indexes can bisect them. The
+        name depends only on the content, so repeating an interrupted
+        rotation or import reuses the segment instead of duplicating it.
+        """
+        if not entries:
+            return None
+        entries = sorted(entries, key=lambda entry: entry.get('timestamp') or '')
+        
+        temp_path = os.path.join(self.directory, f"segment.{os.getpid()}.tmp")
+        crc = 0
+        with gzip.open(temp_path, 'wt', encoding='utf-8') as segment:
+            for entry in entries:
+                line = json.dumps(entry, ensure_ascii=False, default=str) + '\n'
+                segment.write(line)
+                crc = zlib.crc32(line.encode('utf-8'), crc)
+        
+        name = f"{self._segment_time(entries[0])}-{self._segment_time(entries[-1])}-{crc:08x}{self.SEGMENT_SUFFIX}"
+        path = os.path.join(self.directory, name)
+        if os.path.exists(path):
+            os.remove(temp_path)
+        else:
+            os.replace(temp_path, path)
+        self._save_index(path, LogIndex.build(entries))
+        self._save_counts(path, entries)
+        return path
+    
+    def _sources(self) -> List['_Source']:
+        """Get every run of entries queries read: the segments, then the live file."""
+        if self.directory is None:
+            with self.lock:
+                entries = sorted(self._memory, key=lambda entry: entry.get('timestamp') or '')
+            return [_Source.of_entries(entries, LogIndex.build(entries))] if entries else []
+        
+        with self.lock:
+            # Open the uncompressed files under the lock; they stay readable if rotated meanwhile
+            segments = self.segments()
+            rotating = self._open(self.rotating_path)
+            current = self._open(self.current_path)
+        
+        sources = []
+        for path in segments:
+            first, last = self._segment_range(path)
+            sources.append(_Source(first, last, lambda path=path: self._segment_index(path),
+                                   lambda position, path=path: self._parse(self._segment_lines(path)[position]),
+                                   path))
+        
+        try:
+            live_entries, live_index = self._read_live(current)
+            if rotating is not None:  # Left behind by an interrupted rotation
+                live_entries = sorted([entry for entry in map(self._parse, rotating) if entry is not None]
+                                      + live_entries, key=lambda entry: entry.get('timestamp') or '')
+                live_index = LogIndex.build(live_entries)
+        finally:
+            for file in (rotating, current):
+                if file is not None:
+                    file.close()
+        if live_entries:
+            sources.append(_Source.of_entries(live_entries, live_index))
+        return sources
+    
+    def _read_live(self, file) -> Tuple[List[Dict[str, Any]], LogIndex]:
+        """
+        Get the entries of current.jsonl sorted by time, with their index.
+        
+        Only lines appended since the last query are read; the file is
+        identified by its inode and first line, since rotation replaces it.
+        """
+        if file is None:
+            self._live = None
+            return [], LogIndex()
+        
+        first_line = file.readline()
+        identity = (os.fstat(file.fileno()).st_ino, first_line)
+        if self._live is not None and self._live[0] == identity:
+            _, offset, entries, index = self._live
+        else:
+            offset, entries, index = 0, [], LogIndex()
+        
+        file.seek(offset)
+        added = []
+        for line in iter(file.readline, b''):
+            if not line.endswith(b'\n'):
+                break  # Being appended right now; read it next time
+            offset += len(line)
+            entry = self._parse(line.decode('utf-8', errors='replace'))
+            if entry is not None:
+                added.append(entry)
+        
+        if added:
+            in_order = all((before.get('timestamp') or '') <= (after.get('timestamp') or '')
+                           for before, after in zip(entries[-1:] + added, added))
+            entries.extend(added)
+            if in_order:
+                for entry in added:
+                    index.add(entry)
+            else:
+                # Appended out of order by another process's clock; re-sort
+                entries.sort(key=lambda entry: entry.get('timestamp') or '')
+                index = LogIndex.build(entries)
+        self._live = (identity, offset, entries, index)
+        return entries, index
+    
+    def _segment_index(self, path: str) -> LogIndex:
+        """Load a segment's index, building it if it is missing."""
+        index = self._cache_get(self._index_cache, path)
+        if index is not None:
+            return index
+        
+        try:
+            with open(self._index_path(path), 'r', encoding='utf-8') as file:
+                index = LogIndex.from_dict(json.load(file))
+        except (OSError, ValueError, KeyError):
+            index = LogIndex.build(self._parse(line) or {} for line in self._segment_lines(path))
+            self._save_index(path, index)
+        self._cache_put(self._index_cache, path, index, self.INDEX_CACHE_SIZE)
+        return index
+    
+    def _segment_lines(self, path: str) -> List[str]:
+        """Decompress a segment; lines are only decoded as entries are returned."""
+        lines = self._cache_get(self._line_cache, path)
+        if lines is None:
+            with gzip.open(path, 'rt', encoding='utf-8') as segment:
+                lines = [line for line in segment if line.strip()]
+            self._cache_put(self._line_cache, path, lines, self.LINE_CACHE_SIZE)
+        return lines
+    
+    def _segment_counts(self, path: str) -> Dict[str, int]:
+        """Get a segment's entry counts per "kind|admin_id", counting it if needed."""
+        name = os.path.basename(path)
+        if name not in self._counts:
+            self._counts = self._load_counts()
+        if name not in self._counts:
+            with self.lock:
+                self._save_counts(path, [self._parse(line) or {} for line in self._segment_lines(path)])
+        return self._counts.get(name, {})
+    
+    def _save_counts(self, path: str, entries: List[Dict[str, Any]]):
+        """Add a segment to index/counts.json (lock held; best effort, it can be recounted)."""
+        counts = {}
+        for entry in entries:
+            key = f"{entry.get('kind')}|{entry.get('admin_id')}"
+            counts[key] = counts.get(key, 0) + 1
+        
+        self._counts = self._load_counts()
+        self._counts[os.path.basename(path)] = counts
+        try:
+            os.makedirs(self.index_dir, exist_ok=True)
+            counts_path = os.path.join(self.index_dir, 'counts.json')
+            temp_path = f"{counts_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump(self._counts, file, separators=(',', ':'))
+            os.replace(temp_path, counts_path)
+        except OSError as e:
+            print(f"Error writing admin log index: {e}")
+    
+    def _load_counts(self) -> Dict[str, Dict[str, int]]:
+        try:
+            with open(os.path.join(self.index_dir, 'counts.json'), 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_index(self, path: str, index: LogIndex):
+        """Store a segment's index next to the segments (best effort; it can be rebuilt)."""
+        try:
+            os.makedirs(self.index_dir, exist_ok=True)
+            index_path = self._index_path(path)
+            temp_path = f"{index_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump(index.to_dict(), file, separators=(',', ':'))
+            os.replace(temp_path, index_path)
+        except OSError as e:
+            print(f"Error writing admin log index: {e}")
+    
+    def _index_path(self, path: str) -> str:
+        return os.path.join(self.index_dir, os.path.basename(path)[:-len(self.SEGMENT_SUFFIX)] + '.json')
+    
+    @staticmethod
+    def _newest_first(sources: List['_Source'],
+                      positions_for: Callable[[LogIndex], Sequence[int]]) -> Iterator[tuple]:
+        """
+        Merge the matching entries of several sources, newest first.
+        
+        Sources are opened in order of their newest entry, and only once the
+        next entry to return could come from them.
+        
+        Yields:
+            tuple: (timestamp, source, position)
+        """
+        sources = sorted(sources, key=lambda source: source.last, reverse=True)
+        heap = []
+        opened = 0
+        while True:
+            while opened < len(sources) and (not heap or sources[opened].last >= heap[0].timestamp):
+                source = sources[opened]
+                index = source.index()
+                positions = positions_for(index)
+                if positions:
+                    heapq.heappush(heap, _Candidate(source, index, positions, opened))
+                opened += 1
+            if not heap:
+                return
+            
+            candidate = heap[0]
+            yield candidate.timestamp, candidate.source, candidate.positions[candidate.at]
+            if candidate.at == 0:
+                heapq.heappop(heap)
+            else:
+                candidate.at -= 1
+                candidate.timestamp = candidate.index.timestamps[candidate.positions[candidate.at]]
+                heapq.heapreplace(heap, candidate)
+    
+    @staticmethod
+    def _cache_get(cache: OrderedDict, key: str):
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+    
+    @staticmethod
+    def _cache_put(cache: OrderedDict, key: str, value: Any, size: int):
+        cache[key] = value
+        while len(cache) > size:
+            cache.popitem(last=False)
+    
+    @staticmethod
+    def _open(path: str):
+        try:
+            return open(path, 'rb')
+        except FileNotFoundError:
+            return None
+    
+    def _segment_range(self, path: str) -> Tuple[str, str]:
+        """Get the ISO times of a segment's first and last entries from its name."""
+        times = self._range_cache.get(path)
+        if times is None:
+            times = tuple(_iso_time(part) for part in os.path.basename(path).split('-')[:2])
+            self._range_cache[path] = times
+        return times
+    
+    def _read_all(self) -> List[Dict[str, Any]]:
+        """Read every entry: the segments, then any file being rotated, then the current file."""
+        with self.lock:
+            segments = self.segments()
+            open_files = []
+            for path in (self.rotating_path, self.current_path):
+                try:
+                    open_files.append(open(path, 'r', encoding='utf-8'))
+                except FileNotFoundError:
+                    continue
+        
+        entries = []
+        try:
+            for path in segments:
+                with gzip.open(path, 'rt', encoding='utf-8') as segment:
+                    entries.extend(entry for entry in map(self._parse, segment) if entry is not None)
+            for file in open_files:
+                entries.extend(entry for entry in map(self._parse, file) if entry is not None)
+        except (OSError, EOFError) as e:
+            print(f"Error reading admin log: {e}")
+        finally:
+            for file in open_files:
+                file.close()
+        return entries
+    
+    def _load_imported(self) -> List[str]:
+        """Get the usernames whose old record logs were imported."""
+        try:
+            with open(self.imported_path, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return []
+    
+    @staticmethod
+    def _parse(line: str) -> Optional[Dict[str, Any]]:
+        """Decode one log line, or None if it is blank or torn."""
+        if not line.strip():
+            return None
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            return None
+        return entry if isinstance(entry, dict) else None
+    
+    @staticmethod
+    def _parse_time(timestamp: Any) -> Optional[datetime]:
+        try:
+            return datetime.fromisoformat(timestamp)
+        except (TypeError, ValueError):
+            return None
+    
+    @classmethod
+    def _segment_time(cls, entry: Dict[str, Any]) -> str:
+        """Format an entry's time for a segment name (entries without one sort first)."""
+        timestamp = cls._parse_time(entry.get('timestamp'))
+        return timestamp.strftime(SEGMENT_TIME_FORMAT) if timestamp else '00010101_000000_000000'
+
+
+class _Source:
+    """A run of entries sorted by time that queries read: one segment, or the live file."""
+    
+    def __init__(self, first: str, last: str, load_index: Callable[[], LogIndex],
+                 load_entry: Callable[[int], Dict[str, Any]], path: str = None):
+        self.first = first
+        self.last = last
+        self.index = load_index
+        self.entry = load_entry
+        self.path = path  # Segment file (None for entries held in memory)
+    
+    @classmethod
+    def of_entries(cls, entries: List[Dict[str, Any]], index: LogIndex) -> '_Source':
+        return cls(index.timestamps[0], index.timestamps[-1], lambda: index, entries.__getitem__)
+
+
+class _Candidate:
+    """The next entry a source offers to LogStore._newest_first's heap."""
+    
+    __slots__ = ('source', 'index', 'positions', 'order', 'at', 'timestamp')
+    
+    def __init__(self, source: _Source, index: LogIndex, positions: Sequence[int], order: int):
+        self.source = source
+        self.index = index
+        self.positions = positions
+        self.order = order
+        self.at = len(positions) - 1  # Walk the source from its newest entry
+        self.timestamp = index.timestamps[positions[self.at]]
+    
+    def __lt__(self, other):
+        # heapq pops the smallest item; make that the newest entry
+        return (self.timestamp, -self.order) > (other.timestamp, -other.order)
+
+
+def _iso_time(segment_time: str) -> str:
+    """Turn a SEGMENT_TIME_FORMAT time into the ISO form entries use."""
+    iso = (f"{segment_time[0:4]}-{segment_time[4:6]}-{segment_time[6:8]}T"
+           f"{segment_time[9:11]}:{segment_time[11:13]}:{segment_time[13:15]}")
+    return iso if segment_time[16:] == '000000' else f"{iso}.{segment_time[16:]}"
+
+
+def _contains(positions: List[int], position: int) -> bool:
+    """Check membership in a sorted position list."""
+    at = bisect_left(positions, position)
+    return at < len(positions) and positions[at] == position
@@ -110,9 +110,18 @@ class MenuManager:
                 print("\nOperation cancelled.")
                 return None
     
+    def refresh_data(self):
+        """Pick up changes made by other sessions before a menu is redrawn."""
+        self.system_manager.refresh()
+        if self.current_user is not None:
+            # The logged-in user may have been replaced by a refreshed copy
+            self.current_user = self.system_manager.logged_in_users.get(
+                self.current_user.username, self.current_user)
+    
     def show_main_menu(self):
         """Display main login menu."""
         while True:
+            self.refresh_data()
             self.clear_screen()
             self.print_header("Portal System - Main Menu")
             print("1. Student Login")
@@ -227,6 +236,7 @@ class MenuManager:
     def show_student_menu(self):
         """Display student-specific menu."""
         while self.current_user and self.current_user.is_logged_in:
+            self.refresh_data()
             self.clear_screen()
             self.current_user.display_menu()
             
@@ -257,6 +267,7 @@ class MenuManager:
     def show_teacher_menu(self):
         """Display teacher-specific menu."""
         while self.current_user and self.current_user.is_logged_in:
+            self.refresh_data()
             self.clear_screen()
             self.current_user.display_menu()
             
@@ -283,6 +294,7 @@ class MenuManager:
     def show_admin_menu(self):
         """Display admin-specific menu."""
         while self.current_user and self.current_user.is_logged_in:
+            self.refresh_data()
             self.clear_screen()
             self.current_user.display_menu()
             
@@ -394,10 +406,7 @@ class MenuManager:
         self.print_header("Course Unenrollment")
         
         # Get enrolled courses from system manager for accurate data
-        enrolled_courses = []
-        for course_key, course in self.system_manager.courses.items():
-            if self.current_user.student_id in course.enrolled_students:
-                enrolled_courses.append(course)
+        enrolled_courses = self.system_manager.get_enrolled_sections(self.current_user.student_id)
         
         if not enrolled_courses:
             print("You are not enrolled in any courses.")
@@ -525,10 +534,7 @@ class MenuManager:
         self.print_header("Your Enrolled Courses")
         
         # Get enrolled courses from system manager for accurate section data
-        enrolled_courses = []
-        for course_key, course in self.system_manager.courses.items():
-            if self.current_user.student_id in course.enrolled_students:
-                enrolled_courses.append(course)
+        enrolled_courses = self.system_manager.get_enrolled_sections(self.current_user.student_id)
         
         if not enrolled_courses:
             print("You are not enrolled in any courses.")
@@ -807,6 +813,7 @@ class MenuManager:
                 print("❌ Contact removal cancelled.")
             elif confirm:
                 del self.current_user.contact_info[key_to_remove]
+                self.current_user.mark_dirty()
                 print(f"✅ Removed contact information: {key_to_remove.replace('_', ' ').title()}")
             else:
                 print("❌ Contact removal cancelled.")
@@ -985,7 +992,9 @@ class MenuManager:
         """Handle viewing system logs."""
         self.clear_screen()
         self.print_header("System Logs")
-        self.current_user.view_logs()
+        cursor = self.current_user.view_logs()
+        while cursor and self.get_yes_no_input("Show older logs? (y/n)"):
+            cursor = self.current_user.view_logs(cursor=cursor)
         input("\nPress Enter to continue...")
         
     def handle_admin_view_student_data(self):
@@ -999,11 +1008,9 @@ class MenuManager:
             return
             
         # Find student by username
-        student = None
-        for user in self.system_manager.users.values():
-            if user.__class__.__name__ == "Student" and user.username == username:
-                student = user
-                break
+        student = self.system_manager.users.get(username)
+        if student.__class__.__name__ != "Student":
+            student = None
         
         if not student:
             print(f"No student found with username '{username}'.")
@@ -1089,11 +1096,9 @@ class MenuManager:
             return
             
         # Find teacher by username
-        teacher = None
-        for user in self.system_manager.users.values():
-            if user.__class__.__name__ == "Teacher" and user.username == username:
-                teacher = user
-                break
+        teacher = self.system_manager.users.get(username)
+        if teacher.__class__.__name__ != "Teacher":
+            teacher = None
         
         if not teacher:
             print(f"No teacher found with username '{username}'.")
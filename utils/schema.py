@@ -0,0 +1,121 @@
+"""
+Record schema versions for the Portal System
+Registry of migrations that upgrade stored users and courses when they are read
+"""
+
+import copy
+from typing import Dict, Any, Callable
+
+# Layout version of the whole data set, stored as "version" in config.json
+DATA_VERSION = '3.0'
+
+# Current record layout per collection; stored records carry theirs as "_schema"
+SCHEMA_VERSIONS = {'users': 3, 'courses': 2}
+
+# (collection, version) -> function upgrading a record from that version to the next
+MIGRATIONS: Dict[tuple, Callable[[Dict[str, Any]], Dict[str, Any]]] = {}
+
+
+def migration(file_type: str, from_version: int):
+    """
+    Register a migration.
+    
+    The decorated function receives a copy of a record at from_version and
+    returns it in the layout of from_version + 1.
+    
+    Args:
+        file_type (str): 'users' or 'courses'
+        from_version (int): Schema version the function upgrades from
+    """
+    def register(function):
+        MIGRATIONS[(file_type, from_version)] = function
+        return function
+    return register
+
+
+def record_schema(record: Dict[str, Any]) -> int:
+    """Get the schema version of a stored record (records from before versioning are 1)."""
+    return record.get('_schema', 1)
+
+
+def upgrade_record(file_type: str, record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Bring a stored record up to the current schema.
+    
+    Only the returned copy is upgraded; the stored record keeps its layout
+    until the object built from it is next saved.
+    
+    Args:
+        file_type (str): Collection the record belongs to
+        record (dict): Record as stored
+    
+    Returns:
+        dict: The record itself if it is current, otherwise an upgraded copy
+    """
+    version = record_schema(record)
+    target = SCHEMA_VERSIONS.get(file_type, version)
+    if version >= target:
+        return record
+    
+    record = copy.deepcopy(record)
+    while version < target:
+        upgrade = MIGRATIONS.get((file_type, version))
+        if upgrade is None:
+            raise ValueError(f"No migration for {file_type} schema version {version}")
+        record = upgrade(record)
+        version += 1
+        record['_schema'] = version
+    return record
+
+
+def parse_data_version(version: Any) -> tuple:
+    """
+    Turn a config.json version ("1.0", "2.0", ...) into a comparable tuple.
+    
+    Args:
+        version: Version string (missing versions count as "1.0")
+    
+    Returns:
+        tuple: Numeric version parts
+    """
+    try:
+        return tuple(int(part) for part in str(version or '1.0').split('.'))
+    except ValueError:
+        return (1, 0)
+
+
+# Fields version 1 records could omit, with the defaults the models used to fill in
+USER_DEFAULTS = {
+    'student': {'enrolled_courses': [], 'academic_records': {}, 'cgpa_history': [], 'semester_data': {}},
+    'teacher': {'department': '', 'qualification': '', 'contact_info': {}, 'salary': 0.0,
+                'courses_taught': [], 'salary_slips': [], 'profile_updates': []},
+    'admin': {'access_level': 'full', 'system_logs': [], 'created_users': [], 'deleted_users': []}
+}
+COURSE_DEFAULTS = {'capacity': 30, 'section': 'A', 'enrolled_students': []}
+
+
+@migration('users', 1)
+def _users_explicit_fields(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Version 2 stores every field of the user's role, including empty ones."""
+    record.setdefault('first_login', False)
+    record.setdefault('last_login', None)
+    for field, value in USER_DEFAULTS.get((record.get('user_type') or '').lower(), {}).items():
+        record.setdefault(field, copy.deepcopy(value))
+    return record
+
+
+@migration('courses', 1)
+def _courses_explicit_section(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Version 2 stores the section (unsectioned courses were section A) and capacity."""
+    for field, value in COURSE_DEFAULTS.items():
+        if record.get(field) is None:
+            record[field] = copy.deepcopy(value)
+    return record
+
+
+@migration('users', 2)
+def _users_logs_in_store(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Version 3 keeps admin logs in the log store (utils.log_store) instead of the admin record."""
+    for field in ('system_logs', 'created_users', 'deleted_users'):
+        record.pop(field, None)
+    return record
@@ -0,0 +1,290 @@
+"""
+Serialization codecs for the Portal System
+Encode collections on disk as indented JSON, compact JSON, JSON Lines or binary records
+"""
+
+import io
+import json
+import marshal
+import os
+import struct
+import sys
+import textwrap
+from typing import Any, Iterable
+
+
+def iter_json_records(path: str, chunk_size: int = 65536) -> Iterable[tuple]:
+    """
+    Incrementally parse the elements of a JSON array file, or the lines of a JSON Lines file.
+    
+    Args:
+        path (str): File to read
+        chunk_size (int): Characters read at a time
+    
+    Yields:
+        tuple: (element, byte offset, byte length) for each top-level element
+    """
+    with open(path, 'rb') as file:
+        if not file.read(chunk_size).lstrip().startswith(b'['):
+            file.seek(0)
+            offset = 0
+            for line in file:
+                if line.strip():
+                    yield json.loads(line), offset, len(line)
+                offset += len(line)
+            return
+    
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8', newline='') as file:
+        buffer = file.read(chunk_size)
+        position = buffer.index('[') + 1
+        at_eof = False
+        
+        # Byte offset of buffer[counted], advanced incrementally to stay linear
+        counted, counted_bytes = 0, 0
+        
+        def byte_offset(index):
+            nonlocal counted, counted_bytes
+            counted_bytes += len(buffer[counted:index].encode('utf-8'))
+            counted = index
+            return counted_bytes
+        
+        def refill():
+            nonlocal buffer, position, counted, at_eof
+            byte_offset(position)
+            chunk = file.read(chunk_size)
+            at_eof = not chunk
+            buffer, position, counted = buffer[position:] + chunk, 0, 0
+        
+        while True:
+            # Skip separators, reading more input when the buffer runs out
+            while True:
+                while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                    position += 1
+                if position < len(buffer) or at_eof:
+                    break
+                refill()
+            
+            if position >= len(buffer):
+                raise ValueError(f"Unterminated JSON array in {path}")
+            if buffer[position] == ']':
+                return
+            
+            try:
+                element, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if at_eof:
+                    raise
+                # The element continues past the buffer; keep it and read more
+                refill()
+                continue
+            
+            start = byte_offset(position)
+            yield element, start, byte_offset(end) - start
+            position = end
+
+
+class Codec:
+    """
+    On-disk format of a collection file.
+    
+    Codecs read and write binary file objects. list_only codecs can only
+    store a list of records (users, courses, salary_slips, system_logs).
+    """
+    
+    name = 'json'
+    extension = '.json'
+    list_only = False
+    plain_json = True  # The file is one JSON document (backups may copy it verbatim)
+    
+    def dump(self, data: Any, file):
+        """Write a collection to an open binary file."""
+        raise NotImplementedError
+    
+    def begin(self, file):
+        """Start writing a list collection record by record (see write_record)."""
+        pass
+    
+    def write_record(self, file, record: Any, first: bool):
+        """Append one record to a list collection started with begin()."""
+        raise NotImplementedError
+    
+    def end(self, file, count: int):
+        """Finish a list collection after count records were written."""
+        pass
+    
+    def load(self, file) -> Any:
+        """Read a whole collection from an open binary file."""
+        raise NotImplementedError
+    
+    def iter_records(self, path: str, chunk_size: int = 65536) -> Iterable[tuple]:
+        """Yield (record, byte offset, byte length) for each record in a file."""
+        return iter_json_records(path, chunk_size)
+    
+    def load_record(self, raw: bytes) -> Any:
+        """Decode one record read from the offset and length given by iter_records."""
+        return json.loads(raw)
+
+
+class JsonCodec(Codec):
+    """Indented JSON, the original human-readable format."""
+    
+    name = 'json'
+    indent = 2
+    separators = None
+    
+    def dump(self, data: Any, file):
+        text = io.TextIOWrapper(file, encoding='utf-8')
+        json.dump(data, text, indent=self.indent, separators=self.separators,
+                  ensure_ascii=False, default=str)
+        text.flush()
+        text.detach()
+    
+    def load(self, file) -> Any:
+        return json.load(file)
+    
+    def begin(self, file):
+        file.write(b'[')
+    
+    def write_record(self, file, record: Any, first: bool):
+        text = json.dumps(record, indent=self.indent, separators=self.separators,
+                          ensure_ascii=False, default=str)
+        if self.indent is None:
+            text = text if first else ',' + text
+        else:
+            # Same layout json.dump gives the element inside an indented array
+            text = ('\n' if first else ',\n') + textwrap.indent(text, ' ' * self.indent)
+        file.write(text.encode('utf-8'))
+    
+    def end(self, file, count: int):
+        file.write(b'\n]' if count and self.indent is not None else b']')
+
+
+class CompactJsonCodec(JsonCodec):
+    """JSON without indentation or whitespace."""
+    
+    name = 'compact'
+    indent = None
+    separators = (',', ':')
+
+
+class JsonLinesCodec(Codec):
+    """One compact JSON record per line."""
+    
+    name = 'jsonl'
+    extension = '.jsonl'
+    list_only = True
+    plain_json = False
+    
+    def dump(self, data: Any, file):
+        for record in data:
+            self.write_record(file, record, False)
+    
+    def write_record(self, file, record: Any, first: bool):
+        file.write((json.dumps(record, ensure_ascii=False, default=str) + '\n').encode('utf-8'))
+    
+    def load(self, file) -> Any:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+class BinaryCodec(Codec):
+    """
+    Length-prefixed marshal records behind a versioned header.
+    
+    Layout: MAGIC, a 4-byte big-endian header length, a JSON header
+    ({"schema", "format", "marshal_version", "python"}), then for each
+    record a 4-byte big-endian length followed by the marshalled record.
+    """
+    
+    name = 'binary'
+    extension = '.bin'
+    list_only = True
+    plain_json = False
+    
+    MAGIC = b'PSRB'
+    SCHEMA_VERSION = 1
+    LENGTH = struct.Struct('>I')
+    
+    def dump(self, data: Any, file):
+        self.begin(file)
+        for record in data:
+            self.write_record(file, record, False)
+    
+    def begin(self, file):
+        header = json.dumps({
+            'schema': self.SCHEMA_VERSION,
+            'format': 'marshal',
+            'marshal_version': marshal.version,
+            'python': f"{sys.version_info.major}.{sys.version_info.minor}"
+        }).encode('utf-8')
+        file.write(self.MAGIC + self.LENGTH.pack(len(header)) + header)
+    
+    def write_record(self, file, record: Any, first: bool):
+        try:
+            payload = marshal.dumps(record)
+        except ValueError:
+            # Values marshal can't store (e.g. datetimes) are stringified like default=str
+            payload = marshal.dumps(json.loads(json.dumps(record, default=str)))
+        file.write(self.LENGTH.pack(len(payload)) + payload)
+    
+    def load(self, file) -> Any:
+        self._read_header(file)
+        records = []
+        while True:
+            prefix = file.read(self.LENGTH.size)
+            if not prefix:
+                return records
+            records.append(marshal.loads(self._read_exact(file, self.LENGTH.unpack(prefix)[0])))
+    
+    def iter_records(self, path: str, chunk_size: int = 65536) -> Iterable[tuple]:
+        with open(path, 'rb') as file:
+            self._read_header(file)
+            while True:
+                prefix = file.read(self.LENGTH.size)
+                if not prefix:
+                    return
+                length = self.LENGTH.unpack(prefix)[0]
+                offset = file.tell()
+                yield marshal.loads(self._read_exact(file, length)), offset, length
+    
+    def load_record(self, raw: bytes) -> Any:
+        return marshal.loads(raw)
+    
+    def _read_header(self, file) -> dict:
+        """Read and validate the file header."""
+        if file.read(len(self.MAGIC)) != self.MAGIC:
+            raise ValueError("Not a binary portal data file")
+        header = json.loads(self._read_exact(file, self.LENGTH.unpack(self._read_exact(file, self.LENGTH.size))[0]))
+        if header.get('schema') != self.SCHEMA_VERSION:
+            raise ValueError(f"Unsupported binary schema version: {header.get('schema')}")
+        if header.get('marshal_version', 0) > marshal.version:
+            raise ValueError(f"File written by a newer Python ({header.get('python')})")
+        return header
+    
+    @staticmethod
+    def _read_exact(file, length: int) -> bytes:
+        """Read exactly length bytes or fail on a truncated file."""
+        data = file.read(length)
+        if len(data) != length:
+            raise ValueError("Truncated binary portal data file")
+        return data
+
+
+CODECS = {codec.name: codec for codec in (JsonCodec(), CompactJsonCodec(), JsonLinesCodec(), BinaryCodec())}
+
+
+def codec_for_path(path: str) -> Codec:
+    """
+    Get the codec of a data file from its extension.
+    
+    Args:
+        path (str): Data file path
+    
+    Returns:
+        Codec: Binary for .bin, JSON Lines for .jsonl, otherwise JSON
+    """
+    extension = os.path.splitext(path)[1]
+    for codec in (CODECS['binary'], CODECS['jsonl']):
+        if extension == codec.extension:
+            return codec
+    return CODECS['json']
@@ -0,0 +1,165 @@
+"""
+Memory-mapped record snapshots for the Portal System
+Packed records plus a sorted offset index, readable without parsing the whole file
+"""
+
+import json
+import mmap
+import os
+import struct
+from typing import Dict, List, Any, Iterable, Optional
+
+
+class Snapshot:
+    """
+    Read-only view of a snapshot file through mmap.
+    
+    Layout:
+        MAGIC (8 bytes), header struct (record count, index offset, meta length),
+        meta JSON, then per record its key, tag, secondary key and compact JSON
+        payload, then the index: one fixed-size entry per record, sorted by key.
+    
+    The tag is a short category (user type) and the secondary key an
+    alternate ID (student_id/teacher_id/admin_id), so type scans and ID
+    lookups only touch the index and a few bytes per record.
+    """
+    
+    MAGIC = b'PSNAP\x00\x00\x01'
+    HEADER = struct.Struct('>IQI')  # count, index offset, meta length
+    # key offset, key length, tag offset, tag length, secondary offset, secondary length,
+    # record offset, record length
+    ENTRY = struct.Struct('>QIQIQIQI')
+    
+    def __init__(self, path: str):
+        """
+        Open a snapshot file.
+        
+        Args:
+            path (str): Snapshot file
+        """
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        
+        if self._map[:len(self.MAGIC)] != self.MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a snapshot file")
+        start = len(self.MAGIC)
+        self.count, self._index_offset, meta_length = self.HEADER.unpack_from(self._map, start)
+        meta_start = start + self.HEADER.size
+        self.meta = json.loads(self._map[meta_start:meta_start + meta_length])
+    
+    @classmethod
+    def write(cls, path: str, records: Iterable[Dict[str, Any]], key_func, tag_func=None,
+              secondary_func=None, meta: Dict[str, Any] = None):
+        """
+        Write a snapshot file via a temporary file.
+        
+        Args:
+            path (str): Snapshot file to write
+            records (iterable): Records to store
+            key_func: Record -> unique key (str)
+            tag_func: Record -> category (str), optional
+            secondary_func: Record -> alternate ID (str), optional
+            meta (dict): Extra JSON metadata stored in the header
+        """
+        meta_bytes = json.dumps(meta or {}).encode('utf-8')
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        entries = []
+        
+        try:
+            with open(temp_path, 'wb') as file:
+                file.write(cls.MAGIC + cls.HEADER.pack(0, 0, len(meta_bytes)) + meta_bytes)
+                
+                for record in records:
+                    tag = (tag_func(record) if tag_func else None) or ''
+                    secondary = (secondary_func(record) if secondary_func else None) or ''
+                    fields = [str(key_func(record)).encode('utf-8'),
+                              str(tag).encode('utf-8'),
+                              str(secondary).encode('utf-8'),
+                              json.dumps(record, ensure_ascii=False, separators=(',', ':'),
+                                         default=str).encode('utf-8')]
+                    
+                    entry = []
+                    for field in fields:
+                        entry += [file.tell(), len(field)]
+                        file.write(field)
+                    entries.append((fields[0], entry))
+                
+                entries.sort(key=lambda item: item[0])
+                index_offset = file.tell()
+                for _, entry in entries:
+                    file.write(cls.ENTRY.pack(*entry))
+                
+                file.seek(len(cls.MAGIC))
+                file.write(cls.HEADER.pack(len(entries), index_offset, len(meta_bytes)))
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+    
+    def close(self):
+        """Unmap and close the file."""
+        self._map.close()
+        self._file.close()
+    
+    def key_at(self, position: int) -> str:
+        """Get the key of the index entry at a position (in key order)."""
+        entry = self._entry(position)
+        return self._map[entry[0]:entry[0] + entry[1]].decode('utf-8')
+    
+    def tag_at(self, position: int) -> str:
+        """Get the tag of the index entry at a position."""
+        entry = self._entry(position)
+        return self._map[entry[2]:entry[2] + entry[3]].decode('utf-8')
+    
+    def secondary_at(self, position: int) -> str:
+        """Get the secondary key of the index entry at a position."""
+        entry = self._entry(position)
+        return self._map[entry[4]:entry[4] + entry[5]].decode('utf-8')
+    
+    def record_at(self, position: int) -> Dict[str, Any]:
+        """Decode the record of the index entry at a position."""
+        entry = self._entry(position)
+        return json.loads(self._map[entry[6]:entry[6] + entry[7]])
+    
+    def find(self, key: str) -> Optional[int]:
+        """
+        Binary-search the index for a key.
+        
+        Args:
+            key (str): Record key
+        
+        Returns:
+            int: Index position, or None if the key is not in the snapshot
+        """
+        target = key.encode('utf-8')
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            entry = self._entry(middle)
+            if self._map[entry[0]:entry[0] + entry[1]] < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count and self.key_at(low) == key:
+            return low
+        return None
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get the record for a key, or None."""
+        position = self.find(key)
+        return self.record_at(position) if position is not None else None
+    
+    def keys(self) -> List[str]:
+        """Get all keys in key order."""
+        return [self.key_at(position) for position in range(self.count)]
+    
+    def _entry(self, position: int) -> tuple:
+        """Unpack one index entry."""
+        return self.ENTRY.unpack_from(self._map, self._index_offset + position * self.ENTRY.size)
@@ -0,0 +1,680 @@
+"""
+SQLite storage backend for the Portal System
+Drop-in replacement for FileManager that keeps collections in indexed tables
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, List, Any, Iterable
+
+from utils.backup_scheduler import BackupScheduler
+from utils.bundle import DOCUMENT_TYPES, iter_bundle
+from utils.checksums import file_checksum
+from utils.file_manager import FileManager
+from utils.schema import DATA_VERSION
+
+
+class SQLiteFileManager(FileManager):
+    """
+    FileManager-compatible backend storing data in a single SQLite database.
+    
+    Users and courses are split into tables so a single record can be
+    updated in place: nested academic records, salary slips, system logs
+    and course enrollments each get their own table. config.json stays a
+    plain JSON file because it selects the backend.
+    """
+    
+    RECORD_LEVEL_UPDATES = True
+    
+    # PRAGMA synchronous level for each fsync policy
+    SYNCHRONOUS_LEVELS = {'always': 'FULL', 'group': 'NORMAL', 'never': 'OFF'}
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS users (
+            username   TEXT PRIMARY KEY,
+            user_id    TEXT,
+            user_type  TEXT,
+            student_id TEXT,
+            teacher_id TEXT,
+            admin_id   TEXT,
+            position   INTEGER,
+            data       TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_users_user_id ON users(user_id);
+        CREATE INDEX IF NOT EXISTS idx_users_student_id ON users(student_id);
+        CREATE INDEX IF NOT EXISTS idx_users_teacher_id ON users(teacher_id);
+        CREATE INDEX IF NOT EXISTS idx_users_admin_id ON users(admin_id);
+        
+        CREATE TABLE IF NOT EXISTS courses (
+            course_id TEXT,
+            section   TEXT,
+            position  INTEGER,
+            data      TEXT NOT NULL,
+            PRIMARY KEY (course_id, section)
+        );
+        
+        CREATE TABLE IF NOT EXISTS enrollments (
+            course_id  TEXT,
+            section    TEXT,
+            student_id TEXT,
+            position   INTEGER,
+            PRIMARY KEY (course_id, section, student_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_enrollments_student_id ON enrollments(student_id);
+        
+        CREATE TABLE IF NOT EXISTS academic_records (
+            username TEXT,
+            semester TEXT,
+            position INTEGER,
+            data     TEXT NOT NULL,
+            PRIMARY KEY (username, semester)
+        );
+        
+        CREATE TABLE IF NOT EXISTS salary_slips (
+            username   TEXT,
+            slip_id    TEXT,
+            teacher_id TEXT,
+            position   INTEGER,
+            data       TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_salary_slips_username ON salary_slips(username);
+        CREATE INDEX IF NOT EXISTS idx_salary_slips_teacher_id ON salary_slips(teacher_id);
+        
+        CREATE TABLE IF NOT EXISTS system_logs (
+            username  TEXT,
+            log_id    TEXT,
+            admin_id  TEXT,
+            action    TEXT,
+            timestamp TEXT,
+            position  INTEGER,
+            data      TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_system_logs_username ON system_logs(username);
+        CREATE INDEX IF NOT EXISTS idx_system_logs_admin_id ON system_logs(admin_id);
+        CREATE INDEX IF NOT EXISTS idx_system_logs_timestamp ON system_logs(timestamp);
+        
+        CREATE TABLE IF NOT EXISTS documents (
+            file_type TEXT PRIMARY KEY,
+            data      TEXT NOT NULL
+        );
+    """
+    
+    def __init__(self, data_directory="data"):
+        """
+        Initialize SQLiteFileManager.
+        
+        Args:
+            data_directory (str): Directory holding the database and config.json
+        """
+        os.makedirs(data_directory, exist_ok=True)
+        self.db_path = os.path.join(data_directory, 'portal.db')
+        self._lock = threading.RLock()
+        self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(self.SCHEMA)
+        
+        super().__init__(data_directory)
+        
+        synchronous = self.SYNCHRONOUS_LEVELS.get(self.storage_config['fsync_policy'], 'NORMAL')
+        self.connection.execute(f"PRAGMA synchronous={synchronous}")
+        
+        # Every write is already a single-row transaction; a journal left
+        # behind by the JSON backend was replayed when data was migrated here
+        self.journal_enabled = False
+        self.journal_entries = 0
+        self.journal_pending = set()
+        self.journal_keys = {}
+    
+    def initialize_files(self):
+        """Create directories and config.json; tables are created with the schema."""
+        os.makedirs(self.data_dir, exist_ok=True)
+        os.makedirs(self.backup_dir, exist_ok=True)
+        
+        if not os.path.exists(self.file_paths['config']):
+            super().save_data('config', {
+                'version': DATA_VERSION,
+                'created': datetime.now().isoformat(),
+                'last_backup': None,
+                'storage': dict(self.DEFAULT_STORAGE_CONFIG, backend='sqlite')
+            })
+            print(f"Initialized {self.file_paths['config']}")
+    
+    def is_sharded(self, file_type: str) -> bool:
+        """The SQLite backend never uses shard files."""
+        return False
+    
+    def save_data(self, file_type: str, data: Any, changed_keys: Iterable[str] = None) -> bool:
+        """
+        Save a complete collection.
+        
+        Args:
+            file_type (str): Type of data ('users', 'courses', etc.)
+            data: Data to save
+            changed_keys (iterable): Keys of changed records; when given only those
+                rows are written, otherwise the collection is replaced
+        
+        Returns:
+            bool: True if save successful, False otherwise
+        """
+        if file_type == 'config':
+            return super().save_data(file_type, data)
+        
+        if file_type not in self.file_paths:
+            print(f"Unknown file type: {file_type}")
+            return False
+        
+        if file_type in self.unreadable_types:
+            print(f"Error: {file_type} could not be read, so it was not overwritten. "
+                  f"Run 'python storage_cli.py verify' or restore it from a backup.")
+            return False
+        
+        if changed_keys is not None and file_type in ('users', 'courses'):
+            changed_keys = set(changed_keys)
+            records = [record for record in data
+                       if self.record_key(file_type, record) in changed_keys]
+            present = {self.record_key(file_type, record) for record in records}
+            return self.save_records(file_type, records, changed_keys - present)
+        
+        try:
+            with self.data_lock, self._own_write():
+                with self._lock, self.connection:
+                    if file_type == 'users':
+                        self._delete_users(None)
+                        for position, record in enumerate(data):
+                            self._insert_user(record, position)
+                    elif file_type == 'courses':
+                        self._delete_courses(None)
+                        for position, record in enumerate(data):
+                            self._insert_course(record, position)
+                    else:
+                        self.connection.execute(
+                            "INSERT OR REPLACE INTO documents (file_type, data) VALUES (?, ?)",
+                            (file_type, self._dumps(data)))
+                self._bump_generation(file_type)
+            return True
+        
+        except Exception as e:
+            print(f"Error saving {file_type} data: {e}")
+            return False
+    
+    def save_records(self, file_type: str, records: List[Dict[str, Any]],
+                     deleted_keys: Iterable[str] = ()) -> bool:
+        """
+        Insert/replace individual records and delete others in one transaction.
+        
+        Args:
+            file_type (str): 'users' or 'courses'
+            records (list): Records to insert or replace
+            deleted_keys (iterable): Keys (see record_key) of records to delete
+        
+        Returns:
+            bool: True if save successful, False otherwise
+        """
+        try:
+            with self.data_lock, self._own_write():
+                with self._lock, self.connection:
+                    table = 'users' if file_type == 'users' else 'courses'
+                    next_position = self.connection.execute(
+                        f"SELECT COALESCE(MAX(position), -1) + 1 FROM {table}").fetchone()[0]
+                    
+                    for key in deleted_keys:
+                        self._delete_record(file_type, key)
+                    
+                    for record in records:
+                        key = self.record_key(file_type, record)
+                        position = self._record_position(file_type, key)
+                        if position is None:
+                            position = next_position
+                            next_position += 1
+                        self._delete_record(file_type, key)
+                        if file_type == 'users':
+                            self._insert_user(record, position)
+                        else:
+                            self._insert_course(record, position)
+                self._bump_generation(file_type)
+            return True
+        
+        except Exception as e:
+            print(f"Error saving {file_type} records: {e}")
+            return False
+    
+    def load_data(self, file_type: str) -> Any:
+        """
+        Load a complete collection.
+        
+        Args:
+            file_type (str): Type of data to load
+        
+        Returns:
+            Data from the database, or empty structure if none stored
+        """
+        if file_type == 'config':
+            return super().load_data(file_type)
+        
+        if file_type not in self.file_paths:
+            print(f"Unknown file type: {file_type}")
+            return None
+        
+        try:
+            with self._lock:
+                data = self._load_from_connection(self.connection, file_type)
+            self.unreadable_types.discard(file_type)
+            return data
+        except Exception as e:
+            print(f"Error loading {file_type} data: {e}")
+            # The empty result must never be saved over the stored rows
+            self.unreadable_types.add(file_type)
+            return [] if file_type != 'records' else {}
+    
+    def _watch_state(self, file_type: str) -> List[list]:
+        """
+        Get the state of the database and its write-ahead log (shared by all collections).
+        
+        The collection's write generation is included: the WAL can be
+        rewritten in place with the same size and, within one clock tick,
+        the same mtime.
+        """
+        state = [['generation', self._generation(file_type)]]
+        for path in (self.db_path, f"{self.db_path}-wal"):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            state.append([os.path.basename(path), stat.st_ino, stat.st_mtime_ns, stat.st_size])
+        return state
+    
+    def checkpoint(self, file_types: Iterable[str] = None) -> bool:
+        """Nothing to checkpoint; every save is already a committed transaction."""
+        return True
+    
+    def _stored_versions(self, file_type: str, keys: Iterable[str]) -> Dict[str, int]:
+        """Read the stored versions of records straight from the database."""
+        versions = {}
+        with self._lock:
+            for key in keys:
+                if file_type == 'users':
+                    row = self.connection.execute("SELECT data FROM users WHERE username = ?", (key,)).fetchone()
+                else:
+                    row = self.connection.execute(
+                        "SELECT data FROM courses WHERE course_id = ? AND section = ?",
+                        self._split_course_key(key)).fetchone()
+                if row is not None:
+                    versions[key] = json.loads(row[0]).get('_version', 0)
+        return versions
+    
+    def verify(self, file_types: Iterable[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Check config.json against its checksum and the database with SQLite's own page checks.
+        
+        Args:
+            file_types (iterable): Ignored; every collection lives in the one database
+        
+        Returns:
+            dict: File name -> result, as for FileManager.verify
+        """
+        results = super().verify(['config'])
+        with self._lock:
+            problems = [row[0] for row in self.connection.execute("PRAGMA quick_check").fetchall()
+                        if row[0] != 'ok']
+        results[os.path.basename(self.db_path)] = {
+            'collection': 'database',
+            'status': 'corrupt' if problems else 'ok',
+            'records': [],
+            'error': '; '.join(problems) or None
+        }
+        return results
+    
+    def _remember_versions(self, file_type: str, versions: Dict[str, int], deleted_keys: Iterable[str]):
+        """Nothing to cache; versions are always read from the database."""
+        pass
+    
+    def open_snapshot(self, file_type: str):
+        """Snapshots are built from JSON files; the database is queried directly instead."""
+        return None
+    
+    def snapshot_needs_refresh(self, file_type: str) -> bool:
+        """Snapshots are not used with the SQLite backend."""
+        return False
+    
+    def set_codec(self, file_type: str, codec_name: str) -> bool:
+        """Collections live in database tables, so file codecs do not apply."""
+        print("Serialization codecs only apply to the JSON storage backend")
+        return False
+    
+    def iter_record_locations(self, file_type: str) -> Iterable[tuple]:
+        """
+        Yield each record of a collection; rows are reassembled by load_data.
+        
+        Args:
+            file_type (str): Collection to read
+        
+        Yields:
+            tuple: (record, None); records are kept rather than re-read by location
+        """
+        for record in self.load_data(file_type):
+            yield record, None
+    
+    def _load_from_connection(self, connection: sqlite3.Connection, file_type: str) -> Any:
+        """
+        Reassemble a collection from the tables of a database connection.
+        
+        Args:
+            connection: Database to read (the live database or a backup)
+            file_type (str): Type of data to load
+        
+        Returns:
+            Collection data in the same shape FileManager stores in JSON
+        """
+        if file_type == 'users':
+            return self._load_users(connection)
+        if file_type == 'courses':
+            return self._load_courses(connection)
+        
+        row = connection.execute(
+            "SELECT data FROM documents WHERE file_type = ?", (file_type,)).fetchone()
+        if row is None:
+            return [] if file_type != 'records' else {}
+        return json.loads(row[0])
+    
+    def _load_users(self, connection: sqlite3.Connection) -> List[Dict[str, Any]]:
+        """Load users and attach their academic records, salary slips and logs."""
+        academic_records = {}
+        for username, semester, data in connection.execute(
+                "SELECT username, semester, data FROM academic_records ORDER BY username, position"):
+            academic_records.setdefault(username, {})[semester] = json.loads(data)
+        
+        salary_slips = {}
+        for username, data in connection.execute(
+                "SELECT username, data FROM salary_slips ORDER BY username, position"):
+            salary_slips.setdefault(username, []).append(json.loads(data))
+        
+        system_logs = {}
+        for username, data in connection.execute(
+                "SELECT username, data FROM system_logs ORDER BY username, position"):
+            system_logs.setdefault(username, []).append(json.loads(data))
+        
+        users = []
+        for username, user_type, data in connection.execute(
+                "SELECT username, user_type, data FROM users ORDER BY position"):
+            record = json.loads(data)
+            user_type = (user_type or '').lower()
+            if user_type == 'student':
+                record['academic_records'] = academic_records.get(username, {})
+            elif user_type == 'teacher':
+                record['salary_slips'] = salary_slips.get(username, [])
+            elif user_type == 'admin' and username in system_logs:
+                record['system_logs'] = system_logs[username]  # Records from before schema 3
+            users.append(record)
+        return users
+    
+    def _load_courses(self, connection: sqlite3.Connection) -> List[Dict[str, Any]]:
+        """Load courses and attach their enrollment lists."""
+        enrollments = {}
+        for course_id, section, student_id in connection.execute(
+                "SELECT course_id, section, student_id FROM enrollments "
+                "ORDER BY course_id, section, position"):
+            enrollments.setdefault((course_id, section), []).append(student_id)
+        
+        courses = []
+        for course_id, section, data in connection.execute(
+                "SELECT course_id, section, data FROM courses ORDER BY position"):
+            record = json.loads(data)
+            record['enrolled_students'] = enrollments.get((course_id, section), [])
+            courses.append(record)
+        return courses
+    
+    def _insert_user(self, record: Dict[str, Any], position: int):
+        """Insert a user row plus its rows in the nested-data tables."""
+        record = dict(record)
+        username = record['username']
+        user_type = record.get('user_type', '')
+        
+        for semester_position, (semester, semester_record) in enumerate(
+                record.pop('academic_records', {}).items()):
+            self.connection.execute(
+                "INSERT INTO academic_records (username, semester, position, data) VALUES (?, ?, ?, ?)",
+                (username, semester, semester_position, self._dumps(semester_record)))
+        
+        for slip_position, slip in enumerate(record.pop('salary_slips', [])):
+            self.connection.execute(
+                "INSERT INTO salary_slips (username, slip_id, teacher_id, position, data) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (username, slip.get('slip_id'), slip.get('teacher_id'), slip_position, self._dumps(slip)))
+        
+        for log_position, log in enumerate(record.pop('system_logs', [])):
+            self.connection.execute(
+                "INSERT INTO system_logs (username, log_id, admin_id, action, timestamp, position, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (username, log.get('log_id'), log.get('user_id'), log.get('action'),
+                 log.get('timestamp'), log_position, self._dumps(log)))
+        
+        self.connection.execute(
+            "INSERT INTO users (username, user_id, user_type, student_id, teacher_id, admin_id, position, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (username, record.get('user_id'), user_type, record.get('student_id'),
+             record.get('teacher_id'), record.get('admin_id'), position, self._dumps(record)))
+    
+    def _insert_course(self, record: Dict[str, Any], position: int):
+        """Insert a course row plus its enrollment rows."""
+        record = dict(record)
+        course_id = record['course_id']
+        section = record.get('section', 'A')
+        
+        for student_position, student_id in enumerate(record.pop('enrolled_students', [])):
+            self.connection.execute(
+                "INSERT OR IGNORE INTO enrollments (course_id, section, student_id, position) "
+                "VALUES (?, ?, ?, ?)",
+                (course_id, section, student_id, student_position))
+        
+        self.connection.execute(
+            "INSERT INTO courses (course_id, section, position, data) VALUES (?, ?, ?, ?)",
+            (course_id, section, position, self._dumps(record)))
+    
+    def _delete_users(self, username):
+        """Delete one user (or all users when username is None) with nested rows."""
+        for table in ('users', 'academic_records', 'salary_slips', 'system_logs'):
+            if username is None:
+                self.connection.execute(f"DELETE FROM {table}")
+            else:
+                self.connection.execute(f"DELETE FROM {table} WHERE username = ?", (username,))
+    
+    def _delete_courses(self, course_key):
+        """Delete one course (or all courses when course_key is None) with enrollments."""
+        for table in ('courses', 'enrollments'):
+            if course_key is None:
+                self.connection.execute(f"DELETE FROM {table}")
+            else:
+                self.connection.execute(
+                    f"DELETE FROM {table} WHERE course_id = ? AND section = ?", course_key)
+    
+    def _delete_record(self, file_type: str, key: str):
+        """Delete a user or course by its record key."""
+        if file_type == 'users':
+            self._delete_users(key)
+        else:
+            self._delete_courses(self._split_course_key(key))
+    
+    def _record_position(self, file_type: str, key: str):
+        """Get the stored position of a record, or None if it does not exist."""
+        if file_type == 'users':
+            row = self.connection.execute(
+                "SELECT position FROM users WHERE username = ?", (key,)).fetchone()
+        else:
+            row = self.connection.execute(
+                "SELECT position FROM courses WHERE course_id = ? AND section = ?",
+                self._split_course_key(key)).fetchone()
+        return row[0] if row else None
+    
+    @staticmethod
+    def _split_course_key(key: str):
+        """Split a "course_id-section" key into its parts."""
+        course_id, _, section = key.rpartition('-')
+        return course_id, section
+    
+    @staticmethod
+    def _dumps(data: Any) -> str:
+        """Serialize a value for a TEXT column."""
+        return json.dumps(data, ensure_ascii=False, default=str)
+    
+    def backup_data(self) -> bool:
+        """
+        Create an online backup of the whole database.
+        
+        Returns:
+            bool: True if backup successful, False otherwise
+        """
+        print("Creating system backup...")
+        try:
+            timestamp = BackupScheduler.new_timestamp()
+            backup_path = os.path.join(self.backup_dir, f"portal_{timestamp}.db")
+            
+            with self._lock:
+                backup_connection = sqlite3.connect(backup_path)
+                try:
+                    self.connection.backup(backup_connection)
+                finally:
+                    backup_connection.close()
+            checksum, size = file_checksum(backup_path)
+            self.backup_catalog.add('database', timestamp, 'database', os.path.basename(backup_path),
+                                    size, checksum)
+            
+            config_data = self.load_data('config')
+            config_data['last_backup'] = datetime.now().isoformat()
+            self.save_data('config', config_data)
+            
+            print(f"Backup completed: {backup_path}")
+            return True
+        
+        except Exception as e:
+            print(f"Error creating database backup: {e}")
+            return False
+    
+    def _write_import(self, import_path: str):
+        """
+        Write every collection of a validated bundle in one transaction.
+        
+        Users and courses are inserted chunk by chunk; the other collections
+        are stored as single documents.
+        
+        Args:
+            import_path (str): Bundle file
+        """
+        documents = {}
+        with self.data_lock, self._own_write():
+            with self._lock, self.connection:
+                position = 0
+                for file_type, records in iter_bundle(import_path, self.IMPORT_BATCH_SIZE):
+                    if file_type in ('users', 'courses'):
+                        if file_type not in documents:
+                            documents[file_type] = None
+                            position = 0
+                            if file_type == 'users':
+                                self._delete_users(None)
+                            else:
+                                self._delete_courses(None)
+                        for record in records:
+                            if file_type == 'users':
+                                self._insert_user(record, position)
+                            else:
+                                self._insert_course(record, position)
+                            position += 1
+                    elif file_type in DOCUMENT_TYPES:
+                        documents.setdefault(file_type, {}).update(records)
+                    else:
+                        documents.setdefault(file_type, []).extend(records)
+                
+                for file_type, data in documents.items():
+                    if data is not None and file_type != 'config':
+                        self.connection.execute(
+                            "INSERT OR REPLACE INTO documents (file_type, data) VALUES (?, ?)",
+                            (file_type, self._dumps(data)))
+            for file_type in documents:
+                if file_type != 'config':
+                    self._bump_generation(file_type)
+        self.unreadable_types.difference_update(documents)
+        
+        if 'config' in documents:
+            self._import_config(documents['config'])
+    
+    def restore_from_backup(self, file_type: str, backup_timestamp: str) -> bool:
+        """
+        Restore one collection from a database backup.
+        
+        Args:
+            file_type (str): Type of data to restore
+            backup_timestamp (str): Timestamp of backup to restore
+        
+        Returns:
+            bool: True if restore successful, False otherwise
+        """
+        backup_path = os.path.join(self.backup_dir, f"portal_{backup_timestamp}.db")
+        if not os.path.exists(backup_path):
+            return super().restore_from_backup(file_type, backup_timestamp)
+        
+        try:
+            backup_connection = sqlite3.connect(backup_path)
+            try:
+                data = self._load_from_connection(backup_connection, file_type)
+            finally:
+                backup_connection.close()
+            
+            self.unreadable_types.discard(file_type)
+            if not self.save_data(file_type, data):
+                return False
+            
+            print(f"Restored {file_type} from backup {backup_timestamp}")
+            return True
+        
+        except Exception as e:
+            print(f"Error restoring {file_type} from backup: {e}")
+            return False
+    
+    def list_backups(self, file_type: str = None) -> List[str]:
+        """
+        List available backups, including database backups.
+        
+        Args:
+            file_type (str): Filter by file type (optional)
+        
+        Returns:
+            list: List of backup files, most recent first
+        """
+        if file_type is None:
+            return super().list_backups()
+        entries = self.backup_catalog.entries(file_type) + self.backup_catalog.entries('database')
+        return [entry['name'] for _, entry in sorted(entries, key=lambda pair: pair[1]['time'], reverse=True)]
+    
+    def get_file_info(self, file_type: str) -> Dict[str, Any]:
+        """
+        Get information about the storage of a collection.
+        
+        Args:
+            file_type (str): Type of data
+        
+        Returns:
+            dict: Storage information
+        """
+        if file_type == 'config':
+            return super().get_file_info(file_type)
+        
+        if file_type not in self.file_paths:
+            return {}
+        
+        try:
+            stat = os.stat(self.db_path)
+            return {
+                'exists': True,
+                'size': stat.st_size,
+                'modified': datetime.fromtimestamp(stat.st_mtime).isoformat(),
+                'path': self.db_path
+            }
+        except Exception as e:
+            return {'exists': False, 'error': str(e)}
+    
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self.connection.close()
@@ -0,0 +1,441 @@
+"""
+Lazy user mappings for the Portal System
+Keep a small index of users at startup (or a memory-mapped snapshot) and build User objects on first access
+"""
+
+from collections.abc import Mapping, MutableMapping
+from typing import Dict, List, Any, Iterable, Optional
+
+from utils.schema import upgrade_record
+
+
+class _IndexEntry:
+    """Where an unloaded user's record lives, plus the fields needed for lookups."""
+    
+    __slots__ = ('location', 'record', 'user_type', 'user_id', 'role_id')
+    
+    def __init__(self, record: Dict[str, Any], location: tuple):
+        self.user_type = (record.get('user_type') or '').lower()
+        self.user_id = record.get('user_id')
+        self.role_id = record.get(f"{self.user_type}_id") or self.user_id
+        self.location = location
+        # Records without a file location (journaled or database rows) are kept as-is
+        self.record = record if location is None else None
+
+
+class LazyUserMap(MutableMapping):
+    """
+    Username -> User mapping that hydrates users on first access.
+    
+    At startup only an index entry per user is kept: the record's location in
+    its data file (see FileManager.iter_record_locations) and its type and
+    IDs. Looking a user up reads and parses just that record. Iteration order
+    is the order of the data file, as with a plain dict.
+    
+    Secondary dictionaries map each role ID (student_id, teacher_id,
+    admin_id) and user_id to a username. Every change to the mapping goes
+    through _set_entry/_remove_entry, which keep them in step, and users it
+    holds report IDs reassigned on them (see User.__setattr__), so
+    find_username is a dictionary hit.
+    """
+    
+    ID_ATTRIBUTES = {'student': 'student_id', 'teacher': 'teacher_id', 'admin': 'admin_id'}
+    
+    def __init__(self, file_manager, factory):
+        """
+        Initialize LazyUserMap.
+        
+        Args:
+            file_manager: FileManager the records are read from
+            factory: Callable turning a record into a User (or None)
+        """
+        self.file_manager = file_manager
+        self.factory = factory
+        self._entries = {}  # username -> User or _IndexEntry
+        self._role_ids = {user_type: {} for user_type in self.ID_ATTRIBUTES}  # user type -> role ID -> username
+        self._user_ids = {}  # user_id -> username
+    
+    def index(self):
+        """Index every stored user without hydrating any of them."""
+        for record, location in self.file_manager.iter_record_locations('users'):
+            entry = _IndexEntry(record, location)
+            if entry.user_type in self.ID_ATTRIBUTES and record.get('username'):
+                self._set_entry(record['username'], entry)
+    
+    def __getitem__(self, username: str):
+        value = self._entries[username]
+        if not isinstance(value, _IndexEntry):
+            return value
+        
+        user = self._hydrate(username, value)
+        if user is None:
+            self._remove_entry(username)
+            raise KeyError(username)
+        return user
+    
+    def __setitem__(self, username: str, user):
+        self._set_entry(username, user)
+    
+    def __delitem__(self, username: str):
+        if username not in self._entries:
+            raise KeyError(username)
+        self._remove_entry(username)
+    
+    def __iter__(self):
+        return iter(list(self._entries))
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __contains__(self, username) -> bool:
+        return username in self._entries
+    
+    def is_loaded(self, username: str) -> bool:
+        """Check whether a user has been hydrated."""
+        return username in self._entries and not isinstance(self._entries[username], _IndexEntry)
+    
+    def loaded_values(self) -> List[Any]:
+        """Get the users hydrated so far (the only ones that can have unsaved changes)."""
+        return [value for value in self._entries.values() if not isinstance(value, _IndexEntry)]
+    
+    def records(self) -> Iterable[Dict[str, Any]]:
+        """
+        Yield every user as a record without hydrating unloaded users.
+        
+        Yields:
+            dict: to_dict() of loaded users, the stored record of the others
+        """
+        for username in list(self._entries):
+            value = self._entries.get(username)
+            if value is None:
+                continue
+            if not isinstance(value, _IndexEntry):
+                yield value.to_dict()
+                continue
+            record = self._read(username, value)
+            if record is not None:
+                yield record
+    
+    def usernames_of_type(self, user_type: str) -> List[str]:
+        """
+        Get the usernames of all users of one type, without hydrating them.
+        
+        Args:
+            user_type (str): 'student', 'teacher' or 'admin'
+        
+        Returns:
+            list: Usernames in mapping order
+        """
+        user_type = user_type.lower()
+        return [username for username, value in self._entries.items()
+                if (value.user_type if isinstance(value, _IndexEntry)
+                    else value.get_user_type().lower()) == user_type]
+    
+    def find_username(self, id_value: str, user_type: str = None, by_user_id: bool = False) -> Optional[str]:
+        """
+        Find a user by ID, without hydrating any user.
+        
+        Args:
+            id_value (str): ID to look for
+            user_type (str): Only match this role's ID ('student', 'teacher', 'admin');
+                None matches any role ID (student_id, teacher_id or admin_id)
+            by_user_id (bool): Match user_id instead of role IDs
+        
+        Returns:
+            str: Username, or None if not found
+        """
+        username = self._lookup_id(id_value, user_type, by_user_id)
+        if username is None or self._matches(username, id_value, user_type, by_user_id):
+            return username
+        
+        # The user's IDs were changed in place since they were indexed
+        self._reindex_ids()
+        username = self._lookup_id(id_value, user_type, by_user_id)
+        return username if self._matches(username, id_value, user_type, by_user_id) else None
+    
+    def sync(self, keep: Iterable[str] = ()) -> Dict[str, List[str]]:
+        """
+        Patch the mapping to match the stored users after an external change.
+        
+        Unloaded users only get their index entry refreshed; loaded users are
+        rebuilt when their stored record differs, unless they have unsaved
+        changes (their next save resolves the conflict).
+        
+        Args:
+            keep (iterable): Usernames never added back or removed (e.g. deleted or
+                logged in locally)
+        
+        Returns:
+            dict: 'added', 'updated' and 'removed' usernames
+        """
+        keep = set(keep)
+        seen = set()
+        changes = {'added': [], 'updated': [], 'removed': []}
+        
+        for record, location in self.file_manager.iter_record_locations('users'):
+            username = record.get('username')
+            entry = _IndexEntry(record, location)
+            if entry.user_type not in self.ID_ATTRIBUTES or not username:
+                continue
+            seen.add(username)
+            
+            value = self._entries.get(username)
+            if value is None:
+                if username in keep:
+                    continue
+                self._set_entry(username, entry)
+                changes['added'].append(username)
+            elif isinstance(value, _IndexEntry):
+                self._set_entry(username, entry)
+            elif not value.is_dirty and value.to_dict() != self._comparable(record):
+                user = self.factory(record)
+                if user is not None:
+                    user.mark_clean()
+                    self._set_entry(username, user)
+                    changes['updated'].append(username)
+        
+        for username, value in list(self._entries.items()):
+            if username not in seen and username not in keep and (
+                    isinstance(value, _IndexEntry) or not value.is_dirty):
+                self._remove_entry(username)
+                changes['removed'].append(username)
+        
+        return changes
+    
+    @staticmethod
+    def _comparable(record: Dict[str, Any]) -> Dict[str, Any]:
+        """Get a stored record in the shape to_dict() gives the User built from it."""
+        record = upgrade_record('users', record)
+        return dict(record, _version=record.get('_version', 0))
+    
+    def _hydrate(self, username: str, entry: _IndexEntry):
+        """Build the User for an index entry and keep it in place of the entry."""
+        record = self._read(username, entry)
+        if record is None:
+            return None
+        user = self.factory(record)
+        if user is not None:
+            user.mark_clean()
+            self._set_entry(username, user)
+        return user
+    
+    def _read(self, username: str, entry: _IndexEntry) -> Optional[Dict[str, Any]]:
+        """Read the record for an index entry, re-indexing if its file was rewritten."""
+        if entry.record is not None:
+            return entry.record
+        
+        record = self.file_manager.read_record(entry.location)
+        if record is None:
+            self._reindex()
+            entry = self._entries.get(username)
+            if not isinstance(entry, _IndexEntry):
+                return None
+            record = entry.record if entry.location is None else self.file_manager.read_record(entry.location)
+        return record
+    
+    def _reindex(self):
+        """Refresh the locations of unloaded users after their file was rewritten."""
+        for record, location in self.file_manager.iter_record_locations('users'):
+            username = record.get('username')
+            if isinstance(self._entries.get(username), _IndexEntry):
+                self._set_entry(username, _IndexEntry(record, location))
+    
+    def ids_changing(self, user):
+        """Drop a held user's IDs from the ID dictionaries; called by User before one is reassigned."""
+        username = user.username
+        if self._entries.get(username) is user:
+            self._unindex_ids(username, user)
+    
+    def ids_changed(self, user):
+        """Index a held user's IDs again; called by User after one was reassigned."""
+        username = user.username
+        if self._entries.get(username) is user:
+            self._index_ids(username, user)
+    
+    def _set_entry(self, username: str, value):
+        """Store a User or index entry under a username and index its IDs."""
+        if username in self._entries:
+            self._release(username, self._entries[username])
+        self._entries[username] = value
+        self._index_ids(username, value)
+        if not isinstance(value, _IndexEntry):
+            # Reassigning an ID on the user reports back (see User.__setattr__)
+            object.__setattr__(value, '_user_map', self)
+    
+    def _remove_entry(self, username: str):
+        """Drop a username and its IDs."""
+        self._release(username, self._entries.pop(username))
+    
+    def _release(self, username: str, value):
+        """Unindex the IDs of a value leaving the mapping and detach it if it is a User."""
+        self._unindex_ids(username, value)
+        if not isinstance(value, _IndexEntry) and value.__dict__.get('_user_map') is self:
+            object.__setattr__(value, '_user_map', None)
+    
+    def _index_ids(self, username: str, value):
+        user_type, role_id, user_id = self._ids(value)
+        if user_type in self._role_ids and role_id is not None:
+            self._role_ids[user_type].setdefault(role_id, username)
+        if user_id is not None:
+            self._user_ids.setdefault(user_id, username)
+    
+    def _unindex_ids(self, username: str, value):
+        user_type, role_id, user_id = self._ids(value)
+        if self._role_ids.get(user_type, {}).get(role_id) == username:
+            del self._role_ids[user_type][role_id]
+        if self._user_ids.get(user_id) == username:
+            del self._user_ids[user_id]
+    
+    def _reindex_ids(self):
+        """Rebuild the ID dictionaries from the users' current IDs."""
+        self._role_ids = {user_type: {} for user_type in self.ID_ATTRIBUTES}
+        self._user_ids = {}
+        for username, value in self._entries.items():
+            self._index_ids(username, value)
+    
+    def _lookup_id(self, id_value: str, user_type: str, by_user_id: bool) -> Optional[str]:
+        if by_user_id:
+            return self._user_ids.get(id_value)
+        user_types = [user_type.lower()] if user_type else list(self.ID_ATTRIBUTES)
+        return next((self._role_ids[entry_type][id_value] for entry_type in user_types
+                     if id_value in self._role_ids.get(entry_type, {})), None)
+    
+    def _matches(self, username: Optional[str], id_value: str, user_type: str, by_user_id: bool) -> bool:
+        """Check that an indexed username still holds the ID it was found under."""
+        value = self._entries.get(username)
+        if value is None:
+            return False
+        entry_type, role_id, user_id = self._ids(value)
+        if by_user_id:
+            return user_id == id_value
+        return role_id == id_value and (user_type is None or user_type.lower() == entry_type)
+    
+    @classmethod
+    def _ids(cls, value) -> tuple:
+        """Get (user type, role ID, user_id) of a User or index entry."""
+        if isinstance(value, _IndexEntry):
+            return value.user_type, value.role_id, value.user_id
+        user_type = value.get_user_type().lower()
+        return user_type, getattr(value, cls.ID_ATTRIBUTES.get(user_type, ''), None), value.user_id
+
+
+class SnapshotUserMap(Mapping):
+    """
+    Read-only username -> User mapping served from a memory-mapped snapshot.
+    
+    Opening it costs nothing per user: lookups binary-search the snapshot
+    index and parse one record, and type and ID scans only read the short
+    tag and secondary-key fields. Iteration is in username order.
+    """
+    
+    def __init__(self, snapshot, factory):
+        """
+        Initialize SnapshotUserMap.
+        
+        Args:
+            snapshot: Open users Snapshot
+            factory: Callable turning a record into a User (or None)
+        """
+        self.snapshot = snapshot
+        self.factory = factory
+        self._loaded = {}  # username -> User built so far
+        self._loaded_ids = {}  # username -> (user type, role ID, user_id) the User was built with
+        self._role_ids = None  # user type -> role ID -> username, built on the first lookup
+        self._user_ids = None  # user_id -> username, built on the first lookup by user_id
+    
+    def __getitem__(self, username: str):
+        if username in self._loaded:
+            return self._loaded[username]
+        
+        record = self.snapshot.get(username)
+        user = self.factory(record) if record is not None else None
+        if user is None:
+            raise KeyError(username)
+        user.mark_clean()
+        self._loaded[username] = user
+        self._loaded_ids[username] = LazyUserMap._ids(user)
+        return user
+    
+    def __iter__(self):
+        return iter(self.snapshot.keys())
+    
+    def __len__(self) -> int:
+        return self.snapshot.count
+    
+    def __contains__(self, username) -> bool:
+        return isinstance(username, str) and self.snapshot.find(username) is not None
+    
+    def is_loaded(self, username: str) -> bool:
+        """Check whether a user has been built."""
+        return username in self._loaded
+    
+    def loaded_values(self) -> List[Any]:
+        """Get the users built so far."""
+        return list(self._loaded.values())
+    
+    def records(self) -> Iterable[Dict[str, Any]]:
+        """Yield every stored record in username order."""
+        for position in range(self.snapshot.count):
+            yield self.snapshot.record_at(position)
+    
+    def usernames_of_type(self, user_type: str) -> List[str]:
+        """
+        Get the usernames of all users of one type.
+        
+        Args:
+            user_type (str): 'student', 'teacher' or 'admin'
+        
+        Returns:
+            list: Usernames in username order
+        """
+        user_type = user_type.lower()
+        return [self.snapshot.key_at(position) for position in range(self.snapshot.count)
+                if self.snapshot.tag_at(position) == user_type]
+    
+    def find_username(self, id_value: str, user_type: str = None, by_user_id: bool = False) -> Optional[str]:
+        """
+        Find a user by ID (same arguments as LazyUserMap.find_username).
+        
+        The snapshot never changes, so its IDs are put in dictionaries once:
+        role IDs from the secondary-key fields, user IDs (which need every
+        record parsed) on the first lookup by user_id. Users built from it
+        may have had an ID reassigned in memory, so those few are checked
+        by their current IDs.
+        
+        Returns:
+            str: Username, or None if not found
+        """
+        username = self._stored_username(id_value, user_type, by_user_id)
+        changed = [name for name, user in self._loaded.items()
+                   if LazyUserMap._ids(user) != self._loaded_ids[name]]
+        if username in changed:
+            username = None
+        for name in changed:
+            entry_type, role_id, user_id = LazyUserMap._ids(self._loaded[name])
+            if (user_id == id_value if by_user_id
+                    else role_id == id_value and (user_type is None or user_type.lower() == entry_type)):
+                return name
+        return username
+    
+    def _stored_username(self, id_value: str, user_type: str = None, by_user_id: bool = False) -> Optional[str]:
+        """Look an ID up in the snapshot's ID dictionaries."""
+        if by_user_id:
+            if self._user_ids is None:
+                self._user_ids = {}
+                for position in range(self.snapshot.count):
+                    self._user_ids.setdefault(self.snapshot.record_at(position).get('user_id'),
+                                              self.snapshot.key_at(position))
+            return self._user_ids.get(id_value)
+        
+        if self._role_ids is None:
+            self._role_ids = {}
+            for position in range(self.snapshot.count):
+                self._role_ids.setdefault(self.snapshot.tag_at(position), {}).setdefault(
+                    self.snapshot.secondary_at(position), self.snapshot.key_at(position))
+        user_types = [user_type.lower()] if user_type else list(LazyUserMap.ID_ATTRIBUTES)
+        return next((self._role_ids[entry_type][id_value] for entry_type in user_types
+                     if id_value in self._role_ids.get(entry_type, {})), None)
+    
+    def close(self):
+        """Release the snapshot's memory map."""
+        self.snapshot.close()
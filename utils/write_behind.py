@@ -0,0 +1,152 @@
+"""
+Write-behind persistence for the Portal System
+Queues change sets from the foreground and writes them on a dedicated thread
+"""
+
+import threading
+from typing import Dict, Any, Callable
+
+
+class WriteBehindWriter:
+    """
+    Persists queued change sets on a background thread.
+    
+    A change set maps a collection to {'put': {key: record}, 'delete': set of
+    keys, 'base': {key: version the change was based on}}. Change sets queued
+    while the writer is busy are coalesced into one (the latest put or delete
+    of a key wins, the earliest base version is kept), so bursts of
+    mutations cost a single write. Records are captured as dicts when
+    queued, so the writer never touches live objects.
+    
+    Durability: once flush() returns, every change queued before the call has
+    been written to its file, journal or database; wait_durable() additionally
+    waits for the group-commit fsync.
+    """
+    
+    def __init__(self, persist: Callable[[Dict[str, Any]], bool], sync: Callable[[], bool]):
+        """
+        Initialize WriteBehindWriter.
+        
+        Args:
+            persist: Callable writing one (coalesced) change set, returning success
+            sync: Callable forcing written files to disk (FileManager.flush)
+        """
+        self.persist = persist
+        self.sync = sync
+        
+        self.pending = {}  # Coalesced change set awaiting the writer
+        self.queued = 0  # Change sets submitted so far
+        self.written = 0  # Change sets written so far
+        self.writes = 0  # Persist calls made (lower than queued when coalescing)
+        self.failed = False  # Whether any write failed since the last flush
+        
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = None
+    
+    def submit(self, changes: Dict[str, Dict[str, Any]]):
+        """
+        Queue a change set; returns without doing any I/O.
+        
+        Args:
+            changes (dict): Collection -> {'put': {key: record}, 'delete': set of keys,
+                'base': {key: version}}
+        """
+        with self._condition:
+            for file_type, change in changes.items():
+                pending = self.pending.setdefault(file_type, {'put': {}, 'delete': set(), 'base': {}})
+                for key, version in change.get('base', {}).items():
+                    pending['base'].setdefault(key, version)
+                for key in change.get('delete', ()):
+                    pending['put'].pop(key, None)
+                    pending['delete'].add(key)
+                for key, record in change.get('put', {}).items():
+                    pending['delete'].discard(key)
+                    pending['put'][key] = record
+            self.queued += 1
+            
+            if self._thread is None and not self._stopped:
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+        
+        if self._stopped:
+            # No writer thread after shutdown; write in the caller instead
+            self._write_pending()
+    
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Wait until every change queued so far has been written.
+        
+        Args:
+            timeout (float): Seconds to wait at most (None waits indefinitely)
+        
+        Returns:
+            bool: True if everything was written without errors
+        """
+        with self._condition:
+            target = self.queued
+            if self._thread is None or not self._thread.is_alive():
+                written = True
+            else:
+                written = self._condition.wait_for(lambda: self.written >= target, timeout)
+        
+        if self._thread is None or not self._thread.is_alive():
+            self._write_pending()
+        
+        with self._condition:
+            success = written and not self.failed
+            self.failed = False
+        return success
+    
+    def wait_durable(self, timeout: float = None) -> bool:
+        """
+        Wait until every change queued so far is written and synced to disk.
+        
+        Args:
+            timeout (float): Seconds to wait at most for the writer
+        
+        Returns:
+            bool: True if everything was written and synced
+        """
+        written = self.flush(timeout)
+        return self.sync() and written
+    
+    def shutdown(self):
+        """Stop the writer thread after it has written everything queued."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        self._write_pending()
+    
+    def _write_pending(self) -> bool:
+        """Take the coalesced change set and write it."""
+        with self._condition:
+            changes, self.pending = self.pending, {}
+            target = self.queued
+        
+        success = True
+        if changes:
+            try:
+                success = self.persist(changes)
+            except Exception as e:
+                print(f"Error writing queued changes: {e}")
+                success = False
+        
+        with self._condition:
+            self.writes += 1 if changes else 0
+            self.written = max(self.written, target)
+            self.failed = self.failed or not success
+            self._condition.notify_all()
+        return success
+    
+    def _run(self):
+        """Background loop: wait for queued changes and write them."""
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self.pending or self._stopped)
+                if self._stopped and not self.pending:
+                    return
+            self._write_pending()